@@ -3,7 +3,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from app.api.dependencies import get_current_admin
-from app.firebase import get_firestore_client
+from app.repository import get_firestore
 import logging
 from app.models import AdminAssignRole
 logger = logging.getLogger(__name__)
@@ -13,14 +13,12 @@ router = APIRouter()
 
 
 @router.post("/assign-role", status_code=200, tags=["Admin"])
-def assign_role(role_assignment: AdminAssignRole,request: Request, current_admin: dict = Depends(get_current_admin)):
+async def assign_role(role_assignment: AdminAssignRole,request: Request, current_admin: dict = Depends(get_current_admin)):
 
-    firestore_client = get_firestore_client(request.app)
-    user_ref = firestore_client.collection('user').document(role_assignment.uid)
-    user_doc = user_ref.get()
-    if not user_doc.exists:
+    firestore = get_firestore(request.app)
+    if await firestore.get_user(role_assignment.uid) is None:
         logger.error(f"Attempted to assign role to non-existent user: {role_assignment.uid}")
         raise HTTPException(status_code=404, detail="User not found")
-    user_ref.update({"role": role_assignment.role})
+    await firestore.update_user(role_assignment.uid, {"role": role_assignment.role})
     logger.info(f"User {role_assignment.uid} assigned role {role_assignment.role} by admin {current_admin.get('uid')}")
     return {"message": f"User {role_assignment.uid} assigned role {role_assignment.role} successfully."}
\ No newline at end of file
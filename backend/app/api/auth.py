@@ -4,9 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from app.models import UserOut, Token, UserIn
-from app.firebase import get_auth_client, verify_firebase_id_token, get_firestore_client
+from app.firebase import get_auth_client, verify_firebase_id_token
+from app.repository import get_firestore
 from app.config import settings
 import logging
+import asyncio
 from firebase_admin import firestore
 from firebase_admin import auth as admin_auth  # Ensure Firebase Admin SDK is initialized
 logger = logging.getLogger(__name__)
@@ -17,11 +19,11 @@ router = APIRouter()
 # backend/app/api/auth.py
 
 @router.post("/register", response_model=UserOut, tags=["Authentication"])
-def register(user_in: UserIn, request: Request):
+async def register(user_in: UserIn, request: Request):
     try:
-        firestore_client = get_firestore_client(request.app)
-        # Create user in Firebase Authentication
-        user = get_auth_client(request.app).create_user(
+        # Create user in Firebase Authentication (a blocking HTTP call of the Admin SDK)
+        user = await asyncio.to_thread(
+            get_auth_client(request.app).create_user,
             email=user_in.email,
             password=user_in.password,
             display_name=user_in.username,  # Set display name as username
@@ -29,8 +31,7 @@ def register(user_in: UserIn, request: Request):
         logger.info(f"User created with UID: {user.uid}")
 
         # Create corresponding Firestore User document
-        user_doc_ref = firestore_client.collection('user').document(user.uid)
-        user_doc_ref.set({
+        await get_firestore(request.app).create_user(user.uid, {
             "uid": user.uid,
             "username": user_in.username,
             "email": user_in.email,
@@ -43,7 +44,7 @@ def register(user_in: UserIn, request: Request):
         logger.info(f"Firestore User document created for UID: {user.uid}")
 
         # Generate custom token
-        custom_token = get_auth_client(request.app).create_custom_token(user.uid)
+        custom_token = await asyncio.to_thread(get_auth_client(request.app).create_custom_token, user.uid)
         custom_token_str = custom_token.decode('utf-8')  # Decode bytes to string
 
         return UserOut(uid=user.uid, email=user.email, access_token=custom_token_str)
@@ -1,19 +1,101 @@
 # backend/app/api/chat.py
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sse_starlette.sse import EventSourceResponse
-from app.models import ChatRequest, ChatResponse, User
+from typing import List, Optional
+from datetime import datetime, timezone
+from app.models import ChatMessageOut, ChatRequest, ChatResponse, ChatSummaryOut, User
+from app.api.pagination import NEXT_PAGE_HEADER, decode_page_token, encode_page_token
+from app.config import settings
 from app.api.dependencies import get_current_user  # Ensure correct import
 from app.assistants.assistant import RAGAssistant
-from app.firebase import get_firestore_client
+from app.assistants.admission import AdmissionRejected, get_admission_controller
+from app.assistants.registry import ChatBusy, RegistryFull, get_assistant_registry
+from app.repository import get_firestore
 
 import logging
-import asyncio
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+CHAT_BUSY_DETAIL = "A message in this chat is still being answered. Please wait for it to finish."
+
+# Chat list fields; message bodies are never loaded for the list
+CHAT_LIST_FIELDS = ['created_at', 'last_activity', 'message_count']
+
+
+@router.get("", response_model=List[ChatSummaryOut], tags=["Chat"])
+async def list_chats(
+    request: Request,
+    response: Response,
+    limit: int = Query(settings.CHATS_PAGE_SIZE, ge=1, le=settings.CHATS_MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    List the current user's chats, newest first, without their messages.
+    The token for the next page is returned in the `X-Next-Page-Token` header.
+    """
+    cursor = decode_page_token(page_token, 'created_at') if page_token else None
+    try:
+        # One extra chat tells whether another page follows
+        docs = await get_firestore(request.app).list_chats(current_user["uid"], limit + 1, CHAT_LIST_FIELDS, cursor)
+    except Exception as e:
+        logger.exception(f"Failed to list chats for user_id {current_user['uid']}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to list chats.")
+
+    chats = [ChatSummaryOut(chat_id=doc.id, **doc.to_dict()) for doc in docs[:limit]]
+    if len(docs) > limit:
+        response.headers[NEXT_PAGE_HEADER] = encode_page_token(chats[-1].chat_id, chats[-1].created_at)
+    return chats
+
+
+@router.get("/{chat_id}/messages", response_model=List[ChatMessageOut], tags=["Chat"])
+async def list_messages(
+    chat_id: str,
+    request: Request,
+    response: Response,
+    before: Optional[datetime] = None,
+    limit: int = Query(settings.CHAT_MESSAGES_PAGE_SIZE, ge=1, le=settings.CHAT_MESSAGES_MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Return up to `limit` messages of a chat created before `before` (default: the
+    latest ones), oldest first. To load earlier messages, pass the value of the
+    `X-Next-Page-Token` header as `before`.
+    """
+    if before is not None and before.tzinfo is None:
+        before = before.replace(tzinfo=timezone.utc)
+    firestore = get_firestore(request.app)
+    chat_data = await firestore.get_chat(chat_id, field_paths=['user_id', 'messages_in_subcollection'])
+    if chat_data is None:
+        raise HTTPException(status_code=404, detail="Chat not found.")
+    if chat_data.get('user_id') != current_user["uid"]:
+        raise HTTPException(status_code=403, detail="Not authorized to access this chat.")
+
+    try:
+        if chat_data.get('messages_in_subcollection'):
+            docs = await firestore.list_messages(chat_id, limit + 1, before)
+            has_more = len(docs) > limit
+            messages = [ChatMessageOut(id=doc.id, **doc.to_dict()) for doc in reversed(docs[:limit])]
+        else:
+            # Chats created before the messages subcollection only have the embedded array
+            legacy = await firestore.get_chat(chat_id, field_paths=['messages'])
+            embedded = sorted((legacy or {}).get('messages', []), key=lambda m: m['created_at'])
+            if before is not None:
+                embedded = [m for m in embedded if m['created_at'] < before]
+            has_more = len(embedded) > limit
+            messages = [ChatMessageOut(**m) for m in embedded[-limit:]]
+    except Exception as e:
+        logger.exception(f"Failed to load messages of chat {chat_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load messages.")
+
+    if has_more and messages:
+        response.headers[NEXT_PAGE_HEADER] = messages[0].created_at.isoformat()
+    return messages
+
+
 @router.post("/{chat_id}/message", tags=["Chat"])
 async def post_message(
     chat_id: str,
@@ -22,22 +104,52 @@ async def post_message(
     current_user: dict = Depends(get_current_user),
 ):
     
-    firestore_client = get_firestore_client(request.app)
-    chat_ref = firestore_client.collection('chats').document(chat_id)
-    chat_doc = await asyncio.to_thread(chat_ref.get)
-    if not chat_doc.exists:
+    firestore = get_firestore(request.app)
+    # The whole chat is read once: the ownership check and the turn's history share it
+    chat_data = await firestore.get_chat(chat_id)
+    if chat_data is None:
         raise HTTPException(status_code=404, detail="Chat not found.")
-    if chat_doc.to_dict().get('user_id') != current_user["uid"]:
+    if chat_data.get('user_id') != current_user["uid"]:
         raise HTTPException(status_code=403, detail="Not authorized to access this chat.")
 
-    assistant = RAGAssistant(
-        chat_id=chat_id,
-        firestore_client=firestore_client,
-        user_id=current_user["uid"],
-        user_name=current_user["username"],
-        app=request.app
-    )
-    await assistant.handle_message(chat_in.question)
+    # One turn per chat at a time; checked again when the turn registers
+    registry = get_assistant_registry(request.app)
+    if registry.is_busy(chat_id):
+        raise HTTPException(status_code=409, detail=CHAT_BUSY_DETAIL)
+
+    admission = get_admission_controller(request.app)
+    try:
+        await admission.acquire(current_user["uid"])
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+    try:
+        assistant = RAGAssistant(
+            chat_id=chat_id,
+            firestore=firestore,
+            user_id=current_user["uid"],
+            user_name=current_user["username"],
+            app=request.app
+        )
+        registry.register(chat_id, assistant)
+    except ChatBusy:
+        admission.release(current_user["uid"])
+        raise HTTPException(status_code=409, detail=CHAT_BUSY_DETAIL)
+    except RegistryFull:
+        admission.release(current_user["uid"])
+        raise HTTPException(status_code=503, detail="The assistant is busy. Please try again shortly.",
+                            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)})
+    except Exception:
+        admission.release(current_user["uid"])
+        raise
+    try:
+        await assistant.handle_message(chat_in.question, chat_data)
+    except Exception:
+        registry.finished(chat_id, assistant, abandoned=True)
+        admission.release(current_user["uid"])
+        raise
+    # The slot is held until the turn (including streaming) has finished
+    assistant.process_task.add_done_callback(lambda _: admission.release(current_user["uid"]))
     return {"message": "Message received. You can now connect to the stream."}
 
 @router.get("/{chat_id}/stream", tags=["Chat"])
@@ -46,8 +158,25 @@ async def stream_response(
     request: Request,
     current_user: dict = Depends(get_current_user),
 ):
-    assistant = RAGAssistant.get_assistant(chat_id)
+    registry = get_assistant_registry(request.app)
+    assistant = registry.get(chat_id)
     if not assistant:
         raise HTTPException(status_code=400, detail="No message processing found for this chat.")
+    # Covers running turns and finished ones whose stream is still unread alike
+    if assistant.user_id != current_user["uid"]:
+        raise HTTPException(status_code=403, detail="Not authorized to access this chat.")
     sse_stream = await assistant.get_stream()
-    return EventSourceResponse(sse_stream)
\ No newline at end of file
+
+    async def events():
+        try:
+            async for event in sse_stream:
+                yield event
+        finally:
+            # EventSourceResponse stops iterating when the client disconnects; nobody
+            # reads the rest of the answer, so generating it is cancelled
+            if not sse_stream.finished:
+                assistant.cancel("client_disconnected")
+            # A turn that is still running removes itself when it ends
+            registry.remove(chat_id, assistant)
+
+    return EventSourceResponse(events())
\ No newline at end of file
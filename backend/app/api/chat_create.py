@@ -3,12 +3,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
-from app.firebase import get_firestore_client
+from app.repository import get_firestore
 from app.api.dependencies import get_current_user
 from uuid import uuid4
 from datetime import datetime, timezone
 import logging
-import asyncio
 
 
 router = APIRouter()
@@ -27,16 +26,18 @@ async def create_new_chat(
     Endpoint to create a new chat. Generates a unique chat_id and initializes the chat document in Firestore.
     
     """
-    firestore_client = get_firestore_client(request.app)
+    firestore = get_firestore(request.app)
     uid = current_user['uid']
     chat_id = f"chat_{uuid4().hex}"
-    chat_ref = firestore_client.collection('chats').document(chat_id)
     
     try:
-        await asyncio.to_thread(chat_ref.set, {
+        await firestore.create_chat(chat_id, {
             'user_id': uid,
             'created_at': datetime.now(timezone.utc),
-            'messages': []
+            'messages': [],
+            'message_count': 0,
+            # Messages are also written to chats/{id}/messages for paginated reads
+            'messages_in_subcollection': True,
         })
         logger.info(f"New chat created with chat_id: {chat_id} for user_id: {uid}")
         return NewChatResponse(chat_id=chat_id)
@@ -2,7 +2,9 @@
 
 from fastapi import Request, Depends, HTTPException, status
 from firebase_admin import auth
-from app.firebase import get_auth_client, get_firestore_client
+from app.firebase import get_auth_client
+from app.metrics import AUTH_LATENCY
+from app.repository import get_firestore
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,6 +34,10 @@ async def get_current_user(request: Request) -> dict:
     """
     Retrieve the current authenticated user from the request.
     """
+    with AUTH_LATENCY.time():
+        return await _authenticate(request)
+
+async def _authenticate(request: Request) -> dict:
     token = request.cookies.get("access_token")
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
@@ -59,12 +65,10 @@ async def get_current_user(request: Request) -> dict:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     
     # Fetch additional user information from Firestore
-    firestore_client = get_firestore_client(request.app)
-    user_doc = firestore_client.collection("user").document(uid).get()
-    if not user_doc.exists:
+    user_data = await get_firestore(request.app).get_user(uid)
+    if user_data is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    user_data = user_doc.to_dict()
     full_user_data = {**decoded_token, **user_data}
     return full_user_data
 
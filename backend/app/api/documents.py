@@ -1,39 +1,89 @@
 # backend/app/api/documents.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
-from typing import List
-from app.models import DocumentOut  # Ensure this Pydantic model is defined appropriately
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response, Request
+from typing import List, Optional
+import hashlib
+from app.models import (  # Ensure these Pydantic models are defined appropriately
+    BatchDeleteItemResult,
+    BatchDeleteRequest,
+    BatchDeleteResponse,
+    DocumentOut,
+    DocumentSummaryOut,
+)
 from app.api.dependencies import get_current_user, get_current_admin # Authentication dependency
-from app.firebase import get_firestore_client, get_storage_bucket
+from app.api.pagination import NEXT_PAGE_HEADER, decode_page_token, encode_page_token
+from app.firebase import get_storage_bucket
 from app.db import get_weaviate_client
+from app.config import settings
+from app.ingestion import IngestionConflict, discard_spool
+from app.loader import ingest_and_index
+from app.repository import get_firestore
 from urllib.parse import urlparse
 from urllib.parse import urlparse, unquote
 from weaviate import Client
 import logging
 import asyncio
+from datetime import timedelta
 from weaviate.classes.query import Filter
+from google.api_core.exceptions import NotFound
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# A transaction allows 500 writes; one is the summary update
+FIRESTORE_DELETE_BATCH_SIZE = 499
+
+# Fields needed to build a DocumentOut; everything else stays on the server
+DOCUMENT_LIST_FIELDS = [
+    "description", "file_name", "file_type", "file_url", "size", "upload_id", "uploaded_at", "user_id", "ingestion",
+]
+
+
+def _listing_etag(uid: str, version: int, limit: int, page_token: Optional[str]) -> str:
+    digest = hashlib.sha1(f"{uid}|{limit}|{page_token or ''}".encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" match
+    return "*" in candidates or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
+
+
 @router.get("/documents", response_model=List[DocumentOut], tags=["Documents"],)
-async def get_documents(request: Request,current_user: dict = Depends(get_current_user)):
+async def get_documents(
+    request: Request,
+    response: Response,
+    limit: int = Query(settings.DOCUMENTS_PAGE_SIZE, ge=1, le=settings.DOCUMENTS_MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
     """
-    Fetch a list of documents with metadata from Firestore.
+    Fetch one page of the user's documents from Firestore, newest first.
+
+    The token for the next page is returned in the `X-Next-Page-Token` header. Responses
+    carry an ETag derived from the user's document collection version, so clients that
+    send `If-None-Match` get a 304 until a document is uploaded or deleted.
     """
-    firestore_client = get_firestore_client(request.app)
-    if not firestore_client:
-        logger.error("Firestore client is not initialized.")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal server error.",
-        )
-    
+    firestore = get_firestore(request.app)
+    uid = current_user.get("uid")
+    cursor = decode_page_token(page_token, "uploaded_at") if page_token else None
     try:
-        # Fetch all documents from Firestore 'documents' collection for the current user
-        docs = await asyncio.to_thread(lambda: firestore_client.collection("documents").where("user_id", "==", current_user.get("uid")).stream())
+        # Read the version before the page: a concurrent change then shows up as a newer
+        # version on the next request instead of a 304 for stale data
+        version = await firestore.get_document_version(uid)
+        etag = _listing_etag(uid, version, limit, page_token)
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+        # One extra document tells whether another page follows
+        docs = await firestore.list_documents(uid, limit + 1, DOCUMENT_LIST_FIELDS, cursor)
+
         documents = []
-        for doc in docs:
+        for doc in docs[:limit]:
             doc_data = doc.to_dict()
             documents.append(DocumentOut(
                 id=doc.id,
@@ -44,9 +94,14 @@ async def get_documents(request: Request,current_user: dict = Depends(get_curren
                 size=doc_data.get("size"),
                 upload_id=doc_data.get("upload_id"),
                 uploaded_at=doc_data.get("uploaded_at"),
-                user_id=doc_data.get("user_id")
+                user_id=doc_data.get("user_id"),
+                ingestion_status=(doc_data.get("ingestion") or {}).get("status"),
             ))
-        logger.info(f"Fetched {len(documents)} documents for user UID: {current_user.get('uid')}")
+
+        response.headers.update(cache_headers)
+        if len(docs) > limit:
+            response.headers[NEXT_PAGE_HEADER] = encode_page_token(documents[-1].id, documents[-1].uploaded_at)
+        logger.info(f"Fetched {len(documents)} documents for user UID: {uid}")
         return documents
     except Exception as e:
         logger.exception(f"Failed to fetch documents: {e}")
@@ -55,6 +110,39 @@ async def get_documents(request: Request,current_user: dict = Depends(get_curren
             detail="Failed to fetch documents.",
         )
 
+def _blob_path_from_url(file_url: str, bucket_name: str) -> str:
+    """Storage blob path of a (signed) download URL, without the bucket name."""
+    blob_path = unquote(urlparse(file_url).path.lstrip('/'))
+    if blob_path.startswith(f"{bucket_name}/"):
+        blob_path = blob_path[len(f"{bucket_name}/"):]
+    logger.debug(f"Final blob path: {blob_path}")
+    return blob_path
+
+
+def _delete_blob(storage_bucket, blob_path: str):
+    try:
+        storage_bucket.blob(blob_path).delete()
+    except NotFound:
+        logger.info(f"Blob {blob_path} was already deleted.")
+
+
+def _delete_vectors(weaviate_client, upload_ids: List[str]) -> int:
+    """
+    Deletes the chunks of all `upload_ids` with one filter. Weaviate caps the objects
+    removed per delete_many call, so the call repeats until nothing is left.
+    """
+    collection = weaviate_client.collections.get("ChatDocument")
+    where = Filter.by_property("upload_id").contains_any(list(upload_ids))
+    deleted = 0
+    while True:
+        result = collection.data.delete_many(where=where)
+        if result.failed:
+            raise RuntimeError(f"{result.failed} of {result.matches} vector objects could not be deleted")
+        if not result.successful:
+            return deleted
+        deleted += result.successful
+
+
 @router.delete("/documents/{document_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Documents"])
 async def delete_document(document_id: str,request: Request, current_user: dict = Depends(get_current_user)):
     """
@@ -62,8 +150,8 @@ async def delete_document(document_id: str,request: Request, current_user: dict
     """
     storage_bucket = get_storage_bucket(request.app)
     weaviate_client = get_weaviate_client(request.app)
-    firestore_client = get_firestore_client(request.app)
-    if not firestore_client or not storage_bucket or not weaviate_client:
+    firestore = get_firestore(request.app)
+    if not storage_bucket or not weaviate_client:
         logger.error("One or more services are not initialized.")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -72,14 +160,12 @@ async def delete_document(document_id: str,request: Request, current_user: dict
 
     try:
         # Get the document from Firestore
-        doc_ref = firestore_client.collection("documents").document(document_id)
-        doc_snapshot = await asyncio.to_thread(doc_ref.get)
+        doc_data = await firestore.get_document(document_id)
 
-        if not doc_snapshot.exists:
+        if doc_data is None:
             logger.warning(f"Document {document_id} not found.")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found.")
 
-        doc_data = doc_snapshot.to_dict()
 
         # Check if the current user is the owner
         if doc_data.get("user_id") != current_user.get("uid"):
@@ -88,12 +174,7 @@ async def delete_document(document_id: str,request: Request, current_user: dict
         upload_id = doc_data.get("upload_id")
         if upload_id:
             try:
-                # Construct the filter for deleting objects
-                collection = weaviate_client.collections.get("ChatDocument")
-                collection.data.delete_many(
-                    where=Filter.by_property("upload_id").contains_any([upload_id])
-                )
-                logger.info(f"Deleted vectors from Weaviate for upload_id: {upload_id}")
+                await asyncio.to_thread(_delete_vectors, weaviate_client, [upload_id])
             except Exception as e:
                 logger.error(f"Failed to delete vectors from Weaviate: {e}")
                 raise HTTPException(
@@ -105,30 +186,15 @@ async def delete_document(document_id: str,request: Request, current_user: dict
         # Delete the file from Firebase Storage
         file_url = doc_data.get("file_url")
         if file_url:
-            # Extract the blob path from the file URL
-            parsed_url = urlparse(file_url)
-
-            # Extract the path and decode it
-            blob_path = parsed_url.path.lstrip('/')
-            blob_path = unquote(blob_path)
-
-            # Ensure the blob path does not include the bucket name
-            bucket_name = storage_bucket.name
-            if blob_path.startswith(f"{bucket_name}/"):
-                blob_path = blob_path[len(f"{bucket_name}/"):]
-
-            logger.debug(f"Final blob path: {blob_path}")
-
-            # Now, blob_path should be ready for deletion
-            blob = storage_bucket.blob(blob_path)
-            await asyncio.to_thread(blob.delete)
+            blob_path = _blob_path_from_url(file_url, storage_bucket.name)
+            await asyncio.to_thread(_delete_blob, storage_bucket, blob_path)
             logger.info(f"Deleted file from Firebase Storage: {blob_path}")
 
-        
-
-        # Delete the document from Firestore
-        await asyncio.to_thread(doc_ref.delete)
+        # Delete the document from Firestore and remove it from the owner's summary
+        await firestore.delete_documents(doc_data.get("user_id"), [document_id])
         logger.info(f"Deleted document {document_id} from Firestore.")
+        if upload_id:
+            discard_spool(upload_id)
 
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -138,29 +204,162 @@ async def delete_document(document_id: str,request: Request, current_user: dict
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete document.",
         )
-@router.get("/documents/sources", response_model=List[str], tags=["Documents"])
-async def get_unique_sources(request: Request,current_user: dict = Depends(get_current_user)):
+@router.post("/documents:batchDelete", response_model=BatchDeleteResponse, tags=["Documents"])
+async def batch_delete_documents(
+    body: BatchDeleteRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+):
     """
-    Fetch a list of unique sources from Firestore documents for the current user.
+    Delete many documents and their associated data.
+
+    Ownership is checked with one batched read, the vectors of all documents go in a
+    single filtered delete, Storage files are deleted concurrently and the Firestore
+    documents are removed in batched transactional writes. Each ID gets its own result.
     """
-    firestore_client = get_firestore_client(request.app)
-    if not firestore_client:
-        logger.error("Firestore client is not initialized.")
+    storage_bucket = get_storage_bucket(request.app)
+    weaviate_client = get_weaviate_client(request.app)
+    firestore = get_firestore(request.app)
+    if not storage_bucket or not weaviate_client:
+        logger.error("One or more services are not initialized.")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error.",
         )
-    
+
+    document_ids = list(dict.fromkeys(body.ids))
+    if len(document_ids) > settings.DOCUMENTS_BATCH_DELETE_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.DOCUMENTS_BATCH_DELETE_MAX} documents can be deleted at once.",
+        )
+    uid = current_user.get("uid")
+    results = {}
+
+    def fail(document_id: str, detail: str):
+        results[document_id] = BatchDeleteItemResult(id=document_id, status="error", detail=detail)
+
     try:
-        # Fetch all documents from Firestore 'documents' collection for the current user
-        docs = await asyncio.to_thread(lambda: firestore_client.collection("documents").where("user_id", "==", current_user.get("uid")).stream())
-        sources = set()
-        for doc in docs:
-            doc_data = doc.to_dict()
-            source = doc_data.get("source")
-            if source:
-                sources.add(source)
-        unique_sources = list(sources)
+        # Ownership check: one batched read for all documents
+        snapshots = await firestore.get_documents(document_ids)
+        owned = {}
+        for snapshot in snapshots:
+            if not snapshot.exists:
+                results[snapshot.id] = BatchDeleteItemResult(id=snapshot.id, status="not_found")
+            elif snapshot.to_dict().get("user_id") != uid:
+                logger.warning(f"User {uid} attempted to delete document {snapshot.id} they do not own.")
+                results[snapshot.id] = BatchDeleteItemResult(id=snapshot.id, status="forbidden")
+            else:
+                owned[snapshot.id] = snapshot.to_dict()
+
+        # Vectors: one combined upload_id filter. Documents stay in place on failure so a retry can finish.
+        upload_ids = [data["upload_id"] for data in owned.values() if data.get("upload_id")]
+        if upload_ids:
+            try:
+                deleted = await asyncio.to_thread(_delete_vectors, weaviate_client, upload_ids)
+                logger.info(f"Deleted {deleted} vectors from Weaviate for {len(upload_ids)} uploads")
+            except Exception as e:
+                logger.error(f"Failed to delete vectors from Weaviate: {e}")
+                for document_id in owned:
+                    fail(document_id, "Failed to delete vectors.")
+                owned = {}
+
+        # Storage: concurrent deletes with bounded parallelism
+        semaphore = asyncio.Semaphore(settings.DOCUMENTS_DELETE_CONCURRENCY)
+
+        async def delete_file(document_id: str, file_url: str):
+            blob_path = _blob_path_from_url(file_url, storage_bucket.name)
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(_delete_blob, storage_bucket, blob_path)
+                except Exception as e:
+                    logger.error(f"Failed to delete file {blob_path} from Firebase Storage: {e}")
+                    fail(document_id, "Failed to delete file.")
+
+        await asyncio.gather(*[
+            delete_file(document_id, data["file_url"]) for document_id, data in owned.items() if data.get("file_url")
+        ])
+
+        # Firestore: batched transactional deletes that also update the summary
+        pending = [document_id for document_id in owned if document_id not in results]
+        for start in range(0, len(pending), FIRESTORE_DELETE_BATCH_SIZE):
+            chunk = pending[start:start + FIRESTORE_DELETE_BATCH_SIZE]
+            try:
+                await firestore.delete_documents(uid, chunk)
+                for document_id in chunk:
+                    results[document_id] = BatchDeleteItemResult(id=document_id, status="deleted")
+                    if owned[document_id].get("upload_id"):
+                        discard_spool(owned[document_id]["upload_id"])
+            except Exception as e:
+                logger.error(f"Failed to delete {len(chunk)} documents from Firestore: {e}")
+                for document_id in chunk:
+                    fail(document_id, "Failed to delete document metadata.")
+
+        deleted_count = sum(result.status == "deleted" for result in results.values())
+        logger.info(f"Batch delete for user UID {uid}: {deleted_count}/{len(document_ids)} documents deleted.")
+        return BatchDeleteResponse(results=[results[document_id] for document_id in document_ids])
+    except Exception as e:
+        logger.exception(f"Failed to batch delete documents: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete documents.",
+        )
+
+@router.post("/documents/{document_id}/ingestion:retry", response_model=DocumentOut, tags=["Documents"])
+async def retry_ingestion(document_id: str, request: Request, admin_user: dict = Depends(get_current_admin)):
+    """
+    Resume the ingestion of a document whose ingestion failed or died with its process.
+
+    Chunks that were already indexed are skipped, and the spooled chunks are reused
+    when this host still has them, so only the remaining work is redone.
+    """
+    storage_bucket = get_storage_bucket(request.app)
+    firestore = get_firestore(request.app)
+    if not storage_bucket:
+        logger.error("One or more services are not initialized.")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error.",
+        )
+
+    doc_data = await firestore.get_document(document_id)
+    if doc_data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found.")
+    if doc_data.get("user_id") != admin_user.get("uid"):
+        logger.warning(f"User {admin_user.get('uid')} attempted to re-ingest a document they do not own.")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to re-ingest this document.")
+    if not doc_data.get("ingestion"):
+        # Uploaded before ingestion was checkpointed, which means it was ingested in full
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Document is already ingested.")
+
+    # The stored signed URL may have expired; only needed when the file has to be extracted again
+    blob = storage_bucket.blob(_blob_path_from_url(doc_data["file_url"], storage_bucket.name))
+    download_url = blob.generate_signed_url(expiration=timedelta(days=1))
+    try:
+        await ingest_and_index(download_url, doc_data["upload_id"], request.app, content_type=doc_data.get("file_type"))
+    except IngestionConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        logger.exception(f"Retried ingestion of document {document_id} failed: {e}")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+
+    doc_data = await firestore.get_document(document_id)
+    logger.info(f"Document {document_id} re-ingested by admin {admin_user.get('uid')}.")
+    return DocumentOut(
+        id=document_id,
+        **{field: doc_data.get(field) for field in DOCUMENT_LIST_FIELDS if field != "ingestion"},
+        ingestion_status=doc_data["ingestion"]["status"],
+    )
+
+@router.get("/documents/sources", response_model=List[str], tags=["Documents"])
+async def get_unique_sources(request: Request,current_user: dict = Depends(get_current_user)):
+    """
+    Fetch the unique sources of the current user's documents from their materialized summary.
+    """
+    firestore = get_firestore(request.app)
+    try:
+        summary = await firestore.get_document_summary(current_user.get("uid"))
+        unique_sources = summary.get("sources", [])
         logger.info(f"Fetched {len(unique_sources)} unique sources for user UID: {current_user.get('uid')}")
         return unique_sources
     except Exception as e:
@@ -168,4 +367,25 @@ async def get_unique_sources(request: Request,current_user: dict = Depends(get_c
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch sources.",
-        )
\ No newline at end of file
+        )
+
+@router.get("/documents/summary", response_model=DocumentSummaryOut, tags=["Documents"])
+async def get_document_summary(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Fetch document count, total size, last upload time and per-source counts for the current user.
+    """
+    firestore = get_firestore(request.app)
+    try:
+        summary = await firestore.get_document_summary(current_user.get("uid"))
+        return DocumentSummaryOut(
+            document_count=summary.get("document_count", 0),
+            total_bytes=summary.get("total_bytes", 0),
+            last_upload_at=summary.get("last_upload_at"),
+            source_counts=summary.get("source_counts", {}),
+        )
+    except Exception as e:
+        logger.exception(f"Failed to fetch document summary: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch document summary.",
+        )
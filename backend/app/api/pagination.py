@@ -0,0 +1,25 @@
+# backend/app/api/pagination.py
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+# Response header carrying the cursor of the next page; list bodies stay plain lists
+NEXT_PAGE_HEADER = "X-Next-Page-Token"
+
+
+def encode_page_token(doc_id: str, value: datetime) -> str:
+    """Opaque cursor after the document `doc_id` whose sort field has `value`."""
+    payload = json.dumps({"id": doc_id, "at": value.isoformat()})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_page_token(page_token: str, field: str) -> dict:
+    """Turns a page token into a `start_after` cursor for queries ordered by `field`, then `__name__`."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(page_token + "=" * (-len(page_token) % 4)))
+        return {field: datetime.fromisoformat(payload["at"]), "__name__": payload["id"]}
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid page token.")
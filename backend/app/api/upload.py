@@ -7,9 +7,12 @@ import logging
 from datetime import timedelta, datetime
 import asyncio
 from app.api.dependencies import get_current_admin  # Assuming only admins can upload
-from app.loader import ingest_and_index
+from app.loader import HEAD_BYTES, ingest_and_index
+from app.loaders import UnsupportedFileType, resolve_loader
 from app.config import settings
-from app.firebase import get_storage_bucket, get_firestore_client
+from app.firebase import get_storage_bucket
+from app.repository import get_firestore
+from app.ingestion import initial_status
 from uuid import uuid4
 from requests import request
 router = APIRouter()
@@ -24,16 +27,20 @@ async def upload_file(
     admin_user: dict = Depends(get_current_admin),  # Only admins can upload
 ):
     logger.debug(f"Received request to upload file: {file.filename}")
-    
+    temp_file_path = None
+
     try:
-        firestore_client = get_firestore_client(request.app)
+        firestore = get_firestore(request.app)
 
         cleaned_filename = file.filename.strip()
-        if not (cleaned_filename.endswith(".pdf") or cleaned_filename.endswith(".docx")):
-            raise HTTPException(
-                status_code=400,
-                detail="Unsupported file type. Only PDF and DOCX are supported.",
-            )
+
+        # The loader registry checks the name, the MIME type and the first bytes
+        first_block = await file.read(settings.UPLOAD_CHUNK_BYTES)
+        try:
+            loader = resolve_loader(cleaned_filename, file.content_type, first_block[:HEAD_BYTES])
+        except UnsupportedFileType as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.debug(f"Resolved loader '{loader.name}' for {cleaned_filename}")
 
         # Log admin user details
         logger.debug(f"Admin user details: {admin_user}")
@@ -48,18 +55,19 @@ async def upload_file(
         upload_id = str(uuid4())
         logger.debug(f"Generated upload_id: {upload_id}")
 
-        # Read file content and calculate size
-        file_content = await file.read()
-        file_size = len(file_content)  # Calculate file size in bytes
-        logger.debug(f"File size: {file_size} bytes")
-
-        # Save to a temporary file for uploading
+        # Stream the upload to a temporary file; it is never held in memory as a whole
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
         temp_file_path = os.path.join(settings.UPLOAD_DIR, f"{upload_id}_{cleaned_filename}")
         logger.debug(f"Saving file locally at: {temp_file_path}")
 
+        file_size = 0
         async with aiofiles.open(temp_file_path, "wb") as out_file:
-            await out_file.write(file_content)
+            block = first_block
+            while block:
+                await out_file.write(block)
+                file_size += len(block)
+                block = await file.read(settings.UPLOAD_CHUNK_BYTES)
+        logger.debug(f"File size: {file_size} bytes")
 
         logger.debug(f"File saved locally. Uploading to Firebase Storage...")
 
@@ -67,26 +75,11 @@ async def upload_file(
         await asyncio.to_thread(blob.upload_from_filename, temp_file_path, content_type=file.content_type)
         logger.debug(f"File uploaded to Firebase Storage successfully.")
 
-        # Remove the temporary file
-        os.remove(temp_file_path)
-        logger.debug(f"Temporary file {temp_file_path} removed.")
-
         # Generate a signed URL
         download_url = blob.generate_signed_url(expiration=timedelta(days=1))
         logger.debug(f"Generated signed URL: {download_url}")
 
-        # Get Firestore client
-        if not firestore_client:
-            logger.error("Firestore client is not initialized.")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Internal server error.",
-            )
-
-        # Create Firestore document
-        firestore_collection = firestore_client.collection("documents")
-        firestore_doc = firestore_collection.document(upload_id)  # Using upload_id as document ID
-
+        # Create Firestore document, using upload_id as document ID
         document_metadata = {
             "description": description,
             "file_name": cleaned_filename,
@@ -96,14 +89,24 @@ async def upload_file(
             "upload_id": upload_id,
             "uploaded_at": datetime.utcnow(),
             "user_id": admin_user.get("uid"),
+            "ingestion": initial_status(),
         }
 
-        await asyncio.to_thread(firestore_doc.set, document_metadata)
+        # The document and its owner's summary are written in one transaction
+        await firestore.create_document(upload_id, document_metadata)
         logger.debug(f"Firestore document {upload_id} created successfully.")
 
-        # Ingest and index the document
+        # Ingest and index the document from the local copy instead of downloading it again
         logger.debug("Starting ingestion and indexing of document...")
-        await ingest_and_index(download_url, upload_id, request.app)
+        try:
+            await ingest_and_index(download_url, upload_id, request.app, local_path=temp_file_path,
+                                   content_type=file.content_type)
+        except Exception as e:
+            # The document is stored and its ingestion checkpointed; it can be resumed
+            raise HTTPException(
+                status_code=500,
+                detail=f"{e}. Retry with POST /api/documents/{upload_id}/ingestion:retry.",
+            )
 
         logger.info(f"File {cleaned_filename} ingested and indexed successfully.")
         return {"message": "Document uploaded and index built successfully.", "download_url": download_url}
@@ -115,4 +118,9 @@ async def upload_file(
         logger.exception(f"Error uploading and building index: {e}")
         raise HTTPException(
             status_code=500, detail=f"An error occurred: {str(e)}"
-        )
\ No newline at end of file
+        )
+    finally:
+        # Remove the temporary file
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+            logger.debug(f"Temporary file {temp_file_path} removed.")
\ No newline at end of file
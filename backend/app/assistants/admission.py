@@ -0,0 +1,184 @@
+# backend/app/assistants/admission.py
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Tuple
+
+from fastapi import FastAPI
+
+from app.config import settings
+from app.metrics import (
+    ADMISSION_ACTIVE_TURNS,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a turn cannot be admitted; carries the HTTP status and Retry-After."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+        super().__init__(detail)
+
+
+class AdmissionController:
+    """
+    Limits concurrent LLM turns.
+
+    At most `max_concurrent` turns run at once and each user may hold at most
+    `max_per_user` turns (running or queued). Turns over the global limit wait in a
+    FIFO queue of `max_queue` entries for up to `queue_timeout` seconds. Requests that
+    cannot be queued fail fast: 429 for the per-user limit, 503 for a full queue or an
+    expired wait, both with Retry-After.
+
+    `drain` stops admitting turns for shutdown: new and queued turns get 503 and the
+    running ones are waited for.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = settings.ADMISSION_MAX_CONCURRENT_TURNS,
+        max_per_user: int = settings.ADMISSION_MAX_TURNS_PER_USER,
+        max_queue: int = settings.ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = settings.ADMISSION_QUEUE_TIMEOUT,
+        retry_after: int = settings.ADMISSION_RETRY_AFTER,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._active = 0
+        self._per_user: Dict[str, int] = defaultdict(int)
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.draining = False
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _reject(self, status_code: int, reason: str, detail: str):
+        ADMISSION_REJECTED.labels(reason).inc()
+        raise AdmissionRejected(status_code, detail, self.retry_after)
+
+    def _update_gauges(self):
+        if self._active:
+            self._idle.clear()
+        else:
+            self._idle.set()
+        ADMISSION_ACTIVE_TURNS.set(self._active)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+
+    def _forget_user(self, user_id: str):
+        self._per_user[user_id] -= 1
+        if self._per_user[user_id] <= 0:
+            del self._per_user[user_id]
+
+    async def acquire(self, user_id: str):
+        """Waits for a turn slot for `user_id` or raises AdmissionRejected."""
+        if self.draining:
+            self._reject(503, "draining", "The server is restarting. Please try again shortly.")
+
+        if self._per_user.get(user_id, 0) >= self.max_per_user:
+            self._reject(429, "user_limit", "Too many concurrent messages. Please wait for the current answer.")
+
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._per_user[user_id] += 1
+            ADMISSION_WAIT_SECONDS.observe(0)
+            self._update_gauges()
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._reject(503, "queue_full", "The assistant is busy. Please try again shortly.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (user_id, waiter)
+        self._waiters.append(entry)
+        self._per_user[user_id] += 1
+        self._update_gauges()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except AdmissionRejected:
+            # Turned away by drain(), which already took the entry off the queue
+            self._forget_user(user_id)
+            self._update_gauges()
+            raise
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # The slot was handed over just as we gave up; pass it on
+                self.release(user_id)
+            else:
+                waiter.cancel()
+                if entry in self._waiters:  # drain() may have taken it off already
+                    self._waiters.remove(entry)
+                self._forget_user(user_id)
+                self._update_gauges()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject(503, "queue_timeout", "The assistant is busy. Please try again shortly.")
+        finally:
+            ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+    def release(self, user_id: str):
+        """Frees the slot held by `user_id` and hands it to the next queued turn."""
+        self._forget_user(user_id)
+        if self._waiters:
+            # The slot moves to the waiter, so the active count stays the same
+            _, waiter = self._waiters.popleft()
+            waiter.set_result(None)
+        else:
+            self._active -= 1
+        self._update_gauges()
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Rejects new and queued turns and waits up to `timeout` seconds for the running
+        ones to finish. Returns whether they all did.
+        """
+        self.draining = True
+        while self._waiters:
+            _, waiter = self._waiters.popleft()
+            ADMISSION_REJECTED.labels("draining").inc()
+            waiter.set_exception(
+                AdmissionRejected(503, "The server is restarting. Please try again shortly.", self.retry_after)
+            )
+        self._update_gauges()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+def initialize_admission_controller(app: FastAPI):
+    """
+    Create the admission controller and store it in the FastAPI application's state.
+    """
+    app.state.admission_controller = AdmissionController()
+    logger.info("Admission controller initialized and stored in app.state.")
+
+
+def get_admission_controller(app: FastAPI) -> AdmissionController:
+    """
+    Retrieve the admission controller from the FastAPI application's state.
+    """
+    controller = getattr(app.state, "admission_controller", None)
+    if controller is None:
+        logger.error("Admission controller is not initialized.")
+        raise RuntimeError("Admission controller is not initialized.")
+    return controller
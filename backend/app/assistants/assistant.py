@@ -3,14 +3,31 @@ import asyncio
 import logging
 from operator import itemgetter
 from langchain.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from app.config import settings
 from app.utils.sse_stream import SSEStream
 from app.db import get_weaviate_client
-import firebase_admin.firestore as admin_firestore
+from app.clients import get_client_pool
 from datetime import datetime, timezone
 from langchain_weaviate.vectorstores import WeaviateVectorStore
 from langchain.schema import StrOutputParser
+from app.assistants.context import ContextPacker, format_context
+from app.assistants.memory import ConversationMemory, wait_for_summaries
+from app.assistants.pipeline import Stage, run_pipeline
+from app.assistants.prompts import SMALLTALK_CONTEXT
+from app.assistants.registry import get_assistant_registry
+from app.assistants.routing import RouteDecision, build_query_router
+from app.assistants.turns import TurnWriter, get_turn_journal
+from app.metrics import (
+    ACTIVE_STREAMS,
+    LLM_TIME_TO_FIRST_TOKEN,
+    LLM_TOKENS_PER_SECOND,
+    ROUTE_TIME_TO_FIRST_TOKEN,
+    ROUTE_TURN_LATENCY,
+    STAGE_LATENCY,
+    TURN_LATENCY,
+    TURNS_CANCELLED,
+)
+import time
 from langfuse.callback import CallbackHandler
 import os
 from fastapi import FastAPI, Request, Depends
@@ -22,24 +39,31 @@ from fastapi import FastAPI, Request, Depends
 
 # Initialize logging
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
+# Langfuse flushes of finished turns, held until they complete so shutdown can wait for them
+_tracing_flushes = set()
 
-def build_chain(app: FastAPI,history_size: int):
-    """Builds the LangChain pipeline-style LLMChain integrated with vector retrieval."""
+
+def build_context_packer(app: FastAPI) -> ContextPacker:
+    """Builds the retrieval stage: vector search plus dedup/MMR/token-budget packing."""
+    embeddings = get_client_pool(app).embeddings()
+    client = get_weaviate_client(app)
+    vectorstore = WeaviateVectorStore(
+        client=client,
+        index_name="ChatDocument",
+        text_key="content",
+        embedding=embeddings,
+    )
+    return ContextPacker(vectorstore=vectorstore, embeddings=embeddings)
+
+
+def build_chain(app: FastAPI, history_size: int, model_name: str = settings.MODEL):
+    """
+    Builds the LangChain pipeline-style prompt | model chain. Retrieval runs as a separate
+    pipeline stage, so the chain expects the packed `context` as an input. `model_name`
+    is chosen per turn by the query router.
+    """
     try:
-        # Initialize embeddings
-        embeddings = OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY)
-        
-        client = get_weaviate_client(app)
-        vectorstore = WeaviateVectorStore(
-            client=client,
-            index_name="ChatDocument",
-            text_key="content",
-            embedding=embeddings,
-        )
-        retriever = vectorstore.as_retriever(search_kwargs={"k": settings.VECTOR_SEARCH_TOP_K})
-        
         # Define the prompt template
         if history_size == 0:
             template = """
@@ -65,18 +89,13 @@ def build_chain(app: FastAPI,history_size: int):
             """
         prompt = ChatPromptTemplate.from_template(template)
         
-        # Initialize the ChatOpenAI model
-        model = ChatOpenAI(
-            model_name=settings.MODEL,
-            temperature=0.2,
-            openai_api_key=settings.OPENAI_API_KEY,
-            streaming=True
-        )
+        # Shared ChatOpenAI model backed by the pooled HTTP client
+        model = get_client_pool(app).chat_model(model_name, temperature=0.2)
         
         # Build the pipeline-style chain
         chain = (
             {
-                "context": itemgetter("question") | retriever,
+                "context": itemgetter("context"),
                 "question": itemgetter("question"),
                 "name": itemgetter("username"),
                 "history": itemgetter("history")
@@ -86,166 +105,226 @@ def build_chain(app: FastAPI,history_size: int):
             | StrOutputParser()
         )
         
-        logger.info("Pipeline-style chain successfully built.")
+        logger.info(f"Pipeline-style chain successfully built for model {model_name}.")
         return chain
     except Exception as e:
         logger.error(f"Failed to build chain: {e}")
         raise e
 
 class RAGAssistant():
-    assistants = {}  # Class-level dictionary to store assistant instances
-
-    @classmethod
-    def get_assistant(cls, chat_id):
-        return cls.assistants.get(chat_id)
-    def __init__(self, chat_id: str, firestore_client, user_id: str, user_name: str, history_size: int = 4,app: FastAPI = None):
+    def __init__(self, chat_id: str, firestore, user_id: str, user_name: str, history_size: int = 4,app: FastAPI = None):
         self.app = app
         self.chat_id = chat_id
-        self.firestore = firestore_client
+        self.firestore = firestore
         self.user_id = user_id
         self.history_size = history_size
         self.user_name = user_name
-        # Build pipeline-style chain with integrated retriever
-        self.chain = build_chain(self.app,self.history_size)
+        # Chains are built per routed model; retrieval and routing run as pipeline stages
+        self._chains = {}
+        self.context_packer = build_context_packer(self.app)
+        self.router = build_query_router(self.app)
+        self.route = None
+        self._turn_started = None
+        self._tracing_handler = None
+        self._answer = []  # Tokens streamed so far; stored as a truncated answer on cancellation
+        self._cancel_reason = None
 
         self.sse_stream = SSEStream()
-        self.chat_ref = self.firestore.collection('chats').document(chat_id)
-        
-        self.initialize_chat()
-        RAGAssistant.assistants[chat_id] = self  # Store instance in class-level dict
-    def initialize_chat(self):
+        self.memory = ConversationMemory(
+            chat_id=chat_id,
+            firestore=self.firestore,
+            summary_model=get_client_pool(self.app).chat_model(
+                settings.SUMMARY_MODEL or settings.MODEL,
+                temperature=0,
+                streaming=False,
+                max_tokens=settings.HISTORY_SUMMARY_TOKEN_BUDGET,
+            ),
+        )
+
+    async def _handle_conversation_task(self, message: str, chat_data: dict):
+        started = self._turn_started = time.perf_counter()
+        outcome = "error"
+        # Both messages and the chat metadata are written in one batch at the end of the turn
+        writer = TurnWriter(self.firestore, get_turn_journal(self.app), self.chat_id)
         try:
-            chat_data = self.chat_ref.get().to_dict()
-            if not chat_data:
-                asyncio.create_task(self._async_firestore_set({
-                    'user_id': self.user_id,
-                    'created_at': datetime.now(timezone.utc),
-                    'messages': []
-                }))
-                logger.info(f"Initialized new chat with chat_id: {self.chat_id}")
-            else:
-                logger.info(f"Chat {self.chat_id} already exists.")
+            user_message = self._new_message('user', message)
+            # Cheap rule-based routing decides up front whether retrieval is needed
+            decision = self.router.route(message)
+            # The chat was read once, for the ownership check; its history comes from that read
+            history = self.memory.render(chat_data)
+
+            # Journaling the user message, retrieval and the optional classifier are
+            # independent and run concurrently; generation starts once they are ready.
+            stages = [
+                Stage("journal_user", lambda: writer.add(user_message)),
+                Stage("context", lambda: self._retrieve(message, decision),
+                      timeout=settings.STAGE_TIMEOUT_RETRIEVAL),
+                Stage("route", lambda: self.router.aclassify(message, decision),
+                      timeout=settings.ROUTING_CLASSIFIER_TIMEOUT, required=False, default=decision),
+                Stage("generate", lambda context, route: self._generate(message, history, context, route),
+                      deps=("context", "route"), timeout=settings.STAGE_TIMEOUT_GENERATION),
+                Stage("persist", lambda generate, journal_user: self._persist_turn(writer, generate),
+                      deps=("generate", "journal_user"), timeout=settings.STAGE_TIMEOUT_FIRESTORE),
+            ]
+            await run_pipeline(
+                stages,
+                label=f"chat {self.chat_id}",
+                on_stage_done=lambda stage, seconds: STAGE_LATENCY.labels(stage).observe(seconds),
+            )
+            outcome = "ok"
+            logger.info(f"Appended user message and assistant response to chat {self.chat_id}")
+
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            reason = self._cancel_reason or "cancelled"
+            TURNS_CANCELLED.labels(reason).inc()
+            logger.info(f"Turn of chat {self.chat_id} cancelled ({reason}) after {len(self._answer)} tokens.")
+            if self._answer and not writer.commit_attempted:
+                try:
+                    await self._persist_turn(writer, "".join(self._answer), truncated=True)
+                except Exception as e:
+                    logger.error(f"Failed to store the truncated answer of chat {self.chat_id}: {e}")
+            raise
         except Exception as e:
-            logger.error(f"Failed to initialize chat {self.chat_id}: {e}")
+            logger.exception(f'Error in conversation task for chat_id {self.chat_id}')
+            await self.sse_stream.send(f"Error: {str(e)}")
+        finally:
+            if not writer.commit_attempted:
+                # The turn failed before the write; the user message is still stored
+                try:
+                    await writer.commit()
+                except Exception as e:
+                    logger.error(f"Failed to store the user message of chat {self.chat_id}: {e}")
+            TURN_LATENCY.labels(outcome).observe(time.perf_counter() - started)
+            if self.route is not None:
+                ROUTE_TURN_LATENCY.labels(self.route.route).observe(time.perf_counter() - started)
+            await self.sse_stream.close()
+            # Kept until the stream has been read, unless the client is gone
+            get_assistant_registry(self.app).finished(
+                self.chat_id, self, abandoned=self._cancel_reason == "client_disconnected",
+            )
+            logger.info(f"Closed SSE stream for chat_id {self.chat_id}")
+            if self._tracing_handler is not None:
+                flush = asyncio.create_task(asyncio.to_thread(self._tracing_handler.flush))
+                _tracing_flushes.add(flush)
+                flush.add_done_callback(_tracing_flushes.discard)
 
+    @staticmethod
+    def _new_message(role: str, content: str) -> dict:
+        return {
+            'role': role,
+            'content': content,
+            'created_at': datetime.now(timezone.utc)
+        }
 
-    async def _handle_conversation_task(self, message: str):
-        try:
-            # Append user message to Firestore asynchronously
-            user_message = {
-                'role': 'user',
-                'content': message,
-                'created_at': datetime.now(timezone.utc)
-            }
-            await self._async_firestore_update({
-                'messages': admin_firestore.ArrayUnion([user_message])
-            })
-            logger.info(f"User message appended to chat {self.chat_id}: {message}")
-
-            history = await self._fetch_and_format_history()
-
-            # Prepare the query with question (context retrieval is handled by the chain's retriever)
-            query = {
-                "question": message,
-                "username": self.user_name,
-                "history": history
-            }
+    async def _persist_turn(self, writer: TurnWriter, answer: str, truncated: bool = False):
+        message = self._new_message('assistant', answer)
+        if truncated:
+            message['truncated'] = True
+        await writer.add(message)
+        await writer.commit()
+
+    async def _retrieve(self, message: str, decision: RouteDecision) -> list:
+        if decision.skip_retrieval:
+            return []
+        return await self.context_packer.aretrieve(message)
+
+    def _chain_for(self, model_name: str):
+        chain = self._chains.get(model_name)
+        if chain is None:
+            chain = self._chains[model_name] = build_chain(self.app, self.history_size, model_name)
+        return chain
 
-            # Initialize LangFuse CallbackHandler
+    async def _generate(self, message: str, history: str, documents: list, route: RouteDecision) -> str:
+        """Streams the answer of the routed model to the SSE stream and returns the full response."""
+        self.route = self.router.refine(route, documents)
+        self.router.record(self.route, label=f"[chat {self.chat_id}] ")
+        query = {
+            "question": message,
+            "username": self.user_name,
+            "history": history,
+            "context": SMALLTALK_CONTEXT if self.route.skip_retrieval else format_context(documents)
+        }
+
+        # Initialize LangFuse CallbackHandler
+        callbacks = []
+        if settings.LANGFUSE_ENABLED:
             langfuse_handler = CallbackHandler(public_key=settings.LANGFUSE_PUBLIC_KEY,secret_key=settings.LANGFUSE_SECRET_KEY,host="https://cloud.langfuse.com",session_id=self.chat_id,user_id=self.user_id)
             langfuse_handler.auth_check()
-            # Initialize an empty string to collect the assistant's response
-            assistant_response = ""
+            callbacks.append(langfuse_handler)
+            self._tracing_handler = langfuse_handler
+        # Collect the assistant's response
+        assistant_response = self._answer = []
+        started = time.perf_counter()
+        first_token_at = None
 
-            # Execute the chain with the langfuse_handler
-            async for chunk in self.chain.astream(
+        # Execute the chain with the tracing callbacks
+        with ACTIVE_STREAMS.track_inprogress():
+            async for chunk in self._chain_for(self.route.model).astream(
                 query,
-                config={"callbacks": [langfuse_handler]}
+                config={"callbacks": callbacks}
             ):
-                logger.info(repr(chunk))
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    LLM_TIME_TO_FIRST_TOKEN.observe(first_token_at - started)
+                    ROUTE_TIME_TO_FIRST_TOKEN.labels(self.route.route).observe(first_token_at - self._turn_started)
+                if settings.LOG_TOKENS:
+                    logger.debug(repr(chunk))
                 # Each chunk is an AIMessageChunk or similar object
                 # Extract the content and send it via SSE
-                if hasattr(chunk, 'content'):
-                    token = chunk.content
-                    assistant_response += token
-                    await self.sse_stream.send(token)
-                else:
-                    token = str(chunk)
-                    assistant_response += token
-                    await self.sse_stream.send(token)
-
-            # After chain execution, store the full assistant response
-            assistant_message = {
-                'role': 'assistant',
-                'content': assistant_response,
-                'created_at': datetime.now(timezone.utc)
-            }
-            await self._async_firestore_update({
-                'messages': admin_firestore.ArrayUnion([assistant_message])
-            })
-            logger.info(f"Appended assistant response to chat {self.chat_id}")
-
-        except Exception as e:
-            logger.exception(f'Error in conversation task for chat_id {self.chat_id}')
-            await self.sse_stream.send(f"Error: {str(e)}")
-        finally:
-            await self.sse_stream.close()
-            RAGAssistant.assistants.pop(self.chat_id, None)
-            logger.info(f"Closed SSE stream for chat_id {self.chat_id}")
+                token = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                assistant_response.append(token)
+                await self.sse_stream.send(token)
 
+        if first_token_at is not None and len(assistant_response) > 1:
+            streaming_time = time.perf_counter() - first_token_at
+            if streaming_time > 0:
+                LLM_TOKENS_PER_SECOND.observe((len(assistant_response) - 1) / streaming_time)
+        return "".join(assistant_response)
 
-    async def _fetch_and_format_history(self) -> str:
-        """
-        Fetches the last `history_size` messages from Firestore and formats them into a string.
-        """
-        try:
-            chat_snapshot = await self._async_firestore_get()
-            messages = chat_snapshot.to_dict().get('messages', [])
-            # Ensure messages are sorted by 'created_at'
-            messages_sorted = sorted(messages, key=lambda x: x['created_at'])
-            # Get the last `history_size` messages
-            last_messages = messages_sorted[-self.history_size:]
-            # Format messages into a string
-            history_str = ""
-            for msg in last_messages:
-                role = msg.get('role', 'unknown').capitalize()
-                content = msg.get('content', '')
-                history_str += f"{role}: {content}\n"
-            return history_str.strip()
-        except Exception as e:
-            logger.error(f"Failed to fetch and format history for chat {self.chat_id}: {e}")
-            return ""    
-        
-    async def handle_message(self, message: str):
+    async def handle_message(self, message: str, chat_data: dict):
+        """Starts the turn; `chat_data` is the chat document as read by the caller."""
         self.message = message
-        self.process_task = asyncio.create_task(self._handle_conversation_task(message))
+        self.process_task = asyncio.create_task(self._handle_conversation_task(message, chat_data))
 
     async def get_stream(self):
         return self.sse_stream
 
-    async def _async_firestore_set(self, data: dict):
-        loop = asyncio.get_event_loop()
-        try:
-            await loop.run_in_executor(None, self.chat_ref.set, data)
-            logger.debug(f"Set data for chat_id {self.chat_id}: {data}")
-        except Exception as e:
-            logger.error(f"Failed to set data for chat_id {self.chat_id}: {e}")
+    def cancel(self, reason: str):
+        """
+        Stops the running turn, including the LLM request. The answer streamed so far
+        is stored with `truncated` set.
+        """
+        task = getattr(self, "process_task", None)
+        if task is not None and not task.done():
+            self._cancel_reason = reason
+            task.cancel()
 
-    async def _async_firestore_update(self, data: dict):
-        loop = asyncio.get_event_loop()
-        try:
-            await loop.run_in_executor(None, self.chat_ref.update, data)
-            logger.debug(f"Updated data for chat_id {self.chat_id}: {data}")
-        except Exception as e:
-            logger.error(f"Failed to update data for chat_id {self.chat_id}: {e}")
-            raise e
 
-    async def _async_firestore_get(self):
-        loop = asyncio.get_event_loop()
-        try:
-            chat_snapshot = await loop.run_in_executor(None, self.chat_ref.get)
-            logger.debug(f"Fetched data for chat_id {self.chat_id}")
-            return chat_snapshot
-        except Exception as e:
-            logger.error(f"Failed to fetch data for chat_id {self.chat_id}: {e}")
-            raise e
\ No newline at end of file
+async def drain_turns(app: FastAPI, timeout: float):
+    """
+    Shutdown drain. Stops admitting chat turns and lets the running ones finish for up
+    to `timeout` seconds; the summary refreshes and Langfuse flushes they started get
+    the time that is left. Turns still running at the deadline are cancelled and store
+    what they have generated as a truncated answer.
+    """
+    deadline = time.monotonic() + timeout
+    controller = getattr(app.state, "admission_controller", None)
+    if controller is not None and controller.active:
+        logger.info(f"Draining {controller.active} chat turns (up to {timeout}s).")
+    if controller is not None and not await controller.drain(timeout):
+        registry = getattr(app.state, "assistant_registry", None)
+        assistants = [assistant for assistant in (registry.running() if registry is not None else [])
+                      if getattr(assistant, "process_task", None) is not None]
+        tasks = [assistant.process_task for assistant in assistants]
+        logger.warning(f"{len(tasks)} chat turns still running after {timeout}s are cancelled.")
+        for assistant in assistants:
+            assistant.cancel("shutdown")
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    left = await wait_for_summaries(deadline - time.monotonic())
+    if left:
+        logger.warning(f"{left} conversation summary refreshes did not finish before shutdown.")
+    flushes = list(_tracing_flushes)
+    if flushes and deadline > time.monotonic():
+        await asyncio.wait(flushes, timeout=deadline - time.monotonic())
@@ -0,0 +1,155 @@
+# backend/app/assistants/context.py
+import logging
+import re
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from app.config import settings
+from app.metrics import EMBEDDING_LATENCY, VECTOR_SEARCH_LATENCY
+from app.openai import token_size
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+_whitespace = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _whitespace.sub(" ", text).strip().lower()
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def drop_near_duplicates(texts: List[str], vectors: np.ndarray, threshold: float) -> List[int]:
+    """
+    Returns the indices of `texts` to keep, in their original (relevance) order.
+    A candidate is dropped if its normalized text was already seen or if its cosine
+    similarity to an already kept candidate is at least `threshold`.
+    """
+    unit = _unit_rows(vectors)
+    similarity = unit @ unit.T
+    kept: List[int] = []
+    seen_texts = set()
+    for i, text in enumerate(texts):
+        key = _normalize(text)
+        if key in seen_texts:
+            continue
+        if kept and similarity[i, kept].max() >= threshold:
+            continue
+        seen_texts.add(key)
+        kept.append(i)
+    return kept
+
+
+def mmr_order(query_vector: np.ndarray, vectors: np.ndarray, lambda_mult: float, k: int) -> List[int]:
+    """
+    Vectorized maximal marginal relevance. Returns up to `k` row indices of `vectors`,
+    ordered by selection.
+    """
+    if len(vectors) == 0 or k <= 0:
+        return []
+    unit = _unit_rows(vectors)
+    relevance = unit @ _unit_rows(query_vector.reshape(1, -1))[0]
+    pairwise = unit @ unit.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything already selected
+    redundancy = pairwise[selected[0]].copy()
+    available = np.ones(len(vectors), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, len(vectors)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+    return selected
+
+
+class ContextPacker:
+    """
+    Context-assembly stage between the vector store and the prompt.
+
+    Over-fetches `fetch_k` candidates, drops near-duplicates (the splitter produces
+    overlapping chunks), orders the rest with maximal marginal relevance and packs
+    them into `token_budget` tokens as measured by `token_size`.
+    """
+
+    def __init__(
+        self,
+        vectorstore: VectorStore,
+        embeddings: Embeddings,
+        token_budget: int = settings.CONTEXT_TOKEN_BUDGET,
+        fetch_k: int = settings.CONTEXT_FETCH_K,
+        max_chunks: int = settings.VECTOR_SEARCH_TOP_K,
+        lambda_mult: float = settings.CONTEXT_MMR_LAMBDA,
+        duplicate_threshold: float = settings.CONTEXT_DUPLICATE_THRESHOLD,
+    ):
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.token_budget = token_budget
+        self.fetch_k = max(fetch_k, max_chunks)
+        self.max_chunks = max_chunks
+        self.lambda_mult = lambda_mult
+        self.duplicate_threshold = duplicate_threshold
+
+    async def aretrieve(self, question: str) -> List[Document]:
+        """Embeds the question, over-fetches candidates and returns the packed documents."""
+        with EMBEDDING_LATENCY.time():
+            query_vector = await self.embeddings.aembed_query(question)
+        with VECTOR_SEARCH_LATENCY.time():
+            candidates = await self.vectorstore.asimilarity_search_by_vector(
+                query_vector, k=self.fetch_k, include_vector=True
+            )
+        if not candidates:
+            return []
+
+        vectors = [doc.metadata.pop("vector", None) for doc in candidates]
+        if any(v is None for v in vectors):
+            # Vector store did not return stored vectors; embed the candidates instead
+            vectors = await self.embeddings.aembed_documents([doc.page_content for doc in candidates])
+
+        return self.pack(np.asarray(query_vector, dtype=np.float32), candidates, np.asarray(vectors, dtype=np.float32))
+
+    def pack(self, query_vector: np.ndarray, candidates: List[Document], vectors: np.ndarray) -> List[Document]:
+        """Deduplicates, MMR-orders and budget-packs `candidates` (relevance ordered)."""
+        kept = drop_near_duplicates([doc.page_content for doc in candidates], vectors, self.duplicate_threshold)
+        order = mmr_order(query_vector, vectors[kept], self.lambda_mult, len(kept))
+        # Cosine similarity to the query, kept on the document for routing decisions
+        relevance = _unit_rows(vectors[kept]) @ _unit_rows(query_vector.reshape(1, -1))[0]
+
+        separator_tokens = token_size(CONTEXT_SEPARATOR)
+        packed: List[Document] = []
+        used = 0
+        for position in order:
+            doc = candidates[kept[position]]
+            cost = token_size(doc.page_content) + (separator_tokens if packed else 0)
+            if used + cost > self.token_budget:
+                # Smaller chunks further down the MMR order may still fit
+                continue
+            doc.metadata["relevance"] = float(relevance[position])
+            packed.append(doc)
+            used += cost
+            if len(packed) >= self.max_chunks:
+                break
+
+        logger.debug(
+            f"Packed {len(packed)}/{len(candidates)} retrieved chunks "
+            f"({len(candidates) - len(kept)} duplicates, {used}/{self.token_budget} tokens)"
+        )
+        return packed
+
+
+def format_context(documents: Optional[List[Document]]) -> str:
+    return CONTEXT_SEPARATOR.join(doc.page_content for doc in documents or [])
@@ -0,0 +1,140 @@
+# backend/app/assistants/memory.py
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+
+from app.assistants.prompts import HISTORY_SUMMARY_PROMPT
+from app.config import settings
+from app.openai import token_size
+
+logger = logging.getLogger(__name__)
+
+# Summary refreshes currently running, keyed by chat_id. Holding the task here keeps
+# it referenced until it finishes and prevents two refreshes of the same chat.
+_summary_tasks: Dict[str, asyncio.Task] = {}
+
+
+async def wait_for_summaries(timeout: float) -> int:
+    """Waits up to `timeout` seconds for running summary refreshes; returns how many are left."""
+    tasks = [task for task in _summary_tasks.values() if not task.done()]
+    if not tasks or timeout <= 0:
+        return len(tasks)
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    return len(pending)
+
+
+def format_message(message: dict) -> str:
+    role = message.get('role', 'unknown').capitalize()
+    return f"{role}: {message.get('content', '')}"
+
+
+class ConversationMemory:
+    """
+    Token-aware conversation history.
+
+    The most recent messages are kept verbatim as long as they fit into `token_budget`.
+    Older messages are folded into a rolling summary stored on the chat document
+    (`summary`, `summary_message_count`). The summary is regenerated in the background
+    whenever messages fall out of the verbatim window, never on the request path.
+    """
+
+    def __init__(
+        self,
+        chat_id: str,
+        firestore,
+        summary_model: BaseChatModel,
+        token_budget: int = settings.HISTORY_TOKEN_BUDGET,
+        summary_token_budget: int = settings.HISTORY_SUMMARY_TOKEN_BUDGET,
+    ):
+        self.chat_id = chat_id
+        self.firestore = firestore
+        self.summary_model = summary_model
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+
+    def _window(self, messages: List[dict], budget: int) -> Tuple[int, List[str]]:
+        """Returns the index of the first verbatim message and the formatted lines."""
+        lines: List[str] = []
+        used = 0
+        start = len(messages)
+        for message in reversed(messages):
+            line = format_message(message)
+            cost = token_size(line) + 1  # newline
+            if used + cost > budget:
+                break
+            lines.append(line)
+            used += cost
+            start -= 1
+        lines.reverse()
+        return start, lines
+
+    def _take_within(self, messages: List[dict], budget: int) -> List[dict]:
+        """Returns the oldest messages that fit into `budget` tokens (at least one)."""
+        used = 0
+        for i, message in enumerate(messages):
+            used += token_size(format_message(message)) + 1
+            if used > budget and i > 0:
+                return messages[:i]
+        return messages
+
+    def render(self, chat_data: Optional[dict], before: Optional[datetime] = None) -> str:
+        """
+        Formats the history of `chat_data` for the prompt's `{history}` slot, optionally
+        limited to messages created before `before`.
+        """
+        chat_data = chat_data or {}
+        messages = sorted(chat_data.get('messages', []), key=lambda m: m['created_at'])
+        if before is not None:
+            messages = [m for m in messages if m['created_at'] < before]
+        summary = chat_data.get('summary') or ""
+        summarized = chat_data.get('summary_message_count', 0)
+
+        budget = self.token_budget
+        if summary:
+            summary = f"Zusammenfassung des bisherigen Gesprächs: {summary}"
+            budget -= token_size(summary) + 1
+        start, lines = self._window(messages, max(budget, 0))
+
+        if start > summarized:
+            # Messages [summarized, start) are neither verbatim nor summarized yet. Fold
+            # them in bounded steps so the summarizer's own prompt stays bounded too.
+            pending = self._take_within(messages[summarized:start], 4 * self.token_budget)
+            self.schedule_summary(chat_data.get('summary') or "", pending, summarized + len(pending))
+
+        if summary:
+            lines.insert(0, summary)
+        return "\n".join(lines)
+
+    def schedule_summary(self, summary: str, messages: List[dict], message_count: int):
+        """Starts a background summary refresh unless one is already running for this chat."""
+        task = _summary_tasks.get(self.chat_id)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._refresh_summary(summary, messages, message_count))
+        _summary_tasks[self.chat_id] = task
+
+        def _forget(finished: asyncio.Task, chat_id: str = self.chat_id):
+            if _summary_tasks.get(chat_id) is finished:
+                del _summary_tasks[chat_id]
+
+        task.add_done_callback(_forget)
+
+    async def _refresh_summary(self, summary: str, messages: List[dict], message_count: int):
+        try:
+            prompt = HISTORY_SUMMARY_PROMPT.format(
+                max_words=int(self.summary_token_budget * 0.6),
+                summary=summary or "(noch keine)",
+                messages="\n".join(format_message(m) for m in messages),
+            )
+            result = await self.summary_model.ainvoke(prompt)
+            await self.firestore.update_chat(self.chat_id, {
+                'summary': result.content.strip(),
+                'summary_message_count': message_count,
+                'summary_updated_at': datetime.now(timezone.utc),
+            })
+            logger.info(f"Updated history summary for chat {self.chat_id} ({message_count} messages)")
+        except Exception as e:
+            logger.error(f"Failed to update history summary for chat {self.chat_id}: {e}")
@@ -0,0 +1,114 @@
+# backend/app/assistants/pipeline.py
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class StageError(Exception):
+    """Raised when a required pipeline stage fails or times out."""
+
+    def __init__(self, stage: str, cause: BaseException):
+        self.stage = stage
+        self.cause = cause
+        super().__init__(f"Stage '{stage}' failed: {cause!r}")
+
+
+@dataclass
+class Stage:
+    """
+    One node of a pipeline DAG.
+
+    `func` is called with the results of the stages named in `deps` as keyword
+    arguments. A stage that is not `required` falls back to `default` when it fails
+    or exceeds its `timeout` (seconds); a required stage aborts the whole run.
+    """
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    deps: Sequence[str] = field(default_factory=tuple)
+    timeout: Optional[float] = None
+    required: bool = True
+    default: Any = None
+
+
+def _check_graph(stages: List[Stage]):
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate stage names in pipeline: {names}")
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    visiting, done = set(), set()
+
+    def visit(name: str):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Pipeline has a dependency cycle through '{name}'")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in names:
+        visit(name)
+
+
+async def run_pipeline(
+    stages: List[Stage],
+    label: str = "pipeline",
+    on_stage_done: Optional[Callable[[str, float], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Runs `stages` as an async DAG: every stage starts as soon as its dependencies have
+    finished, so independent stages overlap. Returns the results keyed by stage name.
+    `on_stage_done(name, seconds)` is called with each stage's own run time.
+    """
+    _check_graph(stages)
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(stage: Stage):
+        kwargs = {dep: await tasks[dep] for dep in stage.deps}
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            result = await asyncio.wait_for(stage.func(**kwargs), timeout=stage.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if on_stage_done is not None:
+                on_stage_done(stage.name, loop.time() - started)
+            if isinstance(e, asyncio.TimeoutError):
+                e = TimeoutError(f"timed out after {stage.timeout}s")
+            if stage.required:
+                raise StageError(stage.name, e) from e
+            logger.warning(f"[{label}] Optional stage '{stage.name}' failed, using default: {e!r}")
+            return stage.default
+        elapsed = loop.time() - started
+        if on_stage_done is not None:
+            on_stage_done(stage.name, elapsed)
+        logger.debug(f"[{label}] Stage '{stage.name}' finished in {elapsed:.3f}s")
+        return result
+
+    # Tasks are created in dependency order so every stage can await its deps' tasks
+    remaining = list(stages)
+    while remaining:
+        for stage in list(remaining):
+            if all(dep in tasks for dep in stage.deps):
+                tasks[stage.name] = asyncio.create_task(run(stage), name=f"{label}:{stage.name}")
+                remaining.remove(stage)
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return {name: task.result() for name, task in tasks.items()}
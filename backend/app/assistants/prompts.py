@@ -16,4 +16,32 @@ You are a knowledgeable assistant specialized in answering questions about new t
 Make sure to reference and include relevant excerpts from the sources to support your answers. When providing an answer, mention the specific report from which the information was retrieved (e.g., "According to the [Report Name], ..."). Your answers must be accurate and grounded on truth.
 
 If the information needed to answer a question is not available in the sources, say that you don't have enough information and share any relevant facts you find.
-"""
\ No newline at end of file
+"""
+
+HISTORY_SUMMARY_PROMPT = """
+Du fasst einen Gesprächsverlauf zwischen einem Nutzer und einem Gesundheitsberater zusammen.
+Aktualisiere die bisherige Zusammenfassung mit den neuen Nachrichten. Behalte Namen, Beschwerden, bereits gegebene Empfehlungen und offene Fragen bei. Antworte nur mit der neuen Zusammenfassung, in höchstens {max_words} Wörtern.
+
+Bisherige Zusammenfassung:
+{summary}
+
+Neue Nachrichten:
+{messages}
+
+Neue Zusammenfassung:
+"""
+
+ROUTING_CLASSIFIER_PROMPT = """
+Du entscheidest, wie aufwendig die Antwort auf eine Nutzernachricht an einen Gesundheitsberater ist.
+Antworte mit EINFACH, wenn es eine kurze Sachfrage mit einer direkten Antwort ist.
+Antworte mit KOMPLEX, wenn die Frage mehrere Teile hat, abgewogen werden muss, Medikamente, Schwangerschaft, Kinder oder ernste Beschwerden betrifft oder du unsicher bist.
+Antworte nur mit EINFACH oder KOMPLEX.
+
+Nachricht: {question}
+Einstufung:
+"""
+
+SMALLTALK_CONTEXT = (
+    "Kein Kontext nötig: Die Nachricht ist eine Begrüßung, ein Dank oder Smalltalk. "
+    "Antworte kurz und freundlich und biete deine Hilfe bei Gesundheitsfragen an."
+)
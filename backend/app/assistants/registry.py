@@ -0,0 +1,157 @@
+# backend/app/assistants/registry.py
+"""
+The assistants of running and recently finished chat turns, by chat ID.
+
+A chat has at most one running turn; `register` raises ChatBusy for a second one. A
+finished turn stays registered until its stream has been read to the end, so a client
+that connects to the stream after the answer is complete still gets it. Finished
+turns whose stream nobody reads are dropped by a reaper after ASSISTANT_STREAM_TTL
+seconds, and when the registry holds ASSISTANT_REGISTRY_MAX_SIZE entries the oldest
+finished ones make room; a registry full of running turns rejects new ones.
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI
+
+from app.config import settings
+from app.metrics import (
+    ASSISTANT_BUFFERED_BYTES,
+    ASSISTANT_REGISTRY_EVICTED,
+    ASSISTANT_REGISTRY_RUNNING,
+    ASSISTANT_REGISTRY_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ChatBusy(Exception):
+    """The chat already has a running turn."""
+
+
+class RegistryFull(Exception):
+    """Every registry entry belongs to a running turn."""
+
+
+@dataclass
+class _Entry:
+    assistant: object
+    finished_at: Optional[float] = None
+
+
+class AssistantRegistry:
+    def __init__(self, max_size: int = settings.ASSISTANT_REGISTRY_MAX_SIZE,
+                 ttl: float = settings.ASSISTANT_STREAM_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: Dict[str, _Entry] = {}  # In registration order
+        self._reaper: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, chat_id: str):
+        entry = self._entries.get(chat_id)
+        return entry.assistant if entry is not None else None
+
+    def is_busy(self, chat_id: str) -> bool:
+        entry = self._entries.get(chat_id)
+        return entry is not None and entry.finished_at is None
+
+    def running(self) -> List[object]:
+        return [entry.assistant for entry in self._entries.values() if entry.finished_at is None]
+
+    def buffered_bytes(self) -> int:
+        """Size of the answers held in SSE queues that no client has read yet."""
+        return sum(entry.assistant.sse_stream.buffered_bytes for entry in self._entries.values())
+
+    def register(self, chat_id: str, assistant):
+        if self.is_busy(chat_id):
+            raise ChatBusy(f"Chat {chat_id} already has a running turn.")
+        # A finished turn of this chat whose stream was never read is replaced
+        self._entries.pop(chat_id, None)
+        if len(self._entries) >= self.max_size:
+            finished = [chat for chat, entry in self._entries.items() if entry.finished_at is not None]
+            for chat in finished[:len(self._entries) - self.max_size + 1]:
+                del self._entries[chat]
+                ASSISTANT_REGISTRY_EVICTED.labels("capacity").inc()
+            if len(self._entries) >= self.max_size:
+                raise RegistryFull(f"{len(self._entries)} chat turns are running.")
+        self._entries[chat_id] = _Entry(assistant)
+
+    def finished(self, chat_id: str, assistant, abandoned: bool = False):
+        """Marks the turn finished; an `abandoned` turn's stream will not be read, so it is removed."""
+        entry = self._entries.get(chat_id)
+        if entry is None or entry.assistant is not assistant:
+            return
+        if abandoned:
+            del self._entries[chat_id]
+        else:
+            entry.finished_at = time.monotonic()
+
+    def remove(self, chat_id: str, assistant):
+        """Removes the assistant after its stream has been read, unless its turn is still running."""
+        entry = self._entries.get(chat_id)
+        if entry is not None and entry.assistant is assistant and entry.finished_at is not None:
+            del self._entries[chat_id]
+
+    def reap(self) -> int:
+        expired_before = time.monotonic() - self.ttl
+        expired = [chat for chat, entry in self._entries.items()
+                   if entry.finished_at is not None and entry.finished_at < expired_before]
+        for chat in expired:
+            del self._entries[chat]
+        if expired:
+            ASSISTANT_REGISTRY_EVICTED.labels("ttl").inc(len(expired))
+            logger.info(f"Dropped {len(expired)} finished chat turns whose stream was not read.")
+        return len(expired)
+
+    async def _reap_periodically(self):
+        while True:
+            await asyncio.sleep(max(self.ttl / 2, 1.0))
+            self.reap()
+
+    def start(self):
+        self._reaper = asyncio.create_task(self._reap_periodically())
+
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            await asyncio.gather(self._reaper, return_exceptions=True)
+            self._reaper = None
+
+
+def initialize_assistant_registry(app: FastAPI):
+    """
+    Create the assistant registry, start its reaper and store it in the FastAPI
+    application's state.
+    """
+    registry = AssistantRegistry()
+    registry.start()
+    app.state.assistant_registry = registry
+    ASSISTANT_REGISTRY_SIZE.set_function(lambda: len(registry))
+    ASSISTANT_REGISTRY_RUNNING.set_function(lambda: len(registry.running()))
+    ASSISTANT_BUFFERED_BYTES.set_function(registry.buffered_bytes)
+    logger.info("Assistant registry initialized and stored in app.state.")
+
+
+def get_assistant_registry(app: FastAPI) -> AssistantRegistry:
+    """
+    Retrieve the assistant registry from the FastAPI application's state.
+    """
+    registry = getattr(app.state, "assistant_registry", None)
+    if registry is None:
+        logger.error("Assistant registry is not initialized.")
+        raise RuntimeError("Assistant registry is not initialized.")
+    return registry
+
+
+async def close_assistant_registry(app: FastAPI):
+    registry: Optional[AssistantRegistry] = getattr(app.state, "assistant_registry", None)
+    if registry is not None:
+        await registry.close()
+        app.state.assistant_registry = None
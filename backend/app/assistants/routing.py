@@ -0,0 +1,157 @@
+# backend/app/assistants/routing.py
+import logging
+import re
+from dataclasses import dataclass, replace
+from typing import List, Optional
+
+from fastapi import FastAPI
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+
+from app.assistants.prompts import ROUTING_CLASSIFIER_PROMPT
+from app.clients import get_client_pool
+from app.config import settings
+from app.metrics import ROUTE_DECISIONS
+from app.openai import token_size
+
+logger = logging.getLogger(__name__)
+
+ROUTE_SMALLTALK = "smalltalk"
+ROUTE_SIMPLE = "simple"
+ROUTE_COMPLEX = "complex"
+
+_WORD = re.compile(r"\w+")
+_SMALLTALK_PHRASES = re.compile(
+    r"\b(?:guten (?:morgen|tag|abend)|vielen (?:lieben )?dank|bis (?:bald|dann|später)|auf wiedersehen"
+    r"|alles klar|schönen tag|thank you|good (?:morning|evening)|see you"
+    r"|hallo|hi|hey|moin|servus|danke(?:schön|sehr)?|merci|super|prima|toll|perfekt|okay|ok|verstanden"
+    r"|tschüss?|ciao|thanks|bye)\b"
+)
+# Words that may accompany a greeting or thanks without making it a question
+_FILLER_WORDS = frozenset({
+    "dir", "euch", "ihnen", "für", "die", "deine", "ihre", "eure", "hilfe", "antwort", "antworten", "info", "infos",
+    "sehr", "so", "nochmal", "noch", "mal", "lieber", "liebe", "das", "hilft", "mir", "war", "hilfreich", "und",
+    "dann", "ja", "nein", "gut", "you", "for", "the", "help", "very", "much", "and", "a", "lot",
+})
+_MULTI_PART = re.compile(r"(?m)^\s*(?:\d+[.)]|[-*•])\s")
+_COMPLEX_KEYWORDS = re.compile(
+    r"\b(?:warum|wieso|weshalb|erklär|vergleich|unterschied|zusammenhang|wechselwirk|nebenwirk|medikament"
+    r"|tablette|dosier|dosis|schwanger|stillzeit|stillen|säugling|baby|kinder|diagnos|chronisch|langfristig"
+    r"|vor- und nachteil|schritt für schritt|why|explain|compare|differen|medication|pregnan|side effect)"
+)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """
+    Where a chat turn goes. `decided` is False when no rule matched with confidence,
+    in which case the classifier model (if configured) gets the final word.
+    """
+    route: str
+    model: str
+    reason: str
+    tokens: int = 0
+    skip_retrieval: bool = False
+    decided: bool = True
+
+
+def is_smalltalk(text: str) -> bool:
+    """True for greetings, thanks and goodbyes that carry no question."""
+    lowered = text.lower()
+    if "?" in lowered or not _SMALLTALK_PHRASES.search(lowered):
+        return False
+    rest = [word for word in _WORD.findall(_SMALLTALK_PHRASES.sub(" ", lowered)) if word not in _FILLER_WORDS]
+    # One leftover word is allowed for the assistant's or the user's name
+    return len(rest) <= 1
+
+
+class QueryRouter:
+    """
+    Routes each chat turn by its complexity.
+
+    Cheap rules run first: small talk skips retrieval and goes to the fast model,
+    long, multi-part or sensitive questions (keywords) go to the main model and short
+    plain questions go to the fast model. Questions in between go to the main model
+    unless the optional classifier model rates them simple. After retrieval, simple
+    turns whose best chunk is a weak match are escalated to the main model.
+    """
+
+    def __init__(
+        self,
+        main_model: str = settings.MODEL,
+        fast_model: Optional[str] = settings.ROUTING_FAST_MODEL,
+        classifier: Optional[BaseChatModel] = None,
+        enabled: bool = settings.ROUTING_ENABLED,
+        simple_max_tokens: int = settings.ROUTING_SIMPLE_MAX_TOKENS,
+        complex_min_tokens: int = settings.ROUTING_COMPLEX_MIN_TOKENS,
+        min_retrieval_score: float = settings.ROUTING_MIN_RETRIEVAL_SCORE,
+    ):
+        self.main_model = main_model
+        self.fast_model = fast_model or main_model
+        self.classifier = classifier
+        self.enabled = enabled
+        self.simple_max_tokens = simple_max_tokens
+        self.complex_min_tokens = complex_min_tokens
+        self.min_retrieval_score = min_retrieval_score
+
+    def _complex(self, reason: str, tokens: int, decided: bool = True) -> RouteDecision:
+        return RouteDecision(ROUTE_COMPLEX, self.main_model, reason, tokens, decided=decided)
+
+    def _simple(self, reason: str, tokens: int) -> RouteDecision:
+        return RouteDecision(ROUTE_SIMPLE, self.fast_model, reason, tokens)
+
+    def route(self, question: str) -> RouteDecision:
+        """Rule-based decision; no I/O, so it can run before any pipeline stage."""
+        if not self.enabled:
+            return self._complex("disabled", 0)
+        if is_smalltalk(question):
+            return RouteDecision(ROUTE_SMALLTALK, self.fast_model, "smalltalk", skip_retrieval=True)
+
+        tokens = token_size(question)
+        lowered = question.lower()
+        if tokens >= self.complex_min_tokens:
+            return self._complex("long", tokens)
+        if question.count("?") > 1 or _MULTI_PART.search(question):
+            return self._complex("multi_part", tokens)
+        if _COMPLEX_KEYWORDS.search(lowered):
+            return self._complex("keyword", tokens)
+        if tokens <= self.simple_max_tokens:
+            return self._simple("short", tokens)
+        return self._complex("undecided", tokens, decided=False)
+
+    async def aclassify(self, question: str, decision: RouteDecision) -> RouteDecision:
+        """Lets the classifier model settle turns the rules left undecided."""
+        if decision.decided or self.classifier is None:
+            return decision
+        reply = await self.classifier.ainvoke(ROUTING_CLASSIFIER_PROMPT.format(question=question))
+        label = str(getattr(reply, "content", reply)).strip().upper()
+        if label.startswith("EINFACH"):
+            return self._simple("classifier", decision.tokens)
+        return self._complex("classifier", decision.tokens)
+
+    def refine(self, decision: RouteDecision, documents: Optional[List[Document]]) -> RouteDecision:
+        """Escalates simple turns whose retrieved context is a weak match."""
+        if decision.route != ROUTE_SIMPLE:
+            return decision
+        top_score = max((doc.metadata.get("relevance", 0.0) for doc in documents or []), default=0.0)
+        if top_score < self.min_retrieval_score:
+            return replace(decision, route=ROUTE_COMPLEX, model=self.main_model, reason="weak_retrieval")
+        return decision
+
+    @staticmethod
+    def record(decision: RouteDecision, label: str = ""):
+        ROUTE_DECISIONS.labels(decision.route, decision.reason).inc()
+        logger.info(
+            f"{label}Routed turn to {decision.route} ({decision.reason}, {decision.tokens} tokens) "
+            f"using model {decision.model}"
+        )
+
+
+def build_query_router(app: FastAPI) -> QueryRouter:
+    """Builds the router, with the classifier model when ROUTING_CLASSIFIER_MODEL is set."""
+    classifier = None
+    if settings.ROUTING_CLASSIFIER_MODEL:
+        classifier = get_client_pool(app).chat_model(
+            settings.ROUTING_CLASSIFIER_MODEL, temperature=0, streaming=False, max_tokens=3
+        )
+    return QueryRouter(classifier=classifier)
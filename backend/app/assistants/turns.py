@@ -0,0 +1,235 @@
+# backend/app/assistants/turns.py
+"""
+One Firestore write per chat turn, backed by a local journal.
+
+A turn's messages are collected by a `TurnWriter` and committed together with the
+chat's `message_count` and `last_activity` in one batched write when the turn ends
+(`FirestoreRepository.commit_turn`). Until then they live in the turn journal, an
+append-only JSONL file per process under CHAT_JOURNAL_DIR:
+
+    {"turn": "<id>", "chat_id": "...", "messages": [...]}   every message added so far
+    {"turn": "<id>", "committed": true}                     written after the commit
+
+On startup, the journals of processes that are no longer running are replayed: turns
+without a `committed` record are written to Firestore unless their first message is
+already there, which is the case when the process died between the commit and the
+journal record. A worker first claims a journal by renaming it to
+`turns-<pid>.jsonl.replaying-<its pid>`, so workers starting together never replay
+the same journal twice.
+"""
+
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import FastAPI
+
+from app.config import settings
+from app.metrics import CHAT_JOURNAL_REPLAYED
+from app.repository import get_firestore
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PREFIX = "turns-"
+CLAIM_INFIX = ".replaying-"
+
+
+def journal_dir() -> str:
+    return settings.CHAT_JOURNAL_DIR or os.path.join(settings.UPLOAD_DIR, "journal")
+
+
+def _encode(message: dict) -> dict:
+    return {**message, "created_at": message["created_at"].isoformat()}
+
+
+def _decode(message: dict) -> dict:
+    return {**message, "created_at": datetime.fromisoformat(message["created_at"])}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TurnJournal:
+    """The journal of this process's uncommitted turns."""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{JOURNAL_PREFIX}{os.getpid()}.jsonl")
+        # Turns an earlier process with this PID left and that could not be replayed stay open
+        self.open_turns = set(read_journal(self.path)) if os.path.exists(self.path) else set()
+        self.file = open(self.path, "a", encoding="utf-8")
+        self._lock = asyncio.Lock()
+
+    def _append(self, record: dict):
+        self.file.write(json.dumps(record, ensure_ascii=False))
+        self.file.write("\n")
+        self.file.flush()
+        if settings.CHAT_JOURNAL_FSYNC:
+            os.fsync(self.file.fileno())
+
+    def _truncate(self):
+        self.file.seek(0)
+        self.file.truncate()
+
+    async def record(self, turn_id: str, chat_id: str, messages: List[dict]):
+        async with self._lock:
+            self.open_turns.add(turn_id)
+            record = {"turn": turn_id, "chat_id": chat_id, "messages": [_encode(m) for m in messages]}
+            await asyncio.to_thread(self._append, record)
+
+    async def committed(self, turn_id: str):
+        async with self._lock:
+            self.open_turns.discard(turn_id)
+            if not self.open_turns and self.file.tell() > settings.CHAT_JOURNAL_MAX_BYTES:
+                # Nothing in the file is needed any more
+                await asyncio.to_thread(self._truncate)
+            else:
+                await asyncio.to_thread(self._append, {"turn": turn_id, "committed": True})
+
+    def close(self):
+        self.file.close()
+        if not self.open_turns:
+            os.remove(self.path)
+        else:
+            logger.warning(f"{len(self.open_turns)} chat turns are still open; they are replayed on the next start.")
+
+
+def read_journal(path: str) -> Dict[str, dict]:
+    """Uncommitted turns of a journal file, by turn ID."""
+    turns: Dict[str, dict] = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The process died in the middle of this line
+                continue
+            if record.get("committed"):
+                turns.pop(record["turn"], None)
+            else:
+                turns[record["turn"]] = record
+    return turns
+
+
+def _journal_owner(name: str) -> Optional[int]:
+    """PID of the process a journal file belongs to: its writer, or the worker that claimed it."""
+    if not name.startswith(JOURNAL_PREFIX):
+        return None
+    journal, _, claimer = name.partition(CLAIM_INFIX)
+    pid = journal[len(JOURNAL_PREFIX):-len(".jsonl")]
+    if not (journal.endswith(".jsonl") and pid.isdigit() and (claimer == "" or claimer.isdigit())):
+        return None
+    return int(claimer or pid)
+
+
+def _claim_journal(directory: str, name: str) -> Optional[str]:
+    """Renames the journal to this process's claim name; None when another worker was faster."""
+    journal = name.partition(CLAIM_INFIX)[0]
+    path = os.path.join(directory, f"{journal}{CLAIM_INFIX}{os.getpid()}")
+    try:
+        os.rename(os.path.join(directory, name), path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+async def replay_journals(firestore, directory: str) -> int:
+    """
+    Commits the open turns in the journals of processes that are not running and
+    removes those journals. A journal carrying this process's PID was left by an
+    earlier process that had the same PID, as happens in containers. Journals whose
+    replay failed keep their claim name and are replayed on a later start.
+    """
+    replayed = 0
+    for name in sorted(os.listdir(directory)):
+        pid = _journal_owner(name)
+        if pid is None or (pid != os.getpid() and _pid_alive(pid)):
+            continue
+        path = _claim_journal(directory, name)
+        if path is None:
+            continue
+        try:
+            for turn_id, record in read_journal(path).items():
+                messages = [_decode(m) for m in record["messages"]]
+                if messages and not await firestore.turn_committed(record["chat_id"], turn_id):
+                    await firestore.commit_turn(record["chat_id"], turn_id, messages)
+                    replayed += 1
+                    CHAT_JOURNAL_REPLAYED.inc()
+        except Exception as e:
+            # Kept for the next start; turns already written are skipped then
+            logger.error(f"Failed to replay the turn journal {path}: {e}")
+            continue
+        os.remove(path)
+    if replayed:
+        logger.info(f"Replayed {replayed} chat turns from the turn journal.")
+    return replayed
+
+
+class TurnWriter:
+    """Collects the messages of one chat turn and writes them in one batch."""
+
+    def __init__(self, firestore, journal: TurnJournal, chat_id: str):
+        self.firestore = firestore
+        self.journal = journal
+        self.chat_id = chat_id
+        self.turn_id = uuid4().hex
+        self.messages: List[dict] = []
+        self.is_committed = False
+        self.commit_attempted = False
+
+    async def add(self, message: dict):
+        self.messages.append(message)
+        await self.journal.record(self.turn_id, self.chat_id, self.messages)
+
+    async def commit(self):
+        """
+        Writes the collected messages. When the write fails, the journal keeps them and
+        they are replayed on the next start.
+        """
+        if self.is_committed or not self.messages:
+            return
+        self.commit_attempted = True
+        await self.firestore.commit_turn(self.chat_id, self.turn_id, self.messages)
+        self.is_committed = True
+        await self.journal.committed(self.turn_id)
+
+
+async def initialize_turn_journal(app: FastAPI):
+    """
+    Replay the journals left by earlier processes, then open this process's journal
+    and store it in the FastAPI application's state.
+    """
+    directory = journal_dir()
+    os.makedirs(directory, exist_ok=True)
+    await replay_journals(get_firestore(app), directory)
+    app.state.turn_journal = TurnJournal(directory)
+    logger.info(f"Turn journal opened at {app.state.turn_journal.path}.")
+
+
+def get_turn_journal(app: FastAPI) -> TurnJournal:
+    """
+    Retrieve the turn journal from the FastAPI application's state.
+    """
+    journal = getattr(app.state, "turn_journal", None)
+    if journal is None:
+        logger.error("Turn journal is not initialized.")
+        raise RuntimeError("Turn journal is not initialized.")
+    return journal
+
+
+def close_turn_journal(app: FastAPI):
+    journal: Optional[TurnJournal] = getattr(app.state, "turn_journal", None)
+    if journal is not None:
+        journal.close()
+        app.state.turn_journal = None
@@ -0,0 +1,132 @@
+# backend/app/clients.py
+
+import importlib.util
+import logging
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+import httpx
+from fastapi import FastAPI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    return settings.HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+
+class ClientPool:
+    """
+    Long-lived, pooled HTTP clients shared by every request.
+
+    One keep-alive connection pool (HTTP/2 when `h2` is installed) backs the raw
+    AsyncOpenAI client and all LangChain chat/embedding models, and one aiohttp
+    session serves file downloads, so TLS handshakes happen once per connection
+    instead of once per message. LangChain models are cached per configuration.
+    """
+
+    def __init__(self):
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+        http2 = _http2_available()
+
+        self.openai_http = httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+        # LangChain still takes a sync client for its (rare) blocking code paths
+        self.openai_http_sync = httpx.Client(limits=limits, timeout=timeout, http2=http2)
+        self.openai = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=self.openai_http,
+        )
+        self.download_session: Optional[aiohttp.ClientSession] = None
+        self._chat_models: Dict[Tuple, ChatOpenAI] = {}
+        self._embeddings: Optional[OpenAIEmbeddings] = None
+        logger.info(f"HTTP client pool created (http2={http2}, max_connections={settings.HTTP_MAX_CONNECTIONS}).")
+
+    async def start(self):
+        """Creates the clients that must be bound to the running event loop."""
+        self.download_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=settings.HTTP_MAX_CONNECTIONS,
+                limit_per_host=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=aiohttp.ClientTimeout(total=settings.DOWNLOAD_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+        )
+
+    def chat_model(self, model: str = settings.MODEL, temperature: float = 0.2, streaming: bool = True,
+                   max_tokens: Optional[int] = None) -> ChatOpenAI:
+        key = (model, temperature, streaming, max_tokens)
+        chat_model = self._chat_models.get(key)
+        if chat_model is None:
+            chat_model = ChatOpenAI(
+                model_name=model,
+                temperature=temperature,
+                streaming=streaming,
+                max_tokens=max_tokens,
+                openai_api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                http_client=self.openai_http_sync,
+                http_async_client=self.openai_http,
+            )
+            self._chat_models[key] = chat_model
+        return chat_model
+
+    def embeddings(self) -> OpenAIEmbeddings:
+        if self._embeddings is None:
+            self._embeddings = OpenAIEmbeddings(
+                openai_api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                http_client=self.openai_http_sync,
+                http_async_client=self.openai_http,
+            )
+        return self._embeddings
+
+    async def aclose(self):
+        if self.download_session is not None:
+            await self.download_session.close()
+        await self.openai_http.aclose()
+        self.openai_http_sync.close()
+
+
+async def initialize_client_pool(app: FastAPI):
+    """
+    Create the shared HTTP client pool and store it in the FastAPI application's state.
+    """
+    pool = ClientPool()
+    await pool.start()
+    app.state.client_pool = pool
+    logger.info("HTTP client pool initialized and stored in app.state.")
+
+
+def get_client_pool(app: FastAPI) -> ClientPool:
+    """
+    Retrieve the HTTP client pool from the FastAPI application's state.
+    """
+    pool = getattr(app.state, "client_pool", None)
+    if pool is None:
+        logger.error("HTTP client pool is not initialized.")
+        raise RuntimeError("HTTP client pool is not initialized.")
+    return pool
+
+
+async def close_client_pool(app: FastAPI):
+    """
+    Close all pooled HTTP connections.
+    """
+    pool = getattr(app.state, "client_pool", None)
+    if pool is None:
+        return
+    try:
+        await pool.aclose()
+        logger.info("HTTP client pool closed successfully.")
+    except Exception as e:
+        logger.error(f"Error closing HTTP client pool: {e}")
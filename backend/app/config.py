@@ -2,6 +2,7 @@
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, validator
+from typing import Optional
 import logging
 
 # Configure a logger for the settings
@@ -15,6 +16,7 @@ logger.addHandler(handler)
 class Settings(BaseSettings):
     ALLOW_ORIGINS: str  # Replace with your frontend's URL
     OPENAI_API_KEY: str
+    OPENAI_BASE_URL: Optional[str] = None  # OpenAI-compatible endpoint; None uses api.openai.com
     MODEL: str 
     EMBEDDING_MODEL: str 
     EMBEDDING_DIMENSIONS: int 
@@ -34,6 +36,7 @@ class Settings(BaseSettings):
     LANGFUSE_SECRET_KEY: str
     LANGFUSE_PUBLIC_KEY: str
     LANGFUSE_HOST: str 
+    LANGFUSE_ENABLED: bool = True
     FIREBASE_TYPE: str
     FIREBASE_PROJECT_ID: str
     FIREBASE_PRIVATE_KEY_ID: str
@@ -47,6 +50,7 @@ class Settings(BaseSettings):
     FIREBASE_UNIVERSE_DOMAIN: str
     
     UPLOAD_DIR: str 
+    FRONTEND_DIR: str = "/Volumes/External/Netling AI/frontend"
     # Frontend Firebase Config fields
     FRONTEND_FIREBASE_API_KEY: str
     FRONTEND_FIREBASE_AUTH_DOMAIN: str
@@ -56,6 +60,107 @@ class Settings(BaseSettings):
     FRONTEND_FIREBASE_APP_ID: str
     FRONTEND_FIREBASE_MEASUREMENT_ID: str
 
+    # Context assembly between the retriever and the prompt
+    CONTEXT_FETCH_K: int = 20  # Candidates over-fetched from the vector store
+    CONTEXT_TOKEN_BUDGET: int = 1500  # Max tokens of retrieved context per turn
+    CONTEXT_MMR_LAMBDA: float = 0.5  # 1.0 = pure relevance, 0.0 = pure diversity
+    CONTEXT_DUPLICATE_THRESHOLD: float = 0.95  # Cosine similarity treated as duplicate
+
+    # Conversation memory
+    HISTORY_TOKEN_BUDGET: int = 1000  # Max tokens of verbatim history per turn
+    HISTORY_SUMMARY_TOKEN_BUDGET: int = 300  # Max tokens of the rolling summary
+    SUMMARY_MODEL: Optional[str] = None  # Defaults to MODEL
+
+    # Query-complexity routing between the fast and the main model
+    ROUTING_ENABLED: bool = True
+    ROUTING_FAST_MODEL: Optional[str] = None  # Model for simple turns; defaults to MODEL
+    ROUTING_CLASSIFIER_MODEL: Optional[str] = None  # Tiny model for turns the rules cannot decide
+    ROUTING_CLASSIFIER_TIMEOUT: float = 2.0
+    ROUTING_SIMPLE_MAX_TOKENS: int = 30  # Longer questions are never routed to the fast model
+    ROUTING_COMPLEX_MIN_TOKENS: int = 80  # Longer questions always go to the main model
+    ROUTING_MIN_RETRIEVAL_SCORE: float = 0.3  # Simple turns with weaker retrieval are escalated
+
+    # Document listing
+    DOCUMENTS_PAGE_SIZE: int = 50
+    DOCUMENTS_MAX_PAGE_SIZE: int = 200
+    DOCUMENTS_BATCH_DELETE_MAX: int = 500  # Document IDs per batch delete request
+    DOCUMENTS_DELETE_CONCURRENCY: int = 8  # Parallel Storage deletes per batch delete
+
+    # Chat list and message history
+    CHATS_PAGE_SIZE: int = 20
+    CHATS_MAX_PAGE_SIZE: int = 100
+    CHAT_MESSAGES_PAGE_SIZE: int = 50
+    CHAT_MESSAGES_MAX_PAGE_SIZE: int = 200
+
+    # Document ingestion
+    INGEST_CHUNK_SIZE: int = 512  # Tokens per chunk
+    INGEST_CHUNK_OVERLAP: int = 20
+    INGEST_BATCH_SIZE: int = 64  # Chunks embedded and indexed per batch
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024  # Read size when streaming uploads and downloads to disk
+    INGEST_PROCESS_WORKERS: int = 2  # Processes extracting large documents; 0 extracts inline
+    INGEST_PROCESS_MIN_BYTES: int = 4 * 1024 * 1024  # Smaller files are always extracted inline
+    INGEST_PAGES_PER_TASK: int = 16  # Pages per worker-process task
+    INGEST_SPOOL_DIR: Optional[str] = None  # Extracted chunks kept for resuming; defaults to UPLOAD_DIR/spool
+    INGEST_STALE_SECONDS: int = 900  # A running ingestion without progress for this long may be retried
+
+    # Vector store writes
+    INDEX_BATCH_SIZE: int = 100  # Initial objects per batch request; adapted to the latency
+    INDEX_MIN_BATCH_SIZE: int = 20  # Also the step by which the batch size grows
+    INDEX_MAX_BATCH_SIZE: int = 1000
+    INDEX_TARGET_BATCH_SECONDS: float = 1.0
+    INDEX_CONCURRENCY: int = 4  # Batch requests in flight per ingestion
+    INDEX_MAX_RETRIES: int = 3  # Retries of rejected objects and failed requests
+    INDEX_RETRY_BACKOFF: float = 0.5  # Seconds before the first retry, doubled each time
+
+    # Firestore access
+    FIRESTORE_TIMEOUT: float = 10.0  # Max seconds per Firestore call
+    FIRESTORE_THREAD_POOL_SIZE: int = 8  # Threads for the transactions that still use the sync client
+
+    # Chat turn journal: messages are written to Firestore once per turn
+    CHAT_JOURNAL_DIR: Optional[str] = None  # Defaults to UPLOAD_DIR/journal
+    CHAT_JOURNAL_FSYNC: bool = True  # fsync every journal record
+    CHAT_JOURNAL_MAX_BYTES: int = 1024 * 1024  # Truncated at this size once no turn is open
+
+    # Per-stage timeouts of a chat turn, in seconds
+    STAGE_TIMEOUT_FIRESTORE: float = 10.0
+    STAGE_TIMEOUT_RETRIEVAL: float = 20.0
+    STAGE_TIMEOUT_GENERATION: float = 180.0
+
+    # Shared HTTP client pool (OpenAI, embeddings, downloads)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0  # Seconds an idle connection is kept open
+    HTTP_TIMEOUT: float = 120.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP2_ENABLED: bool = True  # Used when the `h2` package is installed
+    DOWNLOAD_TIMEOUT: float = 300.0
+
+    # Admission control for chat turns
+    ADMISSION_MAX_CONCURRENT_TURNS: int = 32  # Turns streaming from the LLM at once, per worker
+    ADMISSION_MAX_TURNS_PER_USER: int = 2  # Running plus queued turns per user
+    ADMISSION_QUEUE_SIZE: int = 64  # Turns waiting for a slot before new ones get 503
+    ADMISSION_QUEUE_TIMEOUT: float = 10.0  # Max seconds a turn waits for a slot
+    ADMISSION_RETRY_AFTER: int = 5  # Retry-After seconds sent with 429/503
+
+    # Registry of the assistants of running and unread turns
+    ASSISTANT_REGISTRY_MAX_SIZE: int = 256  # Per worker; finished turns are evicted first
+    ASSISTANT_STREAM_TTL: float = 60.0  # Seconds a finished turn's unread stream is kept
+
+    # Startup, readiness probes and shutdown
+    STARTUP_RETRIES: int = 5  # Attempts to reach a dependency before startup fails
+    STARTUP_RETRY_DELAY: float = 1.0  # Seconds before the first retry, doubled each time
+    STARTUP_RETRY_MAX_DELAY: float = 10.0
+    READINESS_CHECK_TIMEOUT: float = 2.0  # Per dependency check of /readyz
+    READINESS_CACHE_SECONDS: float = 2.0  # /readyz reuses check results this long
+    SHUTDOWN_DRAIN_TIMEOUT: float = 30.0  # Seconds running chat turns may finish before clients close
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # Per-module overrides, e.g. "app.assistants=DEBUG,weaviate=WARNING"
+    LOG_ACCESS_SAMPLE_RATE: float = 0.1  # Share of successful requests written to the access log
+    LOG_SLOW_REQUEST_SECONDS: float = 1.0  # Requests slower than this are always logged
+    LOG_TOKENS: bool = False  # Log every streamed token (debugging only)
+
     # Define Pydantic v2 configuration
     model_config = SettingsConfigDict(
         env_file='.env',
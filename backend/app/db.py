@@ -3,7 +3,7 @@
 import weaviate
 from app.config import settings
 import logging
-import time
+import asyncio
 from fastapi import FastAPI
 from weaviate.classes.init import AdditionalConfig, Timeout
 from weaviate.connect import ConnectionParams
@@ -62,20 +62,44 @@ def ensure_weaviate_schema(app: FastAPI):
                     vectorize_property_name=False,
                     tokenization=weaviate.classes.config.Configure.Tokenization.LOWERCASE,
                 ),
+                weaviate.classes.config.Configure.Property(
+                    name="source",
+                    data_type=weaviate.classes.config.Configure.DataType.TEXT,
+                    vectorize_property_name=False,
+                    skip_vectorization=True,
+                ),
+                # Pages a chunk spans (PDF), or the heading of its section (DOCX)
+                weaviate.classes.config.Configure.Property(
+                    name="page_start",
+                    data_type=weaviate.classes.config.Configure.DataType.INT,
+                ),
+                weaviate.classes.config.Configure.Property(
+                    name="page_end",
+                    data_type=weaviate.classes.config.Configure.DataType.INT,
+                ),
+                weaviate.classes.config.Configure.Property(
+                    name="section",
+                    data_type=weaviate.classes.config.Configure.DataType.TEXT,
+                    vectorize_property_name=False,
+                    skip_vectorization=True,
+                ),
             ],
         )
         logger.info(f"Weaviate schema '{class_name}' created.")
 
-# Function to test Weaviate connection with retries
-def test_weaviate_connection(app: FastAPI, retries: int = 5, delay: int = 5):
+# Function to wait for Weaviate with retries
+async def test_weaviate_connection(app: FastAPI, retries: int = None, delay: float = None):
     """
-    Test the connection to Weaviate with retries.
+    Wait until Weaviate is ready, retrying with exponential backoff. The event loop
+    keeps serving while it waits.
     """
     weaviate_client = get_weaviate_client(app)
+    retries = retries or settings.STARTUP_RETRIES
+    delay = delay or settings.STARTUP_RETRY_DELAY
     
     for attempt in range(1, retries + 1):
         try:
-            if weaviate_client.is_ready():
+            if await asyncio.to_thread(weaviate_client.is_ready):
                 logger.info("Successfully connected to Weaviate.")
                 return
             else:
@@ -83,7 +107,9 @@ def test_weaviate_connection(app: FastAPI, retries: int = 5, delay: int = 5):
         except Exception as e:
             logger.error(f"Attempt {attempt}/{retries}: Failed to connect to Weaviate: {e}")
         
-        time.sleep(delay)
+        if attempt < retries:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.STARTUP_RETRY_MAX_DELAY)
     
     logger.critical("Weaviate is not ready after multiple retries.")
     raise RuntimeError("Weaviate is not ready after multiple retries.")
@@ -0,0 +1,193 @@
+# backend/app/document_summary.py
+"""
+Materialized per-user summary of the `documents` collection.
+
+`document_summaries/{uid}` holds the distinct sources (with per-source counts), the
+document count, the total size, the last upload time and a version counter. Upload
+and delete update it in the same transaction as the document itself, so reading
+sources or counts costs one document read instead of a scan. Changes of a document's
+ingestion status, which the listing shows, bump the version in the same write.
+
+Repair drift with:
+
+    python -m app.document_summary rebuild [uid ...]
+"""
+
+import argparse
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from firebase_admin import firestore
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLLECTION = "document_summaries"
+# Document fields the summary is derived from
+SOURCE_FIELDS = ["source", "size", "uploaded_at", "user_id"]
+
+
+def summary_ref(firestore_client, uid: str):
+    """Reference of the per-user document summary (`document_summaries/{uid}`)."""
+    return firestore_client.collection(SUMMARY_COLLECTION).document(uid)
+
+
+def version_bump() -> dict:
+    """Summary fields that bump the version; written with merge=True next to a document change."""
+    return {"version": firestore.Increment(1), "updated_at": firestore.SERVER_TIMESTAMP}
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Uploads store naive UTC datetimes; Firestore returns them timezone-aware
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _fold(summary: dict, added: Iterable[dict] = (), removed: Iterable[dict] = ()) -> dict:
+    """
+    Applies added and removed documents to `summary` and returns the fields to write.
+    A summary that was never materialized only gets its version bumped; it is built
+    from the documents on its first read.
+    """
+    if "document_count" not in summary:
+        return {"version": summary.get("version", 0) + 1, "updated_at": firestore.SERVER_TIMESTAMP}
+    counts = dict(summary.get("source_counts") or {})
+    document_count = summary.get("document_count", 0)
+    total_bytes = summary.get("total_bytes", 0)
+    last_upload_at = _as_utc(summary.get("last_upload_at"))
+
+    for doc in added:
+        source = doc.get("source")
+        if source:
+            counts[source] = counts.get(source, 0) + 1
+        document_count += 1
+        total_bytes += doc.get("size") or 0
+        uploaded_at = _as_utc(doc.get("uploaded_at"))
+        if uploaded_at and (last_upload_at is None or uploaded_at > last_upload_at):
+            last_upload_at = uploaded_at
+
+    for doc in removed:
+        source = doc.get("source")
+        if source in counts:
+            counts[source] -= 1
+            if counts[source] <= 0:
+                del counts[source]
+        document_count = max(document_count - 1, 0)
+        total_bytes = max(total_bytes - (doc.get("size") or 0), 0)
+
+    return {
+        "source_counts": counts,
+        "sources": sorted(counts),
+        "document_count": document_count,
+        "total_bytes": total_bytes,
+        "last_upload_at": last_upload_at,
+        "version": summary.get("version", 0) + 1,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def _read(transaction, reference) -> dict:
+    snapshot = reference.get(transaction=transaction)
+    return (snapshot.to_dict() or {}) if snapshot.exists else {}
+
+
+def _write(transaction, reference, fields: dict):
+    # Merging on exactly these fields replaces them wholesale (removed sources disappear)
+    transaction.set(reference, fields, merge=list(fields))
+
+
+@firestore.transactional
+def _create_document(transaction, firestore_client, doc_ref, document_data: dict):
+    ref = summary_ref(firestore_client, document_data["user_id"])
+    summary = _read(transaction, ref)
+    transaction.set(doc_ref, document_data)
+    _write(transaction, ref, _fold(summary, added=[document_data]))
+
+
+def create_document(firestore_client, doc_ref, document_data: dict):
+    """Creates a document and adds it to its owner's summary in one transaction."""
+    _create_document(firestore_client.transaction(), firestore_client, doc_ref, document_data)
+
+
+@firestore.transactional
+def _delete_documents(transaction, firestore_client, uid: str, doc_refs: list) -> List[str]:
+    ref = summary_ref(firestore_client, uid)
+    summary = _read(transaction, ref)
+    snapshots = [snapshot for snapshot in transaction.get_all(doc_refs) if snapshot.exists]
+    if not snapshots:
+        return []
+    for snapshot in snapshots:
+        transaction.delete(snapshot.reference)
+    _write(transaction, ref, _fold(summary, removed=[snapshot.to_dict() for snapshot in snapshots]))
+    return [snapshot.id for snapshot in snapshots]
+
+
+def delete_documents(firestore_client, uid: str, doc_refs: list) -> List[str]:
+    """
+    Deletes the user's documents that still exist and removes them from the summary in
+    one transaction. Returns the IDs that were deleted. A transaction allows 500 writes,
+    so pass at most 499 references.
+    """
+    return _delete_documents(firestore_client.transaction(), firestore_client, uid, doc_refs)
+
+
+@firestore.transactional
+def _replace_summary(transaction, ref, documents: List[dict]) -> dict:
+    current = _read(transaction, ref)
+    summary = _fold({"version": current.get("version", 0), "document_count": 0}, added=documents)
+    _write(transaction, ref, summary)
+    return summary
+
+
+def rebuild(firestore_client, uid: str, documents: Optional[List[dict]] = None) -> dict:
+    """
+    Recomputes the user's summary from their documents (scanned when `documents` is
+    None) and bumps its version. Returns the new summary.
+    """
+    if documents is None:
+        query = firestore_client.collection("documents").where("user_id", "==", uid).select(SOURCE_FIELDS)
+        documents = [doc.to_dict() for doc in query.stream()]
+    summary = _replace_summary(firestore_client.transaction(), summary_ref(firestore_client, uid), documents)
+    logger.info(f"Rebuilt document summary for user {uid}: {summary['document_count']} documents.")
+    return summary
+
+
+def rebuild_all(firestore_client) -> int:
+    """Rebuilds the summary of every user that owns documents or has a summary. Returns the user count."""
+    by_user = defaultdict(list)
+    for doc in firestore_client.collection("documents").select(SOURCE_FIELDS).stream():
+        data = doc.to_dict()
+        by_user[data.get("user_id")].append(data)
+    by_user.pop(None, None)
+    # Users whose last document is gone still need their summary reset
+    for snapshot in firestore_client.collection(SUMMARY_COLLECTION).select(["version"]).stream():
+        by_user.setdefault(snapshot.id, [])
+
+    for uid, documents in by_user.items():
+        rebuild(firestore_client, uid, documents)
+    return len(by_user)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the materialized per-user document summaries.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subcommands.add_parser("rebuild", help="Recompute summaries from the documents collection")
+    rebuild_parser.add_argument("uids", nargs="*", help="Users to rebuild (default: all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app.export import initialize_export_firebase
+    firestore_client = initialize_export_firebase()
+
+    if args.uids:
+        for uid in args.uids:
+            rebuild(firestore_client, uid)
+        print(f"Rebuilt {len(args.uids)} document summaries")
+    else:
+        print(f"Rebuilt {rebuild_all(firestore_client)} document summaries")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,47 @@
 # export.py
+"""
+Streaming chat export.
+
+Writes one JSON object per line, either one line per chat (with its messages) or one
+line per message, optionally gzip-compressed. Chats are read page by page with
+Firestore cursors, so memory stays flat however large the dataset grows.
+
+    python -m app.export [--records chats|messages] [--gzip] [--incremental] [--partitions N]
+    python -m app.export --format parquet [--row-group-size N] [--incremental] [--partitions N]
+
+The Parquet target (see app.export_parquet) writes flattened, date-partitioned
+`chats` and `messages` tables for analytics instead of JSON lines.
+
+With --incremental only records newer than the watermark of the previous successful
+run (kept in a state file in the export directory) are exported: chats created since
+then, and for message records (and the Parquet messages table) every message created
+since then, including those appended to chats exported before; those chats are found
+by their `last_activity`. Records from the last --settle-seconds are left for the next
+run, so turns whose write is still in flight are not skipped. --partitions N reads N ranges of chat IDs of the top-level `chats`
+collection in parallel, each into its own file; it is meant for full exports and
+cannot be combined with --incremental, which is served by the created_at index.
+"""
 
 import os
+import gzip
 import json
 import asyncio
-from datetime import timezone
+import argparse
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+from typing import Iterator, List, Optional, Tuple
 from app.config import settings
 from firebase_admin import credentials, firestore, initialize_app
+from google.cloud.firestore_v1.field_path import FieldPath
 import logging
 
 logger = logging.getLogger(__name__)
 
+STATE_FILE = '.export_state.json'
+RECORD_TYPES = ('chats', 'messages')
+FORMATS = ('jsonl', 'parquet')
+
+
 def initialize_export_firebase():
     try:
         cred = credentials.Certificate(settings.SERVICE_ACCOUNT_KEY_PATH)
@@ -21,36 +53,266 @@ def initialize_export_firebase():
         logger.exception(f"Failed to initialize Firebase Admin for export: {e}")
         raise e
 
-async def export_chats(export_dir=settings.EXPORT_DIR, iso_format=True):
-    print('Exporting chats to JSON')
-    file_path = os.path.join(export_dir, 'chats.json')
+
+def as_utc(value: datetime) -> datetime:
+    # Firestore returns timezone-aware UTC timestamps; older writes may be naive UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return as_utc(value).isoformat()
+    return str(value)
+
+
+def load_watermark(export_dir: str, key: str) -> Optional[datetime]:
+    path = os.path.join(export_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        value = json.load(file).get(key, {}).get('created_at')
+    return datetime.fromisoformat(value) if value else None
+
+
+def save_watermark(export_dir: str, key: str, watermark: datetime):
+    """Persists the watermark atomically, so a crashed run never leaves a half-written state file."""
+    path = os.path.join(export_dir, STATE_FILE)
+    state = {}
+    if os.path.exists(path):
+        with open(path) as file:
+            state = json.load(file)
+    state[key] = {'created_at': as_utc(watermark).isoformat(), 'updated_at': datetime.now(timezone.utc).isoformat()}
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(state, file, indent=2)
+    os.replace(temp_path, path)
+
+
+def in_window(value: Optional[datetime], since: Optional[datetime], until: Optional[datetime]) -> bool:
+    """Whether `value` lies in the incremental window (since, until); no window admits everything."""
+    if since is None and until is None:
+        return True
+    if value is None:
+        return False
+    return (since is None or as_utc(value) > since) and (until is None or as_utc(value) < until)
+
+
+def _paged(query, page_size: int) -> Iterator:
+    last = None
+    while True:
+        page = query.start_after(last) if last is not None else query
+        docs = list(page.limit(page_size).stream())
+        yield from docs
+        if len(docs) < page_size:
+            return
+        last = docs[-1]
+
+
+def iter_chats(firestore_client, since: Optional[datetime] = None, until: Optional[datetime] = None,
+               page_size: int = 500) -> Iterator:
+    """Yields chat snapshots ordered by created_at, one page (cursor) at a time."""
+    query = firestore_client.collection('chats').order_by('created_at')
+    if since is not None:
+        query = query.where('created_at', '>', since)
+    if until is not None:
+        query = query.where('created_at', '<', until)
+    return _paged(query, page_size)
+
+
+def iter_active_chats(firestore_client, since: datetime, page_size: int = 500) -> Iterator:
+    """
+    Yields the chats created up to `since` that got messages after it, ordered by
+    last_activity; chats created later are read by iter_chats. A chat that is still
+    active is included however recent its last turn, so its older messages are not
+    held back until it goes quiet.
+    """
+    query = firestore_client.collection('chats').order_by('last_activity').where('last_activity', '>', since)
+    for chat_doc in _paged(query, page_size):
+        created_at = (chat_doc.to_dict() or {}).get('created_at')
+        if created_at is None or as_utc(created_at) <= since:
+            yield chat_doc
+
+
+def key_ranges(partitions: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Splits the chat ID space (`chat_<uuid4 hex>`) into `partitions` contiguous
+    [start, end) ranges. The first and last range are open-ended, so IDs of any other
+    shape are exported too.
+    """
+    bounds = [f"chat_{i * 16 ** 32 // partitions:032x}" for i in range(1, partitions)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def iter_key_range(firestore_client, start: Optional[str], end: Optional[str], page_size: int = 500) -> Iterator:
+    """Yields the top-level chats whose ID is in [start, end), one page (cursor) at a time."""
+    collection = firestore_client.collection('chats')
+    query = collection.order_by(FieldPath.document_id())
+    if start is not None:
+        query = query.where(FieldPath.document_id(), '>=', collection.document(start))
+    if end is not None:
+        query = query.where(FieldPath.document_id(), '<', collection.document(end))
+    return _paged(query, page_size)
+
+
+def chat_records(chat_id: str, chat_data: dict, records: str, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None) -> Iterator[dict]:
+    """
+    One record per chat (messages embedded) or one record per message; only the chat or
+    messages created in the window (since, until) are returned.
+    """
+    if records == 'chats':
+        if in_window(chat_data.get('created_at'), since, until):
+            yield {'chat_id': chat_id, **chat_data}
+        return
+    for index, message in enumerate(chat_data.get('messages', [])):
+        if not in_window(message.get('created_at'), since, until):
+            continue
+        yield {
+            'chat_id': chat_id,
+            'user_id': chat_data.get('user_id'),
+            'index': index,
+            'role': message.get('role'),
+            'content': message.get('content'),
+            'created_at': message.get('created_at'),
+        }
+
+
+def write_jsonl(chat_docs: Iterator, file_path: str, records: str, compress: bool,
+                since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Streams the records of `chat_docs` created in (since, until) to `file_path` and
+    returns (chats, lines, newest created_at of a record). The file is written under a
+    temporary name and renamed when complete; nothing is left behind when there was
+    nothing to export.
+    """
+    temp_path = f"{file_path}.partial"
+    opener = gzip.open if compress else open
+    chats = lines = 0
+    newest = None
+    with opener(temp_path, 'wt', encoding='utf-8') as file:
+        for chat_doc in chat_docs:
+            written = 0
+            for record in chat_records(chat_doc.id, chat_doc.to_dict(), records, since, until):
+                file.write(json.dumps(record, default=_json_default, ensure_ascii=False))
+                file.write('\n')
+                written += 1
+                # Legacy chats read by ID range may have no created_at
+                created_at = record.get('created_at')
+                if created_at is not None and (newest is None or as_utc(created_at) > newest):
+                    newest = as_utc(created_at)
+            lines += written
+            chats += 1 if written else 0
+    if lines:
+        os.replace(temp_path, file_path)
+    else:
+        os.remove(temp_path)
+    return chats, lines, newest
+
+
+def _chat_sources(firestore_client, since, until, partitions: int, page_size: int, messages: bool) -> List[Iterator]:
+    """
+    One chat iterator per output file: a cursor-paged scan, or one per range of chat
+    IDs. Incremental message exports also read the older chats that got new messages.
+    """
+    if partitions > 1:
+        return [iter_key_range(firestore_client, start, end, page_size) for start, end in key_ranges(partitions)]
+    chat_docs = iter_chats(firestore_client, since, until, page_size)
+    if messages and since is not None:
+        chat_docs = chain(chat_docs, iter_active_chats(firestore_client, since, page_size))
+    return [chat_docs]
+
+
+async def export_chats(export_dir=settings.EXPORT_DIR, records='chats', compress=False, incremental=False,
+                       partitions=1, page_size=500, settle_seconds=300, output_format='jsonl', row_group_size=50_000):
+    """
+    Exports chats to JSONL (or Parquet) files in `export_dir` and returns the written
+    file paths. Blocking Firestore reads and file writes run in worker threads.
+    """
+    if records not in RECORD_TYPES:
+        raise ValueError(f"records must be one of {RECORD_TYPES}")
+    if output_format not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    if incremental and partitions > 1:
+        # The watermark is a created_at range; ID ranges would have to scan every chat
+        raise ValueError("incremental exports cannot be partitioned")
+    os.makedirs(export_dir, exist_ok=True)
     firestore_client = initialize_export_firebase()
-    chats_ref = firestore_client.collection('chats')  # Ensure 'chats' is lowercase
-    chats = []
 
-    try:
-        docs = chats_ref.stream()
-        for chat_doc in docs:
-            chat_data = chat_doc.to_dict()
-            if iso_format:
-                # Assuming 'created_at' is a Firestore Timestamp
-                if 'created_at' in chat_data and chat_data['created_at']:
-                    chat_data['created_at'] = chat_data['created_at'].replace(tzinfo=timezone.utc).isoformat()
-                for message in chat_data.get('messages', []):
-                    if 'created_at' in message and message['created_at']:
-                        message['created_at'] = message['created_at'].replace(tzinfo=timezone.utc).isoformat()
-            chats.append(chat_data)
-
-        with open(file_path, 'w') as file:
-            json.dump(chats, file, indent=2)
-        print(f'{len(chats)} chats exported to {file_path}')
+    state_key = 'parquet' if output_format == 'parquet' else f"jsonl:{records}"
+    since = load_watermark(export_dir, state_key) if incremental else None
+    until = datetime.now(timezone.utc) - timedelta(seconds=settle_seconds) if incremental else None
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    what = 'chats and messages' if output_format == 'parquet' else records
+    print(f"Exporting {what} to {output_format}" + (f" (created after {since.isoformat()})" if since else ''))
 
+    try:
+        messages = output_format == 'parquet' or records == 'messages'
+        sources = _chat_sources(firestore_client, since, until, partitions, page_size, messages)
+        names = [f"{stamp}-part{i:03d}" if len(sources) > 1 else stamp for i in range(len(sources))]
+        if output_format == 'parquet':
+            from app.export_parquet import write_parquet
+            results = await asyncio.gather(*[
+                # Chat ID ranges and chats with new messages are not ordered by created_at
+                asyncio.to_thread(write_parquet, chat_docs, export_dir, f"{name}.parquet", row_group_size,
+                                  len(sources) == 1 and since is None, since, until)
+                for chat_docs, name in zip(sources, names)
+            ])
+        else:
+            suffix = '.jsonl.gz' if compress else '.jsonl'
+            file_paths = [os.path.join(export_dir, f"{records}-{name}{suffix}") for name in names]
+            results = await asyncio.gather(*[
+                asyncio.to_thread(write_jsonl, chat_docs, file_path, records, compress, since, until)
+                for chat_docs, file_path in zip(sources, file_paths)
+            ])
+            results = [(*result, [file_path] if result[0] else []) for result, file_path in zip(results, file_paths)]
     except Exception as e:
         logger.error(f"Failed to export chats: {e}")
         raise e
 
+    chats = sum(result[0] for result in results)
+    rows = sum(result[1] for result in results)
+    newest = max((result[2] for result in results if result[2] is not None), default=None)
+    if incremental and newest is not None:
+        # Only advanced after every file is complete, so a failed run is simply repeated
+        save_watermark(export_dir, state_key, newest)
+    file_paths = [path for result in results for path in result[3]]
+    if output_format == 'parquet':
+        print(f"{chats} chats and {rows} messages exported to {len(file_paths)} Parquet files in {export_dir}")
+    else:
+        print(f"{chats} chats ({rows} lines, one per {records[:-1]}) exported to {', '.join(file_paths) or 'no files'}")
+    return file_paths
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export chats from Firestore.")
+    parser.add_argument('--export-dir', default=settings.EXPORT_DIR)
+    parser.add_argument('--format', choices=FORMATS, default='jsonl',
+                        help="JSON lines, or Parquet chats/messages tables for analytics")
+    parser.add_argument('--records', choices=RECORD_TYPES, default='chats', help="One line per chat or per message")
+    parser.add_argument('--gzip', action='store_true', help="Compress the output with gzip")
+    parser.add_argument('--incremental', action='store_true', help="Only export records created since the last run")
+    parser.add_argument('--partitions', type=int, default=1,
+                        help="Read this many chat ID ranges in parallel (full exports only)")
+    parser.add_argument('--page-size', type=int, default=500, help="Chats per Firestore page")
+    parser.add_argument('--row-group-size', type=int, default=50_000, help="Rows per Parquet row group")
+    parser.add_argument('--settle-seconds', type=int, default=300,
+                        help="Incremental runs skip records newer than this, leaving them for the next run")
+    return parser.parse_args(argv)
+
+
 def main():
-    asyncio.run(export_chats())
+    args = parse_args()
+    asyncio.run(export_chats(
+        export_dir=args.export_dir,
+        records=args.records,
+        compress=args.gzip,
+        incremental=args.incremental,
+        partitions=args.partitions,
+        page_size=args.page_size,
+        settle_seconds=args.settle_seconds,
+        output_format=args.format,
+        row_group_size=args.row_group_size,
+    ))
 
 if __name__ == '__main__':
     main()
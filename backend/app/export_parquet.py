@@ -0,0 +1,223 @@
+# export_parquet.py
+"""
+Columnar chat export for analytics.
+
+Flattens chats into two Parquet tables under `<export_dir>/parquet`:
+
+    chats/date=YYYY-MM-DD/*.parquet     chat_id, user_id, created_at, message_count, ...
+    messages/date=YYYY-MM-DD/*.parquet  chat_id, user_id, index, role, content, content_length, created_at
+
+Timestamps are UTC `timestamp[us]`, `user_id` and `role` are dictionary encoded and
+rows are buffered per date partition and flushed as row groups of `row_group_size`.
+Buffered rows and open files are capped across partitions, and when chats arrive
+ordered by `created_at` a day's files are closed as soon as the stream has moved
+past it, so memory stays flat however many days an export spans.
+The hive-style `date=` directories let DuckDB, Polars or pyarrow.dataset prune by day.
+
+pyarrow is imported lazily so the API server never loads it.
+"""
+
+import os
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.export import as_utc, in_window
+
+logger = logging.getLogger(__name__)
+
+
+def _schemas(pa):
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    timestamp = pa.timestamp('us', tz='UTC')
+    chats = pa.schema([
+        ('chat_id', pa.string()),
+        ('user_id', dictionary),
+        ('created_at', timestamp),
+        ('message_count', pa.int32()),
+        ('user_message_count', pa.int32()),
+        ('first_message_at', timestamp),
+        ('last_message_at', timestamp),
+    ])
+    messages = pa.schema([
+        ('chat_id', pa.string()),
+        ('user_id', dictionary),
+        ('index', pa.int32()),
+        ('role', dictionary),
+        ('content', pa.string()),
+        ('content_length', pa.int32()),
+        ('created_at', timestamp),
+    ])
+    return {'chats': chats, 'messages': messages}
+
+
+class _PartitionedWriter:
+    """
+    Buffers rows per (table, date) and writes them through one ParquetWriter per
+    partition. Memory stays bounded: at most `max_buffered_rows` rows are buffered
+    across all partitions (the largest buffer is flushed first), at most
+    `max_open_writers` writers are open, and `finish_before` closes the partitions a
+    date-ordered stream has moved past. A partition written to again after its writer
+    was closed gets another file, `<name>-1.parquet` and so on.
+    """
+
+    def __init__(self, pa, pq, root: str, file_name: str, row_group_size: int,
+                 max_buffered_rows: Optional[int] = None, max_open_writers: int = 32):
+        self.pa = pa
+        self.pq = pq
+        self.root = root
+        self.file_name = file_name
+        self.row_group_size = row_group_size
+        self.max_buffered_rows = max_buffered_rows or row_group_size
+        self.max_open_writers = max_open_writers
+        self.schemas = _schemas(pa)
+        self.buffers: Dict[Tuple[str, str], Dict[str, list]] = {}
+        self.buffered = 0
+        self.writers: "OrderedDict[Tuple[str, str], object]" = OrderedDict()  # Least recently written first
+        self.files: Dict[Tuple[str, str], int] = {}  # Files opened per partition
+        self.paths: List[str] = []
+        self.rows = {'chats': 0, 'messages': 0}
+
+    def add(self, table: str, date: str, row: dict):
+        key = (table, date)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = {name: [] for name in self.schemas[table].names}
+        for name, values in buffer.items():
+            values.append(row.get(name))
+        self.rows[table] += 1
+        self.buffered += 1
+        if len(buffer['chat_id']) >= self.row_group_size:
+            self._flush(key)
+        elif self.buffered >= self.max_buffered_rows:
+            self._flush(max(self.buffers, key=lambda k: len(self.buffers[k]['chat_id'])))
+
+    def _open(self, key: Tuple[str, str]):
+        if len(self.writers) >= self.max_open_writers:
+            self._close(next(iter(self.writers)))
+        table, date = key
+        number = self.files.get(key, 0)
+        self.files[key] = number + 1
+        stem, extension = os.path.splitext(self.file_name)
+        name = self.file_name if number == 0 else f"{stem}-{number}{extension}"
+        directory = os.path.join(self.root, table, f"date={date}")
+        os.makedirs(directory, exist_ok=True)
+        writer = self.writers[key] = self.pq.ParquetWriter(
+            os.path.join(directory, f"{name}.partial"), self.schemas[table],
+            compression='zstd', use_dictionary=['chat_id', 'user_id', 'role'],
+        )
+        return writer
+
+    def _flush(self, key: Tuple[str, str]):
+        table, _ = key
+        buffer = self.buffers.pop(key, None)
+        if not buffer or not buffer['chat_id']:
+            return
+        self.buffered -= len(buffer['chat_id'])
+        schema = self.schemas[table]
+        writer = self.writers.get(key)
+        if writer is None:
+            writer = self._open(key)
+        else:
+            self.writers.move_to_end(key)
+        writer.write_table(self.pa.Table.from_pydict(buffer, schema=schema), row_group_size=self.row_group_size)
+
+    def _close(self, key: Tuple[str, str]):
+        """Closes the partition's writer and publishes its file."""
+        writer = self.writers.pop(key)
+        writer.close()
+        path = writer.where[:-len('.partial')]
+        os.replace(writer.where, path)
+        self.paths.append(path)
+
+    def finish_before(self, date: str):
+        """Writes out and closes the partitions of dates before `date`."""
+        for key in [key for key in {**self.buffers, **self.writers} if key[1] < date]:
+            self._flush(key)
+            if key in self.writers:
+                self._close(key)
+
+    def close(self) -> List[str]:
+        """Flushes the remaining rows, closes every writer and returns the published files."""
+        for key in list(self.buffers):
+            self._flush(key)
+        for key in list(self.writers):
+            self._close(key)
+        return self.paths
+
+    def abort(self):
+        """Removes every file of the run, including those already published, so a retry starts clean."""
+        for writer in self.writers.values():
+            writer.close()
+            os.remove(writer.where)
+        for path in self.paths:
+            os.remove(path)
+
+
+def _date(value: datetime) -> str:
+    return as_utc(value).strftime('%Y-%m-%d') if value else 'unknown'
+
+
+def write_parquet(chat_docs: Iterator, export_dir: str, file_name: str, row_group_size: int = 50_000,
+                  ordered: bool = True, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Streams `chat_docs` into the partitioned `chats` and `messages` tables; only chats
+    and messages created in (since, until) get a row. Returns (chats, messages, newest
+    created_at of a row, written paths). `ordered` tells that the chats come ordered by
+    created_at, so past days can be closed early.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("The Parquet export needs pyarrow: pip install pyarrow") from e
+
+    writer = _PartitionedWriter(pa, pq, os.path.join(export_dir, 'parquet'), file_name, row_group_size)
+    newest = None
+    try:
+        for chat_doc in chat_docs:
+            chat_data = chat_doc.to_dict()
+            created_at = chat_data.get('created_at')
+            if ordered and created_at is not None:
+                # Later chats (and their messages) are not older than this one
+                writer.finish_before(_date(created_at))
+            user_id = chat_data.get('user_id')
+            messages = chat_data.get('messages', [])
+            message_times = [as_utc(m['created_at']) for m in messages if m.get('created_at')]
+
+            for index, message in enumerate(messages):
+                message_at = message.get('created_at') or created_at
+                if not in_window(message_at, since, until):
+                    continue
+                content = message.get('content') or ''
+                if newest is None or as_utc(message_at) > newest:
+                    newest = as_utc(message_at)
+                writer.add('messages', _date(message_at), {
+                    'chat_id': chat_doc.id,
+                    'user_id': user_id,
+                    'index': index,
+                    'role': message.get('role'),
+                    'content': content,
+                    'content_length': len(content),
+                    'created_at': as_utc(message_at) if message_at else None,
+                })
+            if not in_window(created_at, since, until):
+                continue
+            writer.add('chats', _date(created_at), {
+                'chat_id': chat_doc.id,
+                'user_id': user_id,
+                'created_at': as_utc(created_at) if created_at else None,
+                'message_count': len(messages),
+                'user_message_count': sum(1 for m in messages if m.get('role') == 'user'),
+                'first_message_at': min(message_times, default=None),
+                'last_message_at': max(message_times, default=None),
+            })
+            if created_at is not None and (newest is None or as_utc(created_at) > newest):
+                newest = as_utc(created_at)
+        paths = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    logger.info(f"Wrote {writer.rows['chats']} chats and {writer.rows['messages']} messages to {len(paths)} Parquet files")
+    return writer.rows['chats'], writer.rows['messages'], newest, paths
@@ -1,8 +1,9 @@
 # backend/app/firebase.py
 
 import firebase_admin
-from firebase_admin import credentials, auth, firestore, storage
+from firebase_admin import credentials, auth, firestore, firestore_async, storage
 from app.config import settings
+from app.repository import FirestoreRepository
 import logging
 from fastapi import APIRouter, FastAPI
 from fastapi.responses import JSONResponse
@@ -11,7 +12,8 @@ logger = logging.getLogger(__name__)
 
 def initialize_firebase_app(app: FastAPI):
     """
-    Initialize Firebase Admin SDK and store Firestore and Storage clients in app.state.
+    Initialize Firebase Admin SDK and store the Firestore repository and the Storage
+    and Auth clients in app.state.
     """
     try:
         if not firebase_admin._apps:
@@ -22,9 +24,9 @@ def initialize_firebase_app(app: FastAPI):
                     'storageBucket': settings.FIREBASE_STORAGE_BUCKET,
                 }
             )
-            firestore_client = firestore.client()
+            # The sync client only backs the repository's thread pool
+            app.state.firestore = FirestoreRepository(firestore_async.client(), firestore.client())
             storage_bucket = storage.bucket()
-            app.state.firestore_client = firestore_client
             app.state.storage_bucket = storage_bucket
             app.state.auth_client = auth
             logger.info("Firebase Admin initialized and clients stored in app.state.")
@@ -39,6 +41,10 @@ def close_firebase_app(app: FastAPI):
     Close the Firebase Admin SDK and clean up resources.
     """
     try:
+        repository = getattr(app.state, "firestore", None)
+        if repository is not None:
+            repository.close()
+            app.state.firestore = None
         # Iterate over all initialized apps and delete them
         for app_name in list(firebase_admin._apps):
             firebase_admin.delete_app(firebase_admin.get_app(app_name))
@@ -47,16 +53,6 @@ def close_firebase_app(app: FastAPI):
         logger.exception(f"Failed to close Firebase Admin SDK: {e}")
         raise e
 
-def get_firestore_client(app: FastAPI):
-    """
-    Retrieve Firestore client from app.state.
-    """
-    client = getattr(app.state, "firestore_client", None)
-    if client is None:
-        logger.error("Firestore client is not initialized.")
-        raise RuntimeError("Firestore client is not initialized.")
-    return client
-
 def get_storage_bucket(app: FastAPI):
     """
     Retrieve Storage bucket from app.state.
@@ -0,0 +1,158 @@
+# backend/app/health.py
+"""
+Dependency startup and the liveness and readiness probes.
+
+`start_dependency` runs one dependency's initializer and records how long it took
+and whether it failed. main.lifespan starts independent dependencies concurrently,
+so startup takes as long as the slowest one instead of the sum.
+
+    GET /livez   200 while the process serves requests; nothing external is checked
+    GET /readyz  200 once startup finished and every dependency check passes, else 503;
+                 also 503 while the app drains for shutdown
+
+/readyz runs the registered checks concurrently, each bounded by
+READINESS_CHECK_TIMEOUT, and reuses their results for READINESS_CACHE_SECONDS, so
+frequent probes do not turn into load on Firestore or Weaviate. Both bodies list
+each dependency with its status, check latency and last error.
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.db import get_weaviate_client
+from app.metrics import DEPENDENCY_STARTUP_SECONDS, DEPENDENCY_UP
+from app.repository import get_firestore
+
+logger = logging.getLogger(__name__)
+
+Check = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class DependencyStatus:
+    ready: bool = False
+    latency_ms: Optional[float] = None  # Of the last check, or of startup until the first check
+    error: Optional[str] = None
+
+
+class Health:
+    """Per-dependency status and readiness checks of one application."""
+
+    def __init__(self):
+        self.started = False
+        self.draining = False
+        self.dependencies: Dict[str, DependencyStatus] = {}
+        self._checks: Dict[str, Check] = {}
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def start(self, name: str, initialize: Callable[[], Awaitable[None]], check: Optional[Check] = None):
+        status = self.dependencies[name] = DependencyStatus()
+        started = time.perf_counter()
+        try:
+            await initialize()
+        except Exception as e:
+            status.error = str(e) or type(e).__name__
+            DEPENDENCY_UP.labels(name).set(0)
+            raise
+        finally:
+            status.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+            DEPENDENCY_STARTUP_SECONDS.labels(name).set(status.latency_ms / 1000)
+        status.ready = True
+        DEPENDENCY_UP.labels(name).set(1)
+        if check is not None:
+            self._checks[name] = check
+        logger.info(f"{name} is ready ({status.latency_ms} ms).")
+
+    async def _check(self, name: str, check: Check):
+        status = self.dependencies[name]
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), settings.READINESS_CHECK_TIMEOUT)
+            status.ready, status.error = True, None
+        except Exception as e:
+            if not isinstance(e, asyncio.TimeoutError):
+                error = str(e) or type(e).__name__
+            else:
+                error = f"Check timed out after {settings.READINESS_CHECK_TIMEOUT}s"
+            if status.ready:
+                logger.warning(f"Readiness check of {name} failed: {error}")
+            status.ready, status.error = False, error
+        status.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        DEPENDENCY_UP.labels(name).set(int(status.ready))
+
+    async def check(self) -> bool:
+        """Runs the checks unless their results are fresh; True when the app is ready."""
+        async with self._lock:
+            if time.monotonic() - self._checked_at >= settings.READINESS_CACHE_SECONDS:
+                await asyncio.gather(*[self._check(name, check) for name, check in self._checks.items()])
+                self._checked_at = time.monotonic()
+        return self.started and not self.draining and all(status.ready for status in self.dependencies.values())
+
+    def report(self) -> dict:
+        return {name: asdict(status) for name, status in self.dependencies.items()}
+
+
+def initialize_health(app: FastAPI) -> Health:
+    """
+    Create the dependency registry and store it in the FastAPI application's state.
+    """
+    app.state.health = Health()
+    return app.state.health
+
+
+def get_health(app: FastAPI) -> Health:
+    """
+    Retrieve the dependency registry from the FastAPI application's state.
+    """
+    health = getattr(app.state, "health", None)
+    if health is None:
+        logger.error("Health registry is not initialized.")
+        raise RuntimeError("Health registry is not initialized.")
+    return health
+
+
+async def start_dependency(app: FastAPI, name: str, initialize: Callable[[], Awaitable[None]],
+                           check: Optional[Check] = None):
+    """Initializes a dependency, recording its status; `check` is then run by /readyz."""
+    await get_health(app).start(name, initialize, check)
+
+
+def firestore_check(app: FastAPI) -> Check:
+    return lambda: get_firestore(app).ping()
+
+
+def weaviate_check(app: FastAPI) -> Check:
+    async def check():
+        if not await asyncio.to_thread(get_weaviate_client(app).is_ready):
+            raise RuntimeError("Weaviate is not ready.")
+    return check
+
+
+# Probe endpoints
+router = APIRouter()
+
+
+@router.get("/livez", tags=["Health Check"])
+@router.get("/health", tags=["Health Check"], include_in_schema=False)
+async def livez(request: Request):
+    health = getattr(request.app.state, "health", None)
+    return {"status": "ok", "dependencies": health.report() if health is not None else {}}
+
+
+@router.get("/readyz", tags=["Health Check"])
+async def readyz(request: Request):
+    health = get_health(request.app)
+    ready = await health.check()
+    status = "ready" if ready else "draining" if health.draining else "not ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": status, "dependencies": health.report()},
+    )
@@ -0,0 +1,163 @@
+# backend/app/indexing.py
+"""
+Batched, retrying writes of embedded chunks to Weaviate.
+
+`VectorWriter` buffers objects and sends them through the v4 gRPC batch endpoint
+(`collection.data.insert_many`) in worker threads, with at most `concurrency`
+requests in flight. The batch size adapts to the observed latency: it grows while
+batches finish well under INDEX_TARGET_BATCH_SECONDS and halves when they are slow
+or fail. Objects Weaviate rejects are retried with backoff; whatever still fails is
+reported instead of silently dropped.
+
+Object UUIDs are derived from the upload ID and the chunk's position in the
+document, so a retried or re-run ingestion overwrites its objects instead of
+duplicating them. `committed` is the index below which every chunk is written,
+the point an interrupted ingestion resumes from.
+"""
+
+import asyncio
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+from langchain_core.documents import Document
+from weaviate.classes.data import DataObject
+from weaviate.util import generate_uuid5
+from app.config import settings
+from app.metrics import INDEX_BATCH_LATENCY, INDEX_OBJECTS
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_uuid(upload_id: str, index: int) -> str:
+    """Deterministic UUID of the `index`-th chunk of an upload."""
+    return generate_uuid5(index, upload_id)
+
+
+@dataclass
+class IndexReport:
+    written: int = 0
+    failed: int = 0
+    retried: int = 0  # Object writes that were repeated
+    batches: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)  # UUID -> last error, for objects that failed for good
+
+
+class VectorWriter:
+    """
+    Writes embedded chunks of one upload to a Weaviate collection.
+
+        writer = VectorWriter(collection, upload_id)
+        await writer.add(documents, vectors)   # as often as needed; waits when writes back up
+        report = await writer.close()
+    """
+
+    def __init__(self, collection, upload_id: str, start_index: int = 0, batch_size: Optional[int] = None,
+                 dynamic: bool = True, concurrency: Optional[int] = None, max_retries: Optional[int] = None):
+        self.collection = collection
+        self.upload_id = upload_id
+        self.next_index = start_index
+        self.committed = start_index  # Every chunk before this index is written
+        self.batch_size = batch_size or settings.INDEX_BATCH_SIZE
+        self.dynamic = dynamic
+        self.max_retries = settings.INDEX_MAX_RETRIES if max_retries is None else max_retries
+        self.report = IndexReport()
+        self._pending: List[DataObject] = []
+        self._pending_start = start_index
+        self._finished: Dict[int, int] = {}  # Start -> end index of batches written completely
+        self._slots = asyncio.Semaphore(concurrency or settings.INDEX_CONCURRENCY)
+        self._tasks = set()
+
+    async def add(self, documents: Sequence[Document], vectors: Sequence[Sequence[float]]):
+        """Queues chunks with their vectors and sends every full batch."""
+        for doc, vector in zip(documents, vectors):
+            self._pending.append(DataObject(
+                properties={"content": doc.page_content, **doc.metadata},
+                vector=vector,
+                uuid=chunk_uuid(self.upload_id, self.next_index),
+            ))
+            self.next_index += 1
+        while len(self._pending) >= self.batch_size:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            await self._send(batch)
+
+    async def close(self) -> IndexReport:
+        """Sends what is left, waits for every write and returns the report."""
+        if self._pending:
+            batch, self._pending = self._pending, []
+            await self._send(batch)
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        return self.report
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
+    async def _send(self, batch: List[DataObject]):
+        start, self._pending_start = self._pending_start, self._pending_start + len(batch)
+        # Waiting for a slot here is what pushes back on extraction and embedding
+        await self._slots.acquire()
+        task = asyncio.create_task(self._write(batch, start))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, objects: List[DataObject], start: int):
+        """Writes a batch, retrying rejected objects. Called holding a slot; the slot is released during backoff."""
+        end = start + len(objects)
+        errors: Dict[str, str] = {}
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.report.retried += len(objects)
+                INDEX_OBJECTS.labels("retried").inc(len(objects))
+                await asyncio.sleep(settings.INDEX_RETRY_BACKOFF * 2 ** (attempt - 1))
+                await self._slots.acquire()
+            self.report.batches += 1
+            started = time.perf_counter()
+            try:
+                result = await asyncio.to_thread(self.collection.data.insert_many, objects)
+            except Exception as e:
+                # The whole request failed (timeout, unavailable); every object is retried
+                logger.warning(f"Batch of {len(objects)} objects failed (attempt {attempt + 1}): {e}")
+                errors = {str(obj.uuid): str(e) for obj in objects}
+                self._tune(len(objects), time.perf_counter() - started, failed=True)
+                continue
+            finally:
+                self._slots.release()
+            elapsed = time.perf_counter() - started
+            INDEX_BATCH_LATENCY.observe(elapsed)
+            # Objects rejected one by one (validation, conflicts) say nothing about the batch size
+            self._tune(len(objects), elapsed, failed=False)
+
+            failed = sorted(result.errors) if result.has_errors else []
+            written = len(objects) - len(failed)
+            self.report.written += written
+            INDEX_OBJECTS.labels("written").inc(written)
+            errors = {str(objects[i].uuid): result.errors[i].message for i in failed}
+            objects = [objects[i] for i in failed]
+            if not objects:
+                self._commit(start, end)
+                return
+            logger.debug(f"{len(objects)} objects were rejected (attempt {attempt + 1}), e.g. {next(iter(errors.values()))}")
+
+        logger.warning(f"{len(objects)} objects could not be written after {self.max_retries} retries, "
+                       f"e.g. {next(iter(errors.values()))}")
+        self.report.failed += len(objects)
+        self.report.errors.update(errors)
+        INDEX_OBJECTS.labels("failed").inc(len(objects))
+
+    def _commit(self, start: int, end: int):
+        # Batches finish out of order; `committed` only moves over an unbroken prefix
+        self._finished[start] = end
+        while self.committed in self._finished:
+            self.committed = self._finished.pop(self.committed)
+
+    def _tune(self, size: int, elapsed: float, failed: bool):
+        """Additive increase, multiplicative decrease of the batch size around the target latency."""
+        if not self.dynamic:
+            return
+        target = settings.INDEX_TARGET_BATCH_SECONDS
+        if failed or elapsed > target:
+            self.batch_size = max(settings.INDEX_MIN_BATCH_SIZE, self.batch_size // 2)
+        elif elapsed < target / 2 and size >= self.batch_size:
+            self.batch_size = min(settings.INDEX_MAX_BATCH_SIZE, self.batch_size + settings.INDEX_MIN_BATCH_SIZE)
@@ -0,0 +1,175 @@
+# backend/app/ingestion.py
+"""
+Ingestion status, checkpoints and the chunk spool.
+
+Every `documents/{upload_id}` record carries an `ingestion` map:
+
+    status          pending | running | completed | failed
+    stage           download | extract | index | done
+    chunks_indexed  every chunk before this index is in Weaviate; a retry resumes here
+    chunk_count     number of chunks, once extraction has finished
+    extracted       whether the chunk spool holds every chunk
+    attempts, error, updated_at
+
+Chunks are spooled to `<INGEST_SPOOL_DIR>/<upload_id>.jsonl` as they are extracted. A
+retry reads them back instead of downloading and parsing the file again, and skips the
+chunks that were already indexed instead of embedding them again. The spool lives on
+local disk; a retry on another host extracts again but still skips indexed chunks.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+from firebase_admin import firestore
+from langchain_core.documents import Document
+from app.config import settings
+from app.document_summary import summary_ref, version_bump
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+
+class IngestionConflict(RuntimeError):
+    """The document is being ingested right now, or was ingested completely."""
+
+
+def initial_status() -> dict:
+    """The `ingestion` map of a freshly uploaded document."""
+    return {"status": STATUS_PENDING, "stage": None, "chunks_indexed": 0, "extracted": False, "attempts": 0}
+
+
+def _now() -> datetime:
+    # Set by the client rather than SERVER_TIMESTAMP, so a claim can compare it right away
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value) -> Optional[datetime]:
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value if isinstance(value, datetime) else None
+
+
+@firestore.transactional
+def _claim(transaction, firestore_client, doc_ref) -> Tuple[dict, str]:
+    snapshot = doc_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        raise LookupError(f"Document {doc_ref.id} not found.")
+    data = snapshot.to_dict() or {}
+    ingestion = data.get("ingestion") or initial_status()
+    status = ingestion.get("status")
+    if status == STATUS_COMPLETED:
+        raise IngestionConflict(f"Document {doc_ref.id} is already ingested.")
+    updated_at = _as_utc(ingestion.get("updated_at"))
+    stale_before = _now() - timedelta(seconds=settings.INGEST_STALE_SECONDS)
+    # A running ingestion that stopped reporting progress died with its process
+    if status == STATUS_RUNNING and updated_at is not None and updated_at > stale_before:
+        raise IngestionConflict(f"Document {doc_ref.id} is being ingested.")
+
+    ingestion = {
+        **initial_status(), **ingestion,
+        "status": STATUS_RUNNING, "error": None, "attempts": ingestion.get("attempts", 0) + 1, "updated_at": _now(),
+    }
+    transaction.update(doc_ref, {"ingestion": ingestion})
+    # The status is part of the cached document listing
+    transaction.set(summary_ref(firestore_client, data["user_id"]), version_bump(), merge=True)
+    return ingestion, data["user_id"]
+
+
+def claim(firestore_client, upload_id: str) -> Tuple[dict, str]:
+    """
+    Marks the document's ingestion as running and returns its `ingestion` map, which
+    holds the checkpoint of earlier attempts, and the document's owner. Raises
+    IngestionConflict when another ingestion of the document is still alive or the
+    document is already ingested.
+    """
+    doc_ref = firestore_client.collection("documents").document(upload_id)
+    return _claim(firestore_client.transaction(), firestore_client, doc_ref)
+
+
+class IngestionCheckpoint:
+    """Records the progress of one ingestion attempt in the document's `ingestion` map."""
+
+    def __init__(self, firestore, upload_id: str, state: dict, user_id: str):
+        self.firestore = firestore
+        self.upload_id = upload_id
+        self.state = state
+        self.user_id = user_id
+
+    async def update(self, **fields):
+        fields["updated_at"] = _now()
+        self.state.update(fields)
+        updates = {f"ingestion.{key}": value for key, value in fields.items()}
+        if "status" in fields:
+            # Shown in the document listing, so its ETag has to change with it
+            await self.firestore.update_ingestion_status(self.upload_id, self.user_id, updates)
+        else:
+            await self.firestore.update_document(self.upload_id, updates, operation="ingestion_checkpoint")
+
+    async def committed(self, chunks_indexed: int):
+        """Moves the resume point forward; a no-op when it has not moved."""
+        if chunks_indexed > self.state.get("chunks_indexed", 0):
+            await self.update(chunks_indexed=chunks_indexed)
+
+    async def completed(self, chunk_count: int):
+        await self.update(status=STATUS_COMPLETED, stage="done", chunks_indexed=chunk_count, chunk_count=chunk_count)
+
+    async def failed(self, error: str, chunks_indexed: int):
+        try:
+            await self.update(status=STATUS_FAILED, error=error[:1000],
+                              chunks_indexed=max(chunks_indexed, self.state.get("chunks_indexed", 0)))
+        except Exception as e:
+            logger.error(f"Failed to record the ingestion failure of {self.upload_id}: {e}")
+
+
+def spool_path(upload_id: str) -> str:
+    return os.path.join(settings.INGEST_SPOOL_DIR or os.path.join(settings.UPLOAD_DIR, "spool"), f"{upload_id}.jsonl")
+
+
+def has_spool(upload_id: str) -> bool:
+    return os.path.exists(spool_path(upload_id))
+
+
+class ChunkSpool:
+    """Appends extracted chunks to a temporary file that `finish` publishes as the upload's spool."""
+
+    def __init__(self, upload_id: str):
+        self.path = spool_path(upload_id)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(f"{self.path}.partial", "w", encoding="utf-8")
+
+    def write(self, documents: List[Document]):
+        for doc in documents:
+            self.file.write(json.dumps({"content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False))
+            self.file.write("\n")
+        self.file.flush()
+
+    def finish(self):
+        self.file.close()
+        os.replace(self.file.name, self.path)
+
+    def abort(self):
+        if not self.file.closed:
+            self.file.close()
+            os.remove(self.file.name)
+
+
+def read_spool(upload_id: str, skip: int = 0) -> Iterator[Document]:
+    """Yields the spooled chunks of an upload, starting at chunk `skip`."""
+    with open(spool_path(upload_id), encoding="utf-8") as file:
+        for index, line in enumerate(file):
+            if index >= skip:
+                record = json.loads(line)
+                yield Document(page_content=record["content"], metadata=record["metadata"])
+
+
+def discard_spool(upload_id: str):
+    path = spool_path(upload_id)
+    for candidate in (path, f"{path}.partial"):
+        if os.path.exists(candidate):
+            os.remove(candidate)
@@ -3,101 +3,151 @@
 import os
 import tempfile
 import logging
-from uuid import uuid4
-from urllib.parse import urlparse
+import asyncio
+import itertools
+from typing import AsyncIterator, List, Optional
+from urllib.parse import urlparse, unquote
 from app.config import settings
 from app.db import get_weaviate_client
-from langchain.docstore.document import Document
-from app.utils.splitter import TextSplitter
-from langchain.document_loaders import PyPDFLoader, UnstructuredWordDocumentLoader
-from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain_weaviate.vectorstores import WeaviateVectorStore
-from pdfminer.high_level import extract_text
-import docx
-from urllib.parse import urlparse, unquote
+from app.repository import get_firestore
+from app.ingestion import (
+    ChunkSpool,
+    IngestionCheckpoint,
+    discard_spool,
+    has_spool,
+    read_spool,
+)
+from app.loaders import resolve_loader
+from app.loaders.executor import iter_chunk_batches
+from app.indexing import VectorWriter
+from langchain_core.documents import Document
 from fastapi import FastAPI
-from app.models import DocumentOut  # If needed
+from app.metrics import track_ingest_stage
+from app.clients import get_client_pool
 logger = logging.getLogger(__name__)
 
-async def download_file(url: str) -> bytes:
-    """
-    Downloads a file from a given URL.
-    """
-    import aiohttp
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            if resp.status == 200:
-                return await resp.read()
-            else:
-                raise RuntimeError(f"Failed to download file from {url} (Status: {resp.status})")
-
-async def ingest_and_index(file_url: str, upload_id: str,app: FastAPI):
-    try:
-        # Download the file
-        logger.info(f"Downloading file from {file_url}...")
-        file_content = await download_file(file_url)
-
-        # Parse the URL to get the filename
-        parsed_url = urlparse(file_url)
-        path = parsed_url.path
-        filename = os.path.basename(path)
-        filename = unquote(filename)
-        suffix = os.path.splitext(filename)[1].lower()
-        logger.debug(f"Determined file suffix: {suffix}")
-
-        if suffix not in ['.pdf', '.docx']:
-            raise ValueError("Unsupported file type. Only PDF and DOCX are supported.")
-
-        # Save to a temporary file for processing
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            temp_file.write(file_content)
-            temp_file_path = temp_file.name
-
-        # Load the document
-        logger.info(f"Loading document from {temp_file_path}...")
-        if suffix == ".pdf":
-            text = extract_text(temp_file_path)
-        elif suffix == ".docx":
-            from io import BytesIO
-            doc = docx.Document(temp_file_path)
-            text = "\n".join([para.text for para in doc.paragraphs])
-        else:
-            raise ValueError("Unsupported file type. Only PDF and DOCX are supported.")
-
-        # Remove the temporary file
-        os.remove(temp_file_path)
+HEAD_BYTES = 2048  # Enough to sniff every registered format
 
-        # Split the document into chunks
-        logger.info("Splitting the document into chunks using custom TextSplitter...")
-        text_splitter = TextSplitter(chunk_size=512, chunk_overlap=20)
-        chunks = text_splitter.split(text)
-        logger.info(f"Split the document into {len(chunks)} chunks.")
 
-        # Convert chunks into LangChain Document objects with `upload_id` in metadata
-        documents = [Document(page_content=chunk, metadata={"source": file_url, "upload_id": upload_id}) for chunk in chunks]
+async def download_file(url: str, session, path: str) -> int:
+    """
+    Streams a file from a given URL to `path` using the shared aiohttp session and
+    returns its size, so the download never sits in memory as a whole.
+    """
+    size = 0
+    async with session.get(url) as resp:
+        if resp.status != 200:
+            raise RuntimeError(f"Failed to download file from {url} (Status: {resp.status})")
+        with open(path, "wb") as file:
+            async for block in resp.content.iter_chunked(settings.UPLOAD_CHUNK_BYTES):
+                file.write(block)
+                size += len(block)
+    return size
 
-        # Generate embeddings for the chunks
-        logger.info("Generating embeddings for document chunks...")
-        embeddings = OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY)
 
-        # Connect to Weaviate
-        logger.info("Connecting to Weaviate...")
-        client = get_weaviate_client(app)
+async def _spooled_batches(upload_id: str, skip: int) -> AsyncIterator[List[Document]]:
+    chunks = read_spool(upload_id, skip)
+    while batch := await asyncio.to_thread(lambda: list(itertools.islice(chunks, settings.INGEST_BATCH_SIZE))):
+        yield batch
 
-        # Index the documents into Weaviate
-        logger.info("Indexing document chunks into Weaviate...")
-        vectorstore = WeaviateVectorStore.from_documents(
-            documents,
-            embeddings,
-            client=client,
-            index_name="ChatDocument",
-            text_key="content",
-        )
 
-        logger.info("Document successfully ingested and indexed into Weaviate.")
+async def ingest_and_index(file_url: str, upload_id: str, app: FastAPI, local_path: Optional[str] = None,
+                           content_type: Optional[str] = None):
+    """
+    Extracts, splits, embeds and indexes a document in streaming batches of
+    INGEST_BATCH_SIZE chunks, so memory stays flat regardless of the file size.
+    The loader is resolved from the registry by name, MIME type and magic bytes.
+    `local_path` skips the download when the file is already on disk.
+
+    Progress is checkpointed in the document's `ingestion` map (see app.ingestion):
+    calling this again after a failure resumes after the last chunk that was indexed,
+    from the chunk spool when this host still has it. Raises IngestionConflict when
+    the document is being ingested or is already ingested.
+    """
+    filename = unquote(os.path.basename(urlparse(file_url).path))
+    suffix = os.path.splitext(filename)[1].lower()
+
+    firestore = get_firestore(app)
+    state, user_id = await firestore.claim_ingestion(upload_id)
+    checkpoint = IngestionCheckpoint(firestore, upload_id, state, user_id)
+    resume_from = state.get("chunks_indexed", 0)
+    if resume_from:
+        logger.info(f"Resuming ingestion of {upload_id} after {resume_from} indexed chunks (attempt {state['attempts']}).")
+
+    temp_file_path = None
+    spool = None
+    writer = None
+    try:
+        embeddings = get_client_pool(app).embeddings()
+        writer = VectorWriter(get_weaviate_client(app).collections.get("ChatDocument"), upload_id, start_index=resume_from)
+        if state.get("extracted") and has_spool(upload_id):
+            # Neither downloaded nor parsed again
+            batches = _spooled_batches(upload_id, resume_from)
+            await checkpoint.update(stage="index")
+        else:
+            if local_path is None:
+                # Download the file into a temporary file for processing
+                logger.info(f"Downloading file from {file_url}...")
+                await checkpoint.update(stage="download")
+                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+                    temp_file_path = temp_file.name
+                with track_ingest_stage("download"):
+                    await download_file(file_url, get_client_pool(app).download_session, temp_file_path)
+                local_path = temp_file_path
+
+            with open(local_path, "rb") as file:
+                head = file.read(HEAD_BYTES)
+            loader = resolve_loader(filename, content_type, head)
+            logger.debug(f"Resolved loader '{loader.name}' for {filename}")
+            batches = iter_chunk_batches(app, loader, local_path, file_url, upload_id)
+            spool = ChunkSpool(upload_id)
+            await checkpoint.update(stage="extract", extracted=False)
+
+        logger.info(f"Extracting, embedding and indexing {filename} in batches of {settings.INGEST_BATCH_SIZE}...")
+        extracted = resume_from if spool is None else 0
+        try:
+            while True:
+                with track_ingest_stage("extract"):
+                    batch = await anext(batches, None)
+                if batch is None:
+                    break
+                if spool is not None:
+                    await asyncio.to_thread(spool.write, batch)
+                skip = max(resume_from - extracted, 0)
+                extracted += len(batch)
+                # Chunks indexed by an earlier attempt are not embedded again
+                batch = batch[skip:]
+                if batch:
+                    with track_ingest_stage("embed"):
+                        vectors = await embeddings.aembed_documents([doc.page_content for doc in batch])
+                    # Writes run in the background while the next batch is extracted and embedded
+                    await writer.add(batch, vectors)
+                await checkpoint.committed(writer.committed)
+
+            if spool is not None:
+                await asyncio.to_thread(spool.finish)
+                await checkpoint.update(stage="index", extracted=True, chunk_count=extracted)
+            with track_ingest_stage("index"):
+                report = await writer.close()
+        finally:
+            # Cancels extraction and writes still in flight when ingestion fails
+            writer.cancel()
+            await batches.aclose()
+
+        if report.failed:
+            raise RuntimeError(f"{report.failed} of {extracted} chunks could not be indexed, "
+                               f"e.g. {next(iter(report.errors.values()))}")
+        await checkpoint.completed(extracted)
+        discard_spool(upload_id)
+        logger.info(f"Document successfully ingested and indexed into Weaviate ({extracted} chunks, "
+                    f"{report.batches} batches, {report.retried} retried writes).")
 
     except Exception as e:
         logger.error(f"Failed to ingest and index the document: {e}")
+        await checkpoint.failed(str(e), writer.committed if writer is not None else resume_from)
         raise RuntimeError(f"Failed to ingest and index the document: {e}")
-
-
+    finally:
+        if spool is not None:
+            spool.abort()
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
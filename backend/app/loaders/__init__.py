@@ -0,0 +1,21 @@
+from .base import (
+    CostClass,
+    Loader,
+    TextSegment,
+    UnsupportedFileType,
+    get_loader,
+    register_loader,
+    resolve_loader,
+    supported_extensions,
+)
+from .pdf import PdfLoader
+from .word import DocxLoader
+from .text import TextLoader, MarkdownLoader
+from .markup import HtmlLoader
+
+# Formats with a file signature first, so content sniffing prefers them
+register_loader(PdfLoader())
+register_loader(DocxLoader())
+register_loader(HtmlLoader())
+register_loader(MarkdownLoader())
+register_loader(TextLoader())
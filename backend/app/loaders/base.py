@@ -0,0 +1,115 @@
+# backend/app/loaders/base.py
+
+import os
+import logging
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TextSegment:
+    """A unit of extracted text: one PDF page, one DOCX section or one block of a text file."""
+    text: str
+    page: Optional[int] = None  # 1-based page number (PDF)
+    section: Optional[str] = None  # Heading the text belongs to (DOCX, Markdown, HTML)
+
+
+class CostClass:
+    """How expensive extraction is per byte; decides where the ingestion executor runs a loader."""
+    LIGHT = "light"  # Decoding text; always extracted inline
+    HEAVY = "heavy"  # Layout analysis or XML parsing; large files may go to worker processes
+
+
+class UnsupportedFileType(ValueError):
+    pass
+
+
+class Loader:
+    """
+    Extracts text segments from one file format.
+
+    Subclasses declare the extensions, MIME types and magic bytes they handle, whether
+    they can extract an arbitrary page range on its own (`parallelizable`) and their
+    `cost_class`, and implement `iter_segments`.
+    """
+    name: str = ""
+    extensions: Tuple[str, ...] = ()
+    mime_types: Tuple[str, ...] = ()
+    magic: Tuple[bytes, ...] = ()  # File signatures; formats without one override `sniff`
+    sniff_unclaimed: bool = False  # Also recognized by content when neither name nor MIME type tell
+    parallelizable: bool = False
+    cost_class: str = CostClass.LIGHT
+
+    def sniff(self, head: bytes) -> bool:
+        """Whether the first bytes of a file look like this format."""
+        return any(head.startswith(signature) for signature in self.magic)
+
+    def page_count(self, path: str) -> int:
+        """Number of pages; only needed by parallelizable loaders."""
+        raise NotImplementedError
+
+    def iter_segments(self, path: str, pages: Optional[range] = None) -> Iterator[TextSegment]:
+        """
+        Yields the text of the file one segment at a time. Parallelizable loaders
+        restrict extraction to `pages` (0-based) when given.
+        """
+        raise NotImplementedError
+
+
+_REGISTRY: List[Loader] = []
+
+
+def register_loader(loader: Loader) -> Loader:
+    """Adds a loader to the registry. Loaders registered first win ties."""
+    if any(registered.name == loader.name for registered in _REGISTRY):
+        raise ValueError(f"A loader named '{loader.name}' is already registered.")
+    _REGISTRY.append(loader)
+    return loader
+
+
+def get_loader(name: str) -> Loader:
+    for loader in _REGISTRY:
+        if loader.name == name:
+            return loader
+    raise KeyError(name)
+
+
+def supported_extensions() -> List[str]:
+    return [extension for loader in _REGISTRY for extension in loader.extensions]
+
+
+def resolve_loader(filename: str, content_type: Optional[str] = None, head: Optional[bytes] = None) -> Loader:
+    """
+    Picks the loader for a file from its name, its declared MIME type and, when
+    given, its first bytes. The content has the last word: a file whose bytes do not
+    match the format it claims is resolved by its signature or rejected.
+    """
+    suffix = os.path.splitext(filename or "")[1].lower()
+    mime_type = (content_type or "").split(";")[0].strip().lower()
+    claimed = [loader for loader in _REGISTRY if suffix in loader.extensions or mime_type in loader.mime_types]
+    # The extension is a stronger claim than the MIME type browsers guess from it
+    claimed.sort(key=lambda loader: suffix not in loader.extensions)
+
+    if head is None:
+        if claimed:
+            return claimed[0]
+    else:
+        for loader in claimed:
+            if loader.sniff(head):
+                return loader
+        for loader in _REGISTRY:
+            if loader.magic and loader.sniff(head):
+                logger.info(f"{filename} is declared as {suffix or mime_type or 'unknown'} but looks like {loader.name}.")
+                return loader
+        if not claimed:
+            # No extension or a generic type such as application/octet-stream
+            for loader in _REGISTRY:
+                if loader.sniff_unclaimed and loader.sniff(head):
+                    logger.info(f"{filename} has no recognized type but looks like {loader.name}.")
+                    return loader
+
+    raise UnsupportedFileType(
+        f"Unsupported file type. Supported types are: {', '.join(supported_extensions())}."
+    )
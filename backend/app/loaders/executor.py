@@ -0,0 +1,127 @@
+# backend/app/loaders/executor.py
+
+import os
+import asyncio
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Iterator, List, Optional
+from fastapi import FastAPI
+from langchain_core.documents import Document
+from app.config import settings
+from app.loaders.base import CostClass, Loader, get_loader
+from app.utils.splitter import TextSplitter
+
+logger = logging.getLogger(__name__)
+
+
+def iter_chunks(loader: Loader, path: str, source: str, upload_id: str,
+                pages: Optional[range] = None) -> Iterator[Document]:
+    """
+    Extracts and splits a file lazily: segments are split as they are extracted and
+    chunks are yielded as soon as they are complete, each with the pages it spans.
+    """
+    text_splitter = TextSplitter(chunk_size=settings.INGEST_CHUNK_SIZE, chunk_overlap=settings.INGEST_CHUNK_OVERLAP)
+    segments = loader.iter_segments(path, pages)
+    tagged = ((segment.text, (segment.page, segment.section)) for segment in segments)
+    for chunk, tags in text_splitter.split_stream(tagged):
+        pages_spanned = [page for page, _ in tags if page is not None]
+        sections = [section for _, section in tags if section]
+        metadata = {"source": source, "upload_id": upload_id}
+        if pages_spanned:
+            metadata["page_start"], metadata["page_end"] = min(pages_spanned), max(pages_spanned)
+        if sections:
+            metadata["section"] = sections[0]
+        yield Document(page_content=chunk, metadata=metadata)
+
+
+def _extract_range(loader_name: str, path: str, first_page: int, last_page: int,
+                   source: str, upload_id: str) -> List[Document]:
+    # Runs in a worker process, so it only takes picklable arguments
+    return list(iter_chunks(get_loader(loader_name), path, source, upload_id, range(first_page, last_page)))
+
+
+def plan_page_ranges(loader: Loader, path: str) -> Optional[List[range]]:
+    """
+    Page ranges to extract in worker processes, or None when the file is extracted
+    inline: light formats, loaders that cannot split by page and small files.
+    """
+    if not loader.parallelizable or loader.cost_class != CostClass.HEAVY:
+        return None
+    if os.path.getsize(path) < settings.INGEST_PROCESS_MIN_BYTES:
+        return None
+    pages = loader.page_count(path)
+    step = settings.INGEST_PAGES_PER_TASK
+    if pages <= step:
+        return None
+    return [range(first, min(first + step, pages)) for first in range(0, pages, step)]
+
+
+async def iter_chunk_batches(app: FastAPI, loader: Loader, path: str, source: str,
+                             upload_id: str) -> AsyncIterator[List[Document]]:
+    """
+    Yields the chunks of a file in batches of INGEST_BATCH_SIZE.
+
+    Large files of a parallelizable loader are split into page ranges that worker
+    processes extract concurrently; at most two ranges per worker are in flight, so
+    memory stays bounded. Chunks do not span range boundaries. Everything else is
+    extracted inline, lazily, in a worker thread.
+    """
+    batch_size = settings.INGEST_BATCH_SIZE
+    pool = getattr(app.state, "extraction_pool", None)
+    page_ranges = await asyncio.to_thread(plan_page_ranges, loader, path) if pool is not None else None
+
+    if page_ranges is None:
+        chunks = iter_chunks(loader, path, source, upload_id)
+        while batch := await asyncio.to_thread(lambda: list(itertools.islice(chunks, batch_size))):
+            yield batch
+        return
+
+    workers = settings.INGEST_PROCESS_WORKERS
+    logger.info(f"Extracting {path} in {len(page_ranges)} page ranges across {workers} processes.")
+    loop = asyncio.get_running_loop()
+
+    def submit(pages: range) -> asyncio.Future:
+        return loop.run_in_executor(pool, _extract_range, loader.name, path, pages.start, pages.stop, source, upload_id)
+
+    remaining = iter(page_ranges)
+    in_flight = [submit(pages) for pages in itertools.islice(remaining, 2 * workers)]
+    buffered: List[Document] = []
+    try:
+        while in_flight:
+            # Ranges are consumed in order so chunks keep document order
+            buffered.extend(await in_flight.pop(0))
+            in_flight.extend(submit(pages) for pages in itertools.islice(remaining, 1))
+            while len(buffered) >= batch_size:
+                yield buffered[:batch_size]
+                buffered = buffered[batch_size:]
+        if buffered:
+            yield buffered
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def initialize_extraction_pool(app: FastAPI):
+    """
+    Create the process pool for extracting large documents and store it in the FastAPI
+    application's state. INGEST_PROCESS_WORKERS = 0 extracts everything inline.
+    """
+    if settings.INGEST_PROCESS_WORKERS <= 0:
+        app.state.extraction_pool = None
+        logger.info("Extraction process pool disabled; documents are extracted inline.")
+        return
+    # Forking a process that runs the event loop and gRPC threads is unsafe
+    app.state.extraction_pool = ProcessPoolExecutor(
+        max_workers=settings.INGEST_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+    )
+    logger.info(f"Extraction process pool initialized with {settings.INGEST_PROCESS_WORKERS} workers.")
+
+
+def close_extraction_pool(app: FastAPI):
+    pool = getattr(app.state, "extraction_pool", None)
+    if pool is None:
+        return
+    pool.shutdown(wait=False, cancel_futures=True)
+    logger.info("Extraction process pool closed.")
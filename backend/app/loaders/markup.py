@@ -0,0 +1,83 @@
+# backend/app/loaders/markup.py
+
+import re
+import logging
+from html.parser import HTMLParser
+from typing import Iterator, List, Optional
+from app.loaders.base import CostClass, Loader, TextSegment
+from app.loaders.text import looks_like_text, open_text
+
+logger = logging.getLogger(__name__)
+
+# Tags that hardly occur in anything but HTML, including fragments without <html>
+HTML_TAG = re.compile(rb"<(!doctype\s+html|html|head|body|p|div|br|table|h[1-6]|ul|ol|span)[\s>/]", re.IGNORECASE)
+HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+SKIPPED = {"script", "style", "noscript", "template", "head"}
+BLOCKS = {"p", "div", "li", "tr", "br", "section", "article", "pre", "blockquote", "table", "ul", "ol"} | HEADINGS
+READ_CHARS = 64 * 1024
+
+
+class _SectionParser(HTMLParser):
+    """Collects the visible text of an HTML document as sections that start at each heading."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sections: List[TextSegment] = []  # Completed sections, drained by the loader
+        self.section: Optional[str] = None
+        self.parts: List[str] = []
+        self.heading_parts: Optional[List[str]] = None
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED:
+            self.skip_depth += 1
+        elif tag in HEADINGS:
+            self.flush()
+            self.heading_parts = []
+        if tag in BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+        elif tag in HEADINGS and self.heading_parts is not None:
+            self.section = " ".join("".join(self.heading_parts).split()) or self.section
+            self.heading_parts = None
+        if tag in BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        self.parts.append(data)
+        if self.heading_parts is not None:
+            self.heading_parts.append(data)
+
+    def flush(self):
+        text = "\n".join(line.strip() for line in "".join(self.parts).splitlines() if line.strip())
+        if text:
+            self.sections.append(TextSegment(text + "\n\n", section=self.section))
+        self.parts = []
+
+
+class HtmlLoader(Loader):
+    """Streams an HTML file through the standard library parser, dropping markup, scripts and styles."""
+    name = "html"
+    extensions = (".html", ".htm")
+    mime_types = ("text/html", "application/xhtml+xml")
+    cost_class = CostClass.LIGHT
+    sniff_unclaimed = True
+
+    def sniff(self, head: bytes) -> bool:
+        return looks_like_text(head) and HTML_TAG.search(head) is not None
+
+    def iter_segments(self, path: str, pages: Optional[range] = None) -> Iterator[TextSegment]:
+        parser = _SectionParser()
+        with open_text(path) as file:
+            while block := file.read(READ_CHARS):
+                parser.feed(block)
+                yield from parser.sections
+                parser.sections = []
+        parser.close()
+        parser.flush()
+        yield from parser.sections
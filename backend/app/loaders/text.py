@@ -0,0 +1,89 @@
+# backend/app/loaders/text.py
+
+import codecs
+import logging
+from typing import Iterator, Optional
+from app.loaders.base import CostClass, Loader, TextSegment
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_CHARS = 64 * 1024  # Plain text is cut into segments of about this size
+
+
+SAMPLE_BYTES = 64 * 1024  # Read to choose the encoding
+# Bytes below 0x20 other than tab, line breaks and form feed do not occur in text
+CONTROL_BYTES = bytes(set(range(32)) - {9, 10, 12, 13})
+FALLBACK_ENCODING = "cp1252"  # Latin-1 superset used by most non-UTF-8 German files
+
+
+def text_encoding(data: bytes) -> str:
+    """UTF-8 when `data` decodes as such (it may end in the middle of a character), else cp1252."""
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(data, final=False)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def looks_like_text(head: bytes) -> bool:
+    """No NUL bytes and hardly any other control bytes, in any 8-bit encoding."""
+    if b"\x00" in head:
+        return False
+    return len(head.translate(None, CONTROL_BYTES)) >= 0.95 * len(head)
+
+
+def open_text(path: str):
+    """Opens a text file in the encoding chosen from its first bytes; undecodable bytes are replaced."""
+    with open(path, "rb") as file:
+        encoding = text_encoding(file.read(SAMPLE_BYTES))
+    return open(path, encoding=encoding, errors="replace")
+
+
+class TextLoader(Loader):
+    """Reads plain text line by line and cuts it into segments at paragraph breaks."""
+    name = "text"
+    extensions = (".txt",)
+    mime_types = ("text/plain",)
+    cost_class = CostClass.LIGHT
+    sniff_unclaimed = True
+
+    def sniff(self, head: bytes) -> bool:
+        return looks_like_text(head)
+
+    def heading(self, line: str) -> Optional[str]:
+        """The heading a line starts, if any; plain text has none."""
+        return None
+
+    def iter_segments(self, path: str, pages: Optional[range] = None) -> Iterator[TextSegment]:
+        section, lines, size = None, [], 0
+        with open_text(path) as file:
+            for line in file:
+                heading = self.heading(line)
+                at_break = heading is not None or (size >= SEGMENT_CHARS and not line.strip())
+                if at_break and lines:
+                    yield TextSegment("".join(lines) + "\n\n", section=section)
+                    lines, size = [], 0
+                if heading is not None:
+                    section = heading
+                lines.append(line)
+                size += len(line)
+        if any(line.strip() for line in lines):
+            yield TextSegment("".join(lines) + "\n\n", section=section)
+
+
+class MarkdownLoader(TextLoader):
+    """Plain text that additionally starts a new section at every ATX heading (`# ...`)."""
+    name = "markdown"
+    extensions = (".md", ".markdown")
+    mime_types = ("text/markdown", "text/x-markdown")
+    sniff_unclaimed = False  # Unnamed text is plain text
+
+    def heading(self, line: str) -> Optional[str]:
+        stripped = line.lstrip()
+        if not stripped.startswith("#"):
+            return None
+        title = stripped.lstrip("#")
+        # "#hashtag" is not a heading; "# Title" is
+        if title and not title[0].isspace():
+            return None
+        return title.strip() or None
@@ -0,0 +1,32 @@
+# backend/app/loaders/word.py
+
+import logging
+from typing import Iterator, Optional
+import docx
+from app.loaders.base import CostClass, Loader, TextSegment
+
+logger = logging.getLogger(__name__)
+
+
+class DocxLoader(Loader):
+    """Extracts a Word document one heading section at a time."""
+    name = "docx"
+    extensions = (".docx",)
+    mime_types = ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",)
+    magic = (b"PK\x03\x04",)  # DOCX is a ZIP container
+    parallelizable = False  # python-docx parses the whole document.xml up front
+    cost_class = CostClass.HEAVY
+
+    def iter_segments(self, path: str, pages: Optional[range] = None) -> Iterator[TextSegment]:
+        document = docx.Document(path)
+        heading, lines = None, []
+        for paragraph in document.paragraphs:
+            is_heading = paragraph.style is not None and paragraph.style.name.startswith("Heading")
+            if is_heading and lines:
+                yield TextSegment("\n".join(lines) + "\n\n", section=heading)
+                lines = []
+            if is_heading:
+                heading = paragraph.text.strip() or heading
+            lines.append(paragraph.text)
+        if any(line.strip() for line in lines):
+            yield TextSegment("\n".join(lines) + "\n\n", section=heading)
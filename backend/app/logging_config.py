@@ -0,0 +1,80 @@
+# backend/app/logging_config.py
+
+import atexit
+import itertools
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.config import settings
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+def parse_log_levels(spec: str) -> Dict[str, str]:
+    """
+    Parses per-module levels such as "app.assistants=DEBUG,weaviate=WARNING".
+    """
+    levels = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """
+    Routes all log records through a QueueHandler so the event loop only enqueues them;
+    formatting and writing to stdout happen on the QueueListener's thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for name, level in parse_log_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class Sampler:
+    """
+    Deterministic 1-in-N sampler for log statements on hot paths.
+    A rate of 1.0 keeps everything, 0.0 drops everything.
+    """
+
+    def __init__(self, rate: float):
+        self.every = round(1 / rate) if rate > 0 else 0
+        self._counter = itertools.count()
+
+    def __call__(self) -> bool:
+        if self.every == 0:
+            return False
+        return next(self._counter) % self.every == 0
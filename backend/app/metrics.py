@@ -0,0 +1,141 @@
+# backend/app/metrics.py
+
+import time
+import logging
+from contextlib import contextmanager
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+logger = logging.getLogger(__name__)
+
+# Buckets in seconds, from fast Firestore reads up to long LLM answers
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+AUTH_LATENCY = Histogram(
+    "neltingai_auth_seconds", "Time to authenticate a request (token check and user lookup)",
+    buckets=LATENCY_BUCKETS,
+)
+FIRESTORE_LATENCY = Histogram(
+    "neltingai_firestore_seconds", "Firestore call latency", ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+FIRESTORE_TIMEOUTS = Counter(
+    "neltingai_firestore_timeouts_total", "Firestore calls that exceeded FIRESTORE_TIMEOUT", ["operation"],
+)
+FIRESTORE_POOL_QUEUE = Gauge(
+    "neltingai_firestore_pool_queue", "Sync Firestore calls waiting for a thread of the Firestore pool",
+)
+CHAT_JOURNAL_REPLAYED = Counter(
+    "neltingai_chat_journal_replayed_total", "Chat turns written from the turn journal at startup",
+)
+EMBEDDING_LATENCY = Histogram(
+    "neltingai_embedding_seconds", "Query embedding latency",
+    buckets=LATENCY_BUCKETS,
+)
+VECTOR_SEARCH_LATENCY = Histogram(
+    "neltingai_vector_search_seconds", "Vector store search latency",
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "neltingai_chat_stage_seconds", "Latency of each chat turn pipeline stage", ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "neltingai_llm_time_to_first_token_seconds", "Time from starting generation to the first streamed token",
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "neltingai_llm_tokens_per_second", "Streaming rate of generated tokens after the first token",
+    buckets=(1, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300),
+)
+TURN_LATENCY = Histogram(
+    "neltingai_chat_turn_seconds", "Total chat turn time", ["outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+ROUTE_DECISIONS = Counter(
+    "neltingai_route_decisions_total", "Chat turns per route and the rule that decided it", ["route", "reason"],
+)
+ROUTE_TURN_LATENCY = Histogram(
+    "neltingai_route_turn_seconds", "Total chat turn time per route", ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+ROUTE_TIME_TO_FIRST_TOKEN = Histogram(
+    "neltingai_route_time_to_first_token_seconds", "Time from receiving a turn to its first streamed token, per route",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+INGEST_STAGE_TOTAL = Counter(
+    "neltingai_ingest_stage_total", "Ingestion stages run", ["stage", "outcome"],
+)
+INGEST_STAGE_LATENCY = Histogram(
+    "neltingai_ingest_stage_seconds", "Ingestion stage latency", ["stage"],
+    buckets=LATENCY_BUCKETS + (300.0, 600.0),
+)
+INDEX_OBJECTS = Counter(
+    "neltingai_index_objects_total", "Chunk objects written to the vector store", ["outcome"],
+)
+INDEX_BATCH_LATENCY = Histogram(
+    "neltingai_index_batch_seconds", "Latency of one vector store batch write",
+    buckets=LATENCY_BUCKETS,
+)
+ACTIVE_STREAMS = Gauge(
+    "neltingai_active_streams", "Chat turns currently streaming LLM output",
+)
+TURNS_CANCELLED = Counter(
+    "neltingai_turns_cancelled_total", "Chat turns cancelled before they finished", ["reason"],
+)
+ASSISTANT_REGISTRY_SIZE = Gauge(
+    "neltingai_assistant_registry_size", "RAGAssistant instances held in the registry",
+)
+ASSISTANT_REGISTRY_RUNNING = Gauge(
+    "neltingai_assistant_registry_running", "Registered RAGAssistant instances whose turn is running",
+)
+ASSISTANT_REGISTRY_EVICTED = Counter(
+    "neltingai_assistant_registry_evicted_total", "Finished turns dropped before their stream was read", ["reason"],
+)
+ASSISTANT_BUFFERED_BYTES = Gauge(
+    "neltingai_assistant_buffered_bytes", "Bytes of answers held in SSE queues that no client has read yet",
+)
+DEPENDENCY_UP = Gauge(
+    "neltingai_dependency_up", "Whether a dependency passed its last readiness check", ["dependency"],
+)
+DEPENDENCY_STARTUP_SECONDS = Gauge(
+    "neltingai_dependency_startup_seconds", "Time it took to initialize a dependency at startup", ["dependency"],
+)
+ADMISSION_ACTIVE_TURNS = Gauge(
+    "neltingai_admission_active_turns", "Chat turns holding an admission slot",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "neltingai_admission_queue_depth", "Chat turns waiting for an admission slot",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "neltingai_admission_wait_seconds", "Time a chat turn waited for an admission slot",
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+ADMISSION_REJECTED = Counter(
+    "neltingai_admission_rejected_total", "Chat turns rejected by admission control", ["reason"],
+)
+
+
+@contextmanager
+def track_ingest_stage(stage: str):
+    """Times an ingestion stage and counts it as ok/error."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        INGEST_STAGE_TOTAL.labels(stage, "error").inc()
+        raise
+    else:
+        INGEST_STAGE_TOTAL.labels(stage, "ok").inc()
+    finally:
+        INGEST_STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+
+# Prometheus scrape endpoint
+router = APIRouter()
+
+@router.get("/metrics", tags=["Monitoring"], include_in_schema=False)
+def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,57 @@
+# backend/app/middleware.py
+
+import logging
+import time
+
+from app.config import settings
+from app.logging_config import Sampler
+
+logger = logging.getLogger("app.access")
+
+
+class RequestLoggingMiddleware:
+    """
+    Pure ASGI access-log middleware.
+
+    Unlike BaseHTTPMiddleware it does not wrap the response in a new stream, so
+    streaming (SSE) responses pass through untouched. Successful requests are
+    sampled at LOG_ACCESS_SAMPLE_RATE; client/server errors and slow requests are
+    always logged. Headers (including Authorization) are never logged.
+    """
+
+    def __init__(self, app, sample_rate: float = settings.LOG_ACCESS_SAMPLE_RATE,
+                 slow_request_seconds: float = settings.LOG_SLOW_REQUEST_SECONDS):
+        self.app = app
+        self.sample = Sampler(sample_rate)
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        first_byte = None
+
+        async def send_wrapper(message):
+            nonlocal status_code, first_byte
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                first_byte = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            if first_byte is None:
+                first_byte = duration
+            # Streaming responses stay open for long; judge slowness by time to first byte
+            if status_code >= 400 or first_byte >= self.slow_request_seconds or self.sample():
+                level = logging.WARNING if status_code >= 500 else logging.INFO
+                logger.log(
+                    level,
+                    "%s %s %d %.1fms (first byte %.1fms)",
+                    scope["method"], scope["path"], status_code, duration * 1000, first_byte * 1000,
+                )
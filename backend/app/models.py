@@ -1,7 +1,7 @@
 # backend/app/models.py
 from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 
 class User(BaseModel):
     uid: str
@@ -29,6 +29,19 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     message: str
 
+class ChatSummaryOut(BaseModel):
+    chat_id: str
+    created_at: datetime
+    last_activity: Optional[datetime] = None
+    message_count: Optional[int] = None  # Unknown for chats that predate the counter
+
+class ChatMessageOut(BaseModel):
+    id: Optional[str] = None  # None for messages only stored in the legacy embedded array
+    role: str
+    content: str
+    created_at: datetime
+    truncated: bool = False  # The turn was cancelled while the answer was streaming
+
 class AdminAssignRole(BaseModel):
     uid: str
     role: str  # Expected to be "admin" or other roles
@@ -43,6 +56,24 @@ class DocumentOut(BaseModel):
     upload_id: str
     uploaded_at: datetime
     user_id: str
+    ingestion_status: Optional[str] = None  # pending, running, completed or failed; None for older uploads
     
     class Config:
         orm_mode = True
+
+class DocumentSummaryOut(BaseModel):
+    document_count: int = 0
+    total_bytes: int = 0
+    last_upload_at: Optional[datetime] = None
+    source_counts: Dict[str, int] = {}
+
+class BatchDeleteRequest(BaseModel):
+    ids: List[str]
+
+class BatchDeleteItemResult(BaseModel):
+    id: str
+    status: str  # "deleted", "not_found", "forbidden" or "error"
+    detail: Optional[str] = None
+
+class BatchDeleteResponse(BaseModel):
+    results: List[BatchDeleteItemResult]
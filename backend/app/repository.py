@@ -0,0 +1,251 @@
+# backend/app/repository.py
+"""
+Firestore access for routers, the assistant and ingestion.
+
+`FirestoreRepository` is the only way request-path code reaches Firestore:
+
+- Reads and writes go through Firestore's native AsyncClient and wait on the event
+  loop instead of occupying a thread.
+- Transactions still written against the sync client (summary folding and rebuild, ingestion
+  claim) run on the repository's own thread pool of FIRESTORE_THREAD_POOL_SIZE
+  threads instead of the loop's default executor, which file and Weaviate work share.
+- Every call is bounded by FIRESTORE_TIMEOUT and timed in `neltingai_firestore_seconds`
+  under its operation name; timeouts are also counted per operation.
+
+The sync client is not on `app.state`; it is only passed to functions running on the
+pool, so a blocking Firestore call cannot end up on the event loop.
+
+The chat and document listings need the composite indexes in
+`firestore.indexes.json`; deploy them before the code that queries them with
+
+    firebase deploy --only firestore:indexes
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from fastapi import FastAPI
+from google.cloud.firestore import ArrayUnion, Increment, Query
+
+from app.config import settings
+from app.document_summary import (
+    create_document,
+    delete_documents,
+    rebuild,
+    summary_ref,
+    version_bump,
+)
+from app.ingestion import claim
+from app.metrics import FIRESTORE_LATENCY, FIRESTORE_POOL_QUEUE, FIRESTORE_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class FirestoreRepository:
+    def __init__(self, client, sync_client, pool_size: Optional[int] = None, timeout: Optional[float] = None):
+        self.client = client
+        self._sync_client = sync_client
+        self.timeout = timeout or settings.FIRESTORE_TIMEOUT
+        self._pool = ThreadPoolExecutor(
+            max_workers=pool_size or settings.FIRESTORE_THREAD_POOL_SIZE, thread_name_prefix="firestore",
+        )
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self.client.close()
+
+    async def _call(self, operation: str, awaitable: Awaitable[T]) -> T:
+        with FIRESTORE_LATENCY.labels(operation).time():
+            try:
+                return await asyncio.wait_for(awaitable, self.timeout)
+            except asyncio.TimeoutError:
+                FIRESTORE_TIMEOUTS.labels(operation).inc()
+                raise TimeoutError(f"Firestore {operation} timed out after {self.timeout}s") from None
+
+    async def run_sync(self, operation: str, fn: Callable[..., T], *args) -> T:
+        """
+        Runs `fn(sync_client, *args)` on the repository's pool. A timeout stops the wait,
+        not the thread; the call finishes in the background.
+        """
+        def run():
+            FIRESTORE_POOL_QUEUE.dec()
+            return fn(self._sync_client, *args)
+
+        FIRESTORE_POOL_QUEUE.inc()
+        future = asyncio.get_running_loop().run_in_executor(self._pool, run)
+        return await self._call(operation, future)
+
+    @staticmethod
+    async def _collect(query) -> list:
+        return [snapshot async for snapshot in query.stream()]
+
+    async def _collect_all(self, refs) -> list:
+        return [snapshot async for snapshot in self.client.get_all(refs)]
+
+    @staticmethod
+    def _data(snapshot) -> Optional[dict]:
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def ping(self):
+        """One cheap read; used by the readiness probe."""
+        await self._call("ping", self.client.collection("_health").document("ping").get())
+
+    # Users
+
+    def _user(self, uid: str):
+        return self.client.collection("user").document(uid)
+
+    async def get_user(self, uid: str) -> Optional[dict]:
+        return self._data(await self._call("get_user", self._user(uid).get()))
+
+    async def create_user(self, uid: str, data: dict):
+        await self._call("create_user", self._user(uid).set(data))
+
+    async def update_user(self, uid: str, fields: dict):
+        await self._call("update_user", self._user(uid).update(fields))
+
+    # Chats
+
+    def _chat(self, chat_id: str):
+        return self.client.collection("chats").document(chat_id)
+
+    async def get_chat(self, chat_id: str, field_paths: Optional[List[str]] = None) -> Optional[dict]:
+        return self._data(await self._call("get_chat", self._chat(chat_id).get(field_paths=field_paths)))
+
+    async def create_chat(self, chat_id: str, data: dict):
+        await self._call("create_chat", self._chat(chat_id).set(data))
+
+    async def update_chat(self, chat_id: str, fields: dict):
+        await self._call("update_chat", self._chat(chat_id).update(fields))
+
+    async def list_chats(self, uid: str, limit: int, field_paths: List[str], cursor: Optional[dict] = None) -> list:
+        """Snapshots of the user's chats, newest first, starting after `cursor`."""
+        query = (
+            self.client.collection("chats")
+            .where("user_id", "==", uid)
+            .order_by("created_at", direction=Query.DESCENDING)
+            .order_by("__name__", direction=Query.DESCENDING)
+            .select(field_paths)
+        )
+        if cursor:
+            query = query.start_after(cursor)
+        return await self._call("list_chats", self._collect(query.limit(limit)))
+
+    async def list_messages(self, chat_id: str, limit: int, before: Optional[datetime] = None) -> list:
+        """Snapshots of the chat's subcollection messages created before `before`, newest first."""
+        query = self._chat(chat_id).collection("messages").order_by("created_at", direction=Query.DESCENDING)
+        if before is not None:
+            query = query.where("created_at", "<", before)
+        return await self._call("list_messages", self._collect(query.limit(limit)))
+
+    async def commit_turn(self, chat_id: str, turn_id: str, messages: List[dict]):
+        """
+        Writes the messages of a chat turn in one atomic batch: to the chat's embedded
+        array, which feeds conversation memory, to its subcollection, which serves
+        paginated reads, and the chat list fields. Subcollection IDs derive from
+        `turn_id`, so `turn_committed` can tell whether the batch was written.
+        """
+        chat_ref = self._chat(chat_id)
+        batch = self.client.batch()
+        for index, message in enumerate(messages):
+            batch.set(chat_ref.collection("messages").document(f"{turn_id}-{index}"), message)
+        batch.update(chat_ref, {
+            "messages": ArrayUnion(messages),
+            "message_count": Increment(len(messages)),
+            "last_activity": messages[-1]["created_at"],
+        })
+        await self._call("commit_turn", batch.commit())
+
+    async def turn_committed(self, chat_id: str, turn_id: str) -> bool:
+        snapshot = await self._call(
+            "get_message", self._chat(chat_id).collection("messages").document(f"{turn_id}-0").get(),
+        )
+        return snapshot.exists
+
+    # Documents
+
+    def _document(self, document_id: str):
+        return self.client.collection("documents").document(document_id)
+
+    async def get_document(self, document_id: str) -> Optional[dict]:
+        return self._data(await self._call("get_document", self._document(document_id).get()))
+
+    async def get_documents(self, document_ids: List[str]) -> list:
+        """Snapshots of the documents, read in one batched call."""
+        refs = [self._document(document_id) for document_id in document_ids]
+        return await self._call("get_all_documents", self._collect_all(refs))
+
+    async def list_documents(self, uid: str, limit: int, field_paths: List[str], cursor: Optional[dict] = None) -> list:
+        """Snapshots of the user's documents, newest first, starting after `cursor`."""
+        query = (
+            self.client.collection("documents")
+            .where("user_id", "==", uid)
+            .order_by("uploaded_at", direction=Query.DESCENDING)
+            .order_by("__name__", direction=Query.DESCENDING)
+            .select(field_paths)
+        )
+        if cursor:
+            query = query.start_after(cursor)
+        return await self._call("list_documents", self._collect(query.limit(limit)))
+
+    async def update_document(self, document_id: str, fields: dict, operation: str = "update_document"):
+        await self._call(operation, self._document(document_id).update(fields))
+
+    async def update_ingestion_status(self, document_id: str, uid: str, fields: dict):
+        """Updates the document and bumps its owner's listing version in one batch."""
+        batch = self.client.batch()
+        batch.update(self._document(document_id), fields)
+        batch.set(summary_ref(self.client, uid), version_bump(), merge=True)
+        await self._call("update_ingestion_status", batch.commit())
+
+    async def create_document(self, document_id: str, data: dict):
+        """Creates the document and adds it to its owner's summary in one transaction."""
+        await self.run_sync(
+            "create_document",
+            lambda client: create_document(client, client.collection("documents").document(document_id), data),
+        )
+
+    async def delete_documents(self, uid: str, document_ids: List[str]) -> List[str]:
+        """Deletes the user's documents and removes them from the summary in one transaction."""
+        return await self.run_sync(
+            "delete_documents",
+            lambda client: delete_documents(
+                client, uid, [client.collection("documents").document(document_id) for document_id in document_ids],
+            ),
+        )
+
+    async def get_document_version(self, uid: str) -> int:
+        """
+        Version of the user's document collection. Every upload, delete and ingestion
+        status change bumps it, so it identifies the state of the listing without
+        reading the documents.
+        """
+        snapshot = await self._call("get_document_version", summary_ref(self.client, uid).get(field_paths=["version"]))
+        return (self._data(snapshot) or {}).get("version", 0)
+
+    async def get_document_summary(self, uid: str) -> dict:
+        """The user's summary, built once on the pool when it was never materialized."""
+        summary = self._data(await self._call("get_document_summary", summary_ref(self.client, uid).get()))
+        if not summary or "document_count" not in summary:
+            logger.info(f"No materialized document summary for user {uid}, building it.")
+            summary = await self.run_sync("rebuild_document_summary", rebuild, uid)
+        return summary
+
+    async def claim_ingestion(self, upload_id: str) -> Tuple[dict, str]:
+        return await self.run_sync("claim_ingestion", claim, upload_id)
+
+
+def get_firestore(app: FastAPI) -> FirestoreRepository:
+    """
+    Retrieve the Firestore repository from app.state.
+    """
+    repository = getattr(app.state, "firestore", None)
+    if repository is None:
+        logger.error("Firestore repository is not initialized.")
+        raise RuntimeError("Firestore repository is not initialized.")
+    return repository
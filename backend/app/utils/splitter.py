@@ -43,40 +43,60 @@ class TextSplitter:
                 splits.extend(self._split_recursive(s, level + 1))
         return splits
 
-    def _merge_splits(self, splits):
-        chunks = []
+    def _merge_splits(self, tagged_splits):
+        """
+        Merges (split, tag) pairs into chunks of at most `chunk_size` tokens and yields
+        (chunk, tags), where tags lists the distinct tags of the chunk's splits in order.
+        Works on any iterable, so only the current chunk is held in memory.
+        """
         current_chunk = ''
         current_splits = []
 
-        for split in splits:
+        def distinct_tags(splits):
+            tags = []
+            for _, tag in splits:
+                if tag not in tags:
+                    tags.append(tag)
+            return tags
+
+        for split, tag in tagged_splits:
             if current_chunk and (token_size(current_chunk + split) > self.chunk_size):
                 trimmed_chunk = current_chunk.strip()
                 if trimmed_chunk:
-                    chunks.append(trimmed_chunk)
+                    yield trimmed_chunk, distinct_tags(current_splits)
                 # Add overlap to next chunk
                 last_splits = current_splits
                 current_splits = []
                 current_chunk = ''
-                for s in reversed(last_splits):
+                for s, s_tag in reversed(last_splits):
                     if (token_size(s + current_chunk) > self.chunk_overlap or
                         token_size(s + current_chunk + split) > self.chunk_size
                     ):
                         break
                     current_chunk = s + current_chunk
-                    current_splits.insert(0, s)
+                    current_splits.insert(0, (s, s_tag))
 
             current_chunk += split
-            current_splits.append(split)
+            current_splits.append((split, tag))
         
         trimmed_chunk = current_chunk.strip()
         if trimmed_chunk:
-            chunks.append(trimmed_chunk)
-        return chunks
+            yield trimmed_chunk, distinct_tags(current_splits)
 
     def split(self, text):
         splits = self._split_recursive(text)
-        chunks = self._merge_splits(splits)
+        chunks = [chunk for chunk, _ in self._merge_splits((s, None) for s in splits)]
         return chunks
 
+    def split_stream(self, segments):
+        """
+        Splits a stream of (text, tag) segments, e.g. one per PDF page, into chunks that
+        may span segment boundaries. Yields (chunk, tags) lazily.
+        """
+        tagged_splits = (
+            (split, tag) for text, tag in segments for split in self._split_recursive(text)
+        )
+        return self._merge_splits(tagged_splits)
+
     def __call__(self, text):
         return self.split(text)
\ No newline at end of file
@@ -2,25 +2,34 @@
 import asyncio
 from sse_starlette import ServerSentEvent
 import logging
+from app.config import settings
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+
 class SSEStream:
     def __init__(self) -> None:
         self._queue = asyncio.Queue()
         self._stream_end = object()
+        self.finished = False  # Set once the consumer has read the end of the stream
+        self.buffered_bytes = 0  # Size of the data sent but not read yet
 
     def __aiter__(self):
         return self
 
     async def __anext__(self):
         data = await self._queue.get()
-        logger.info(f"Stream: {repr(data)}")
+        if isinstance(data, str):
+            self.buffered_bytes -= len(data.encode('utf-8'))
+        if settings.LOG_TOKENS:
+            logger.debug(f"Stream: {repr(data)}")
         if data is self._stream_end:
+            self.finished = True
             raise StopAsyncIteration
         return ServerSentEvent(data=data)
 
     async def send(self, data):
+        if isinstance(data, str):
+            self.buffered_bytes += len(data.encode('utf-8'))
         await self._queue.put(data)
 
     async def close(self):
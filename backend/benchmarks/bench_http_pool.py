@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_http_pool.py
+"""
+Compares a fresh HTTP client per call (what build_chain and download_file used to do)
+with the shared pooled client from app.clients.
+
+    python -m benchmarks.bench_http_pool [--requests 400] [--concurrency 20] [--handshake-ms 40]
+
+A local keep-alive HTTP server counts accepted connections and delays every new
+connection by --handshake-ms to stand in for the TCP+TLS handshake to api.openai.com.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+class CountingServer:
+    def __init__(self, handshake_delay: float, response_delay: float):
+        self.handshake_delay = handshake_delay
+        self.response_delay = response_delay
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_delay)
+        try:
+            while True:
+                headers = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in headers.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(self.response_delay)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 11\r\n\r\n{\"ok\":true}")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def run(url: str, n_requests: int, concurrency: int, shared: bool):
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+    pool = httpx.AsyncClient(limits=limits) if shared else None
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            if shared:
+                await pool.post(url, json={"input": "hallo"})
+            else:
+                async with httpx.AsyncClient() as client:
+                    await client.post(url, json={"input": "hallo"})
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(n_requests)])
+    elapsed = time.perf_counter() - started
+    if pool is not None:
+        await pool.aclose()
+    return latencies, elapsed
+
+
+async def main_async(args):
+    results = {}
+    for label, shared in (("per-call client", False), ("shared pool", True)):
+        server = CountingServer(args.handshake_ms / 1000, args.response_ms / 1000)
+        tcp_server = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        latencies, elapsed = await run(f"http://127.0.0.1:{port}/v1/embeddings", args.requests, args.concurrency, shared)
+        tcp_server.close()
+        results[label] = (server.connections, latencies, elapsed)
+
+    print(f"{'':18}{'connections':>12}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for label, (connections, latencies, elapsed) in results.items():
+        print(
+            f"{label:18}{connections:>12}{len(latencies) / elapsed:>9.0f}"
+            f"{statistics.median(latencies) * 1000:>9.1f}"
+            f"{percentile(latencies, 95) * 1000:>9.1f}{percentile(latencies, 99) * 1000:>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--handshake-ms", type=float, default=40.0, help="Simulated TCP+TLS setup per connection")
+    parser.add_argument("--response-ms", type=float, default=5.0, help="Server time per response")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# backend/benchmarks/bench_sse_logging.py
+"""
+Measures SSE token throughput under the old and the new logging setup.
+
+    python -m benchmarks.bench_sse_logging [--tokens 50000]
+
+"before": root logger at DEBUG with a synchronous StreamHandler and every token
+logged at INFO by both the producer and SSEStream.__anext__.
+"after": QueueHandler/QueueListener pipeline with token logging disabled.
+Output goes to /dev/null so the numbers reflect logging overhead, not the terminal.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from app.config import settings
+from app.logging_config import LOG_FORMAT, configure_logging, shutdown_logging
+from app.utils.sse_stream import SSEStream
+
+logger = logging.getLogger("app.assistants.assistant")
+
+
+async def stream_tokens(n_tokens: int, log_tokens: bool) -> float:
+    stream = SSEStream()
+
+    async def produce():
+        for i in range(n_tokens):
+            if log_tokens:
+                logger.info(repr(f"token{i} "))
+            await stream.send(f"token{i} ")
+        await stream.close()
+
+    async def consume():
+        async for _ in stream:
+            pass
+
+    started = time.perf_counter()
+    await asyncio.gather(produce(), consume())
+    return n_tokens / (time.perf_counter() - started)
+
+
+def run_before(n_tokens: int) -> float:
+    devnull = open(os.devnull, "w")
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.DEBUG)
+    settings.LOG_TOKENS = True
+    # SSEStream used to log each token at INFO; emulate that level here
+    logging.getLogger("app.utils.sse_stream").setLevel(logging.DEBUG)
+    try:
+        return asyncio.run(stream_tokens(n_tokens, log_tokens=True))
+    finally:
+        root.handlers = []
+        devnull.close()
+
+
+def run_after(n_tokens: int) -> float:
+    settings.LOG_TOKENS = False
+    configure_logging()
+    try:
+        return asyncio.run(stream_tokens(n_tokens, log_tokens=False))
+    finally:
+        shutdown_logging()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=50000)
+    args = parser.parse_args()
+
+    before = run_before(args.tokens)
+    after = run_after(args.tokens)
+    print(f"before: {before:,.0f} tokens/s")
+    print(f"after:  {after:,.0f} tokens/s ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
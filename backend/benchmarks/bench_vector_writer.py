@@ -0,0 +1,148 @@
+# backend/benchmarks/bench_vector_writer.py
+"""
+Objects/second of vector store writes: one insert_many call per ingestion batch,
+awaited in turn (what ingest_and_index did before), against app.indexing.VectorWriter
+with a fixed and with a dynamic batch size.
+
+    python -m benchmarks.bench_vector_writer [--objects 5000] [--concurrency 4] [--failure-rate 0.01]
+    python -m benchmarks.bench_vector_writer --weaviate localhost:8080:50051
+
+By default the collection is a fake whose insert_many costs --rtt-ms per request plus
+--object-us per object and rejects --failure-rate of the objects. With --weaviate the
+objects go to a scratch collection on a local Weaviate, which is deleted afterwards.
+Every run writes the same UUIDs twice to check that re-runs do not duplicate objects.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from langchain_core.documents import Document
+from weaviate.collections.classes.batch import BatchObjectReturn, ErrorObject
+
+from app.indexing import VectorWriter, chunk_uuid
+
+DIMENSIONS = 256
+SCRATCH_COLLECTION = "BenchVectorWriter"
+
+
+class FakeData:
+    def __init__(self, rtt: float, per_object: float, failure_rate: float):
+        self.rtt = rtt
+        self.per_object = per_object
+        self.failure_rate = failure_rate
+        self.objects = {}
+        self.requests = 0
+
+    def insert_many(self, objects) -> BatchObjectReturn:
+        self.requests += 1
+        time.sleep(self.rtt + self.per_object * len(objects))
+        errors, uuids = {}, {}
+        for i, obj in enumerate(objects):
+            if random.random() < self.failure_rate:
+                errors[i] = ErrorObject(message="simulated rejection", object_=None, original_uuid=obj.uuid)
+            else:
+                self.objects[str(obj.uuid)] = obj
+                uuids[i] = uuid.UUID(str(obj.uuid))
+        return BatchObjectReturn(errors=errors, uuids=uuids, has_errors=bool(errors))
+
+
+class FakeCollection:
+    def __init__(self, data: FakeData):
+        self.data = data
+
+    def count(self) -> int:
+        return len(self.data.objects)
+
+
+class WeaviateCollection:
+    def __init__(self, client):
+        from weaviate.classes.config import Configure
+        if client.collections.exists(SCRATCH_COLLECTION):
+            client.collections.delete(SCRATCH_COLLECTION)
+        self.client = client
+        self.collection = client.collections.create(SCRATCH_COLLECTION, vectorizer_config=Configure.Vectorizer.none())
+        self.data = self.collection.data
+
+    def count(self) -> int:
+        return self.collection.aggregate.over_all(total_count=True).total_count
+
+
+def make_chunks(n: int):
+    rng = random.Random(0)
+    documents = [Document(page_content=f"Abschnitt {i} über Schlaf und Ernährung.", metadata={"upload_id": "bench"})
+                 for i in range(n)]
+    vectors = [[rng.random() for _ in range(DIMENSIONS)] for _ in range(n)]
+    return documents, vectors
+
+
+async def sequential(collection, documents, vectors, batch_size: int):
+    """One awaited insert_many per batch, no retries."""
+    from weaviate.classes.data import DataObject
+    failed = 0
+    for start in range(0, len(documents), batch_size):
+        objects = [
+            DataObject(properties={"content": doc.page_content, **doc.metadata}, vector=vector,
+                       uuid=chunk_uuid("bench", start + i))
+            for i, (doc, vector) in enumerate(zip(documents[start:start + batch_size], vectors[start:start + batch_size]))
+        ]
+        result = await asyncio.to_thread(collection.data.insert_many, objects)
+        failed += len(result.errors)
+    return failed, 0
+
+
+async def writer(collection, documents, vectors, batch_size: int, dynamic: bool, concurrency: int):
+    vector_writer = VectorWriter(collection, "bench", batch_size=batch_size, dynamic=dynamic, concurrency=concurrency)
+    # Chunks arrive in ingestion-sized batches, as in ingest_and_index
+    for start in range(0, len(documents), 64):
+        await vector_writer.add(documents[start:start + 64], vectors[start:start + 64])
+    report = await vector_writer.close()
+    return report.failed, report.retried
+
+
+async def main_async(args):
+    documents, vectors = make_chunks(args.objects)
+    client = None
+    if args.weaviate:
+        import weaviate
+        host, port, grpc_port = args.weaviate.split(":")
+        client = weaviate.connect_to_local(host=host, port=int(port), grpc_port=int(grpc_port))
+
+    runs = [
+        ("sequential, 64", lambda c: sequential(c, documents, vectors, 64)),
+        ("writer, fixed 100", lambda c: writer(c, documents, vectors, 100, False, args.concurrency)),
+        ("writer, dynamic", lambda c: writer(c, documents, vectors, 100, True, args.concurrency)),
+    ]
+    print(f"{'':20}{'objects/s':>11}{'failed':>8}{'retried':>9}{'stored':>8}")
+    try:
+        for label, run in runs:
+            if client is not None:
+                collection = WeaviateCollection(client)
+            else:
+                collection = FakeCollection(FakeData(args.rtt_ms / 1000, args.object_us / 1e6, args.failure_rate))
+            started = time.perf_counter()
+            failed, retried = await run(collection)
+            elapsed = time.perf_counter() - started
+            # Writing the same chunks again must overwrite, not duplicate
+            await run(collection)
+            print(f"{label:20}{args.objects / elapsed:>11.0f}{failed:>8}{retried:>9}{collection.count():>8}")
+    finally:
+        if client is not None:
+            client.collections.delete(SCRATCH_COLLECTION)
+            client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4, help="VectorWriter requests in flight")
+    parser.add_argument("--rtt-ms", type=float, default=30.0, help="Fake: fixed cost per insert_many request")
+    parser.add_argument("--object-us", type=float, default=200.0, help="Fake: cost per object")
+    parser.add_argument("--failure-rate", type=float, default=0.01, help="Fake: share of objects rejected")
+    parser.add_argument("--weaviate", metavar="HOST:PORT:GRPC_PORT", help="Write to a local Weaviate instead")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+# backend/loadtest/fakes.py
+"""
+In-process stand-ins for Firestore, Firebase Auth/Storage and Weaviate.
+
+They implement the subset of each client API the application uses, with optional
+per-call latency so capacity runs see realistic I/O wait.
+"""
+import asyncio
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from google.cloud.firestore_v1 import transforms
+from langchain_core.documents import Document
+from weaviate.collections.classes.batch import BatchObjectReturn, DeleteManyReturn
+
+
+def _apply_value(current: Any, value: Any) -> Any:
+    if isinstance(value, transforms.ArrayUnion):
+        current = list(current or [])
+        return current + [v for v in value.values if v not in current]
+    if isinstance(value, transforms.ArrayRemove):
+        return [v for v in (current or []) if v not in value.values]
+    if isinstance(value, transforms.Increment):
+        return (current or 0) + value.value
+    if value is transforms.SERVER_TIMESTAMP:
+        return time.time()
+    return copy.deepcopy(value)
+
+
+def _set_path(data: dict, path: str, value: Any):
+    *parents, leaf = path.split('.')
+    for part in parents:
+        data = data.setdefault(part, {})
+    if value is transforms.DELETE_FIELD:
+        data.pop(leaf, None)
+    else:
+        data[leaf] = _apply_value(data.get(leaf), value)
+
+
+def _get_path(data: dict, path: str) -> Any:
+    for part in path.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+class FakeSnapshot:
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[dict]):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str) -> Any:
+        return copy.deepcopy(_get_path(self._data or {}, field_path))
+
+
+class FakeDocumentReference:
+    def __init__(self, db: "InMemoryFirestore", path: str):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def collection(self, name: str) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._db, f"{self.path}/{name}")
+
+    def get(self, *args, **kwargs) -> FakeSnapshot:
+        self._db.wait()
+        with self._db.lock:
+            return FakeSnapshot(self, copy.deepcopy(self._db.documents.get(self.path)))
+
+    def set(self, data: dict, merge: bool = False):
+        self._db.wait()
+        with self._db.lock:
+            self._db.set(self.path, data, merge)
+
+    def update(self, data: dict):
+        self._db.wait()
+        with self._db.lock:
+            self._db.update(self.path, data)
+
+    def delete(self):
+        self._db.wait()
+        with self._db.lock:
+            self._db.documents.pop(self.path, None)
+
+
+class FakeQuery:
+    _OPS = {
+        '==': lambda a, b: a == b,
+        '!=': lambda a, b: a != b,
+        '<': lambda a, b: a is not None and a < b,
+        '<=': lambda a, b: a is not None and a <= b,
+        '>': lambda a, b: a is not None and a > b,
+        '>=': lambda a, b: a is not None and a >= b,
+        'in': lambda a, b: a in b,
+        'array_contains': lambda a, b: b in (a or []),
+    }
+
+    def __init__(self, db: "InMemoryFirestore", path: str, filters=(), orders=(), limit_to=None,
+                 fields=None, cursor=None):
+        self._db = db
+        self._path = path
+        self._filters = list(filters)
+        self._orders = list(orders)
+        self._limit = limit_to
+        self._fields = fields
+        self._cursor = cursor
+
+    def _copy(self, **changes) -> "FakeQuery":
+        state = dict(filters=self._filters, orders=self._orders, limit_to=self._limit,
+                     fields=self._fields, cursor=self._cursor)
+        state.update(changes)
+        return FakeQuery(self._db, self._path, **state)
+
+    def where(self, field_path: str = None, op_string: str = None, value: Any = None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + [(field_path, op_string, value)])
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING"):
+        return self._copy(orders=self._orders + [(field_path, direction)])
+
+    def limit(self, count: int):
+        return self._copy(limit_to=count)
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(cursor=document_fields_or_snapshot)
+
+    def _matches(self) -> List[FakeSnapshot]:
+        prefix = self._path + '/'
+        results = []
+        for path, data in self._db.documents.items():
+            if not path.startswith(prefix) or '/' in path[len(prefix):]:
+                continue
+            if all(self._OPS[op](_get_path(data, field), value) for field, op, value in self._filters):
+                results.append((path, data))
+
+        def value(item, field):
+            # "__name__" orders by document id, like Firestore
+            return item[0].rsplit('/', 1)[-1] if field == '__name__' else _get_path(item[1], field)
+
+        for field, direction in reversed(self._orders):
+            results.sort(key=lambda item: (value(item, field) is None, value(item, field)),
+                         reverse=direction in ("DESCENDING", "desc"))
+
+        if self._cursor is not None:
+            cursor = self._cursor
+            if isinstance(cursor, FakeSnapshot):
+                cursor = {field: cursor.id if field == '__name__' else cursor.get(field) for field, _ in self._orders}
+            values = [cursor.get(field) for field, _ in self._orders]
+            for i, item in enumerate(results):
+                if [value(item, field) for field, _ in self._orders] == values:
+                    results = results[i + 1:]
+                    break
+
+        if self._limit is not None:
+            results = results[:self._limit]
+
+        snapshots = []
+        for path, data in results:
+            data = copy.deepcopy(data)
+            if self._fields is not None:
+                projected = {}
+                for field in self._fields:
+                    value = _get_path(data, field)
+                    if value is not None:
+                        _set_path(projected, field, value)
+                data = projected
+            snapshots.append(FakeSnapshot(FakeDocumentReference(self._db, path), data))
+        return snapshots
+
+    def stream(self, *args, **kwargs):
+        self._db.wait()
+        with self._db.lock:
+            return iter(self._matches())
+
+    def get(self, *args, **kwargs) -> List[FakeSnapshot]:
+        return list(self.stream())
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, db: "InMemoryFirestore", path: str):
+        super().__init__(db, path)
+        self.id = path.rsplit('/', 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self._db, f"{self._path}/{document_id or uuid.uuid4().hex}")
+
+
+class FakeWriteBatch:
+    def __init__(self, db: "InMemoryFirestore"):
+        self._db = db
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(('set', reference, data, merge))
+
+    def update(self, reference, data):
+        self._writes.append(('update', reference, data, None))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None, None))
+
+    def commit(self):
+        self._db.wait()
+        with self._db.lock:
+            for kind, reference, data, merge in self._writes:
+                if kind == 'set':
+                    self._db.set(reference.path, data, merge)
+                elif kind == 'update':
+                    self._db.update(reference.path, data)
+                else:
+                    self._db.documents.pop(reference.path, None)
+        self._writes = []
+
+
+class FakeTransaction(FakeWriteBatch):
+    """Serializes transactions by holding the database lock from begin to commit."""
+
+    _read_only = False
+    _max_attempts = 1
+
+    def __init__(self, db: "InMemoryFirestore"):
+        super().__init__(db)
+        self._id = None
+
+    def _clean_up(self):
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._db.lock.acquire()
+        self._id = uuid.uuid4().bytes
+
+    def _commit(self):
+        try:
+            self.commit()
+        finally:
+            self._release()
+
+    def _rollback(self):
+        self._writes = []
+        self._release()
+
+    def _release(self):
+        if self._id is not None:
+            self._id = None
+            self._db.lock.release()
+
+    def get(self, reference):
+        return reference.get()
+
+    def get_all(self, references):
+        return list(self._db.get_all(references))
+
+
+class InMemoryFirestore:
+    """Thread-safe in-memory Firestore with per-call `latency` in seconds."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.documents: Dict[str, dict] = {}
+        self.lock = threading.RLock()
+        self.operations = 0
+
+    def wait(self):
+        self.operations += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def set(self, path: str, data: dict, merge: bool):
+        current = self.documents.get(path) if merge else None
+        document = copy.deepcopy(current) if current else {}
+        for key, value in data.items():
+            _set_path(document, key, value)
+        self.documents[path] = document
+
+    def update(self, path: str, data: dict):
+        if path not in self.documents:
+            raise KeyError(f"No document to update: {path}")
+        for key, value in data.items():
+            _set_path(self.documents[path], key, value)
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def document(self, path: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self, path)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self, **kwargs) -> FakeTransaction:
+        return FakeTransaction(self)
+
+    def get_all(self, references, *args, **kwargs):
+        self.wait()
+        with self.lock:
+            for reference in references:
+                yield FakeSnapshot(reference, copy.deepcopy(self.documents.get(reference.path)))
+
+
+class AsyncFakeDocumentReference:
+    def __init__(self, client: "AsyncInMemoryFirestore", reference: FakeDocumentReference):
+        self._client = client
+        self._reference = reference
+        self.path = reference.path
+        self.id = reference.id
+
+    def collection(self, name: str) -> "AsyncFakeQuery":
+        return AsyncFakeQuery(self._client, self._reference.collection(name))
+
+    async def get(self, *args, **kwargs) -> FakeSnapshot:
+        await self._client.wait()
+        return self._reference.get()
+
+    async def set(self, data: dict, merge: bool = False):
+        await self._client.wait()
+        self._reference.set(data, merge)
+
+    async def update(self, data: dict):
+        await self._client.wait()
+        self._reference.update(data)
+
+    async def delete(self):
+        await self._client.wait()
+        self._reference.delete()
+
+
+class AsyncFakeQuery:
+    def __init__(self, client: "AsyncInMemoryFirestore", query: FakeQuery):
+        self._client = client
+        self._query = query
+
+    def __getattr__(self, name):
+        # where/order_by/select/start_after/limit build a new query
+        method = getattr(self._query, name)
+        return lambda *args, **kwargs: AsyncFakeQuery(self._client, method(*args, **kwargs))
+
+    def document(self, document_id: Optional[str] = None) -> AsyncFakeDocumentReference:
+        return AsyncFakeDocumentReference(self._client, self._query.document(document_id))
+
+    async def stream(self, *args, **kwargs):
+        await self._client.wait()
+        for snapshot in self._query.stream():
+            yield snapshot
+
+    async def get(self, *args, **kwargs) -> List[FakeSnapshot]:
+        return [snapshot async for snapshot in self.stream()]
+
+
+class AsyncFakeWriteBatch:
+    def __init__(self, client: "AsyncInMemoryFirestore"):
+        self._client = client
+        self._batch = client.view.batch()
+
+    def set(self, reference, data, merge=False):
+        self._batch.set(reference._reference, data, merge)
+
+    def update(self, reference, data):
+        self._batch.update(reference._reference, data)
+
+    def delete(self, reference):
+        self._batch.delete(reference._reference)
+
+    async def commit(self):
+        await self._client.wait()
+        self._batch.commit()
+
+
+class AsyncInMemoryFirestore:
+    """
+    AsyncClient-shaped view of an InMemoryFirestore. It shares the documents and the
+    lock, and awaits the per-call latency instead of sleeping.
+    """
+
+    def __init__(self, db: InMemoryFirestore):
+        self.db = db
+        # Same data, no latency: the view's sleeps would block the event loop
+        self.view = InMemoryFirestore()
+        self.view.documents = db.documents
+        self.view.lock = db.lock
+
+    async def wait(self):
+        self.db.operations += 1
+        if self.db.latency:
+            await asyncio.sleep(self.db.latency)
+
+    def collection(self, name: str) -> AsyncFakeQuery:
+        return AsyncFakeQuery(self, self.view.collection(name))
+
+    def document(self, path: str) -> AsyncFakeDocumentReference:
+        return AsyncFakeDocumentReference(self, self.view.document(path))
+
+    def batch(self) -> AsyncFakeWriteBatch:
+        return AsyncFakeWriteBatch(self)
+
+    async def get_all(self, references, *args, **kwargs):
+        await self.wait()
+        for snapshot in self.view.get_all([reference._reference for reference in references]):
+            yield snapshot
+
+    def close(self):
+        pass
+
+
+class FakeAuth:
+    """Accepts any token of the form `<uid>` and treats it as that user's ID token."""
+
+    class InvalidIdTokenError(Exception):
+        pass
+
+    def verify_id_token(self, token: str, *args, **kwargs) -> dict:
+        if not token:
+            raise self.InvalidIdTokenError("Empty token")
+        return {"uid": token}
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeStorageBucket", path: str):
+        self.bucket = bucket
+        self.name = path
+
+    def upload_from_filename(self, filename, content_type=None):
+        with open(filename, 'rb') as f:
+            self.bucket.blobs[self.name] = f.read()
+
+    def upload_from_file(self, file_obj, content_type=None, **kwargs):
+        self.bucket.blobs[self.name] = file_obj.read()
+
+    def generate_signed_url(self, *args, **kwargs) -> str:
+        return f"http://fake-storage/{self.bucket.name}/{self.name}"
+
+    def delete(self):
+        self.bucket.blobs.pop(self.name, None)
+
+
+class FakeStorageBucket:
+    def __init__(self, name: str = "loadtest-bucket"):
+        self.name = name
+        self.blobs: Dict[str, bytes] = {}
+
+    def blob(self, path: str) -> FakeBlob:
+        return FakeBlob(self, path)
+
+
+class _FakeCollectionData:
+    def insert_many(self, objects) -> BatchObjectReturn:
+        uuids = {i: uuid.uuid4() for i in range(len(objects))}
+        return BatchObjectReturn(_all_responses=list(uuids.values()), uuids=uuids)
+
+    def delete_many(self, *args, **kwargs):
+        return DeleteManyReturn(failed=0, matches=0, objects=None, successful=0)
+
+
+class _FakeCollection:
+    data = _FakeCollectionData()
+
+
+class _FakeCollections:
+    def get(self, name: str) -> _FakeCollection:
+        return _FakeCollection()
+
+
+class FakeWeaviateClient:
+    collections = _FakeCollections()
+
+    def is_ready(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+def fake_vector(text: str, dimensions: int) -> List[float]:
+    """Deterministic pseudo-random unit vector for `text`."""
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+    vector = np.random.default_rng(seed).normal(size=dimensions)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeVectorStore:
+    """
+    Drop-in for WeaviateVectorStore's search API over a fixed synthetic corpus.
+    `latency` (seconds) is added to every search.
+    """
+    corpus_size = 200
+    dimensions = 64
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        self._texts = [
+            f"Abschnitt {i}: Hinweise zu Ernährung, Schlaf und Stressbewältigung, Teil {i % 17}."
+            for i in range(self.corpus_size)
+        ]
+        self._vectors = [fake_vector(text, self.dimensions) for text in self._texts]
+
+    async def asimilarity_search_by_vector(self, embedding, k: int = 4, **kwargs) -> List[Document]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        query = np.asarray(embedding[:self.dimensions])
+        scores = np.asarray(self._vectors) @ (query / (np.linalg.norm(query) or 1.0))
+        top = np.argsort(-scores)[:k]
+        include_vector = kwargs.get("include_vector", False)
+        return [
+            Document(
+                page_content=self._texts[i],
+                metadata={"upload_id": "loadtest", **({"vector": self._vectors[i]} if include_vector else {})},
+            )
+            for i in top
+        ]
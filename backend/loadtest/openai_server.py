@@ -0,0 +1,118 @@
+# backend/loadtest/openai_server.py
+"""
+Minimal OpenAI-compatible server for load tests.
+
+Serves /v1/chat/completions (streaming and non-streaming) and /v1/embeddings with
+configurable time to first token, per-token latency and error rate.
+"""
+import asyncio
+import base64
+import json
+import random
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from loadtest.fakes import FakeVectorStore, fake_vector
+
+
+@dataclass
+class FakeOpenAIConfig:
+    first_token_latency: float = 0.3  # Seconds before the first token
+    token_latency: float = 0.02  # Seconds between tokens
+    answer_tokens: int = 120  # Tokens per answer
+    embedding_latency: float = 0.05
+    error_rate: float = 0.0  # Share of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # Share of requests answered with HTTP 429
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": "server_error", "code": None}}, status_code=status)
+
+
+def create_app(config: FakeOpenAIConfig) -> Starlette:
+    stats = {"chat_requests": 0, "embedding_requests": 0, "errors": 0}
+
+    def maybe_fail():
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            stats["errors"] += 1
+            return _error(429, "Rate limit reached (fake)")
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats["errors"] += 1
+            return _error(500, "Internal error (fake)")
+        return None
+
+    async def chat_completions(request: Request):
+        stats["chat_requests"] += 1
+        body = await request.json()
+        failure = maybe_fail()
+        if failure is not None:
+            return failure
+
+        model = body.get("model", "fake-model")
+        completion_id = f"chatcmpl-{random.getrandbits(64):x}"
+        created = int(time.time())
+        tokens = [f"Wort{i} " for i in range(config.answer_tokens)]
+
+        if not body.get("stream"):
+            await asyncio.sleep(config.first_token_latency + config.token_latency * len(tokens))
+            return JSONResponse({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens)}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+            })
+
+        def chunk(delta: dict, finish_reason=None) -> str:
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            await asyncio.sleep(config.first_token_latency)
+            yield chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(config.token_latency)
+                yield chunk({"content": token})
+            yield chunk({}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def embeddings(request: Request):
+        stats["embedding_requests"] += 1
+        body = await request.json()
+        failure = maybe_fail()
+        if failure is not None:
+            return failure
+        await asyncio.sleep(config.embedding_latency)
+
+        inputs = body.get("input")
+        if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        data = []
+        for i, item in enumerate(inputs):
+            vector = fake_vector(json.dumps(item), FakeVectorStore.dimensions)
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        return JSONResponse({
+            "object": "list", "data": data, "model": body.get("model", "fake-embedding"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        })
+
+    app = Starlette(routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/embeddings", embeddings, methods=["POST"]),
+    ])
+    app.state.stats = stats
+    return app
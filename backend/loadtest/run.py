@@ -0,0 +1,294 @@
+# backend/loadtest/run.py
+"""
+End-to-end chat load test against in-process fakes.
+
+Boots the FastAPI app from main.py with an in-memory Firestore, fake Auth/Storage,
+a fake vector store and a local OpenAI-compatible streaming server, then drives
+concurrent users through /chat/new, /chat/{id}/message and /chat/{id}/stream.
+
+    python -m loadtest.run --users 50 --turns 5 --token-latency 0.02
+
+No Firebase, Weaviate or OpenAI credentials are needed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FRONTEND_DIR = BACKEND_DIR.parent / "frontend"
+
+# Settings the app requires; fakes stand in for every external service
+_DEFAULT_ENV = {
+    "ALLOW_ORIGINS": "http://localhost",
+    "OPENAI_API_KEY": "loadtest",
+    "MODEL": "gpt-4o-mini",
+    "EMBEDDING_MODEL": "text-embedding-3-small",
+    "EMBEDDING_DIMENSIONS": "64",
+    "DOCS_DIR": "/tmp/neltingai-loadtest/docs",
+    "EXPORT_DIR": "/tmp/neltingai-loadtest/export",
+    "UPLOAD_DIR": "/tmp/neltingai-loadtest/uploads",
+    "VECTOR_SEARCH_TOP_K": "4",
+    "LANGFUSE_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+}
+_REQUIRED_STRINGS = [
+    "FIREBASE_STORAGE_BUCKET", "SERVICE_ACCOUNT_KEY_PATH", "WEAVIATE_HOST", "WEAVIATE_API_KEY",
+    "WEAVIATE_URL", "MAIN_SYSTEM_PROMPT", "LANGFUSE_SECRET_KEY", "LANGFUSE_PUBLIC_KEY", "LANGFUSE_HOST",
+    "FIREBASE_TYPE", "FIREBASE_PROJECT_ID", "FIREBASE_PRIVATE_KEY_ID", "FIREBASE_PRIVATE_KEY",
+    "FIREBASE_CLIENT_EMAIL", "FIREBASE_CLIENT_ID", "FIREBASE_AUTH_URI", "FIREBASE_TOKEN_URI",
+    "FIREBASE_AUTH_PROVIDER_X509_CERT_URL", "FIREBASE_CLIENT_X509_CERT_URL", "FIREBASE_UNIVERSE_DOMAIN",
+    "FRONTEND_FIREBASE_API_KEY", "FRONTEND_FIREBASE_AUTH_DOMAIN", "FRONTEND_FIREBASE_PROJECT_ID",
+    "FRONTEND_FIREBASE_STORAGE_BUCKET", "FRONTEND_FIREBASE_MESSAGING_SENDER_ID", "FRONTEND_FIREBASE_APP_ID",
+    "FRONTEND_FIREBASE_MEASUREMENT_ID",
+]
+_REQUIRED_NUMBERS = {"WEAVIATE_PORT": "8080", "WEAVIATE_GRPC_PORT": "50051",
+                     "WEAVIATE_GRPC_SECURE": "false", "WEAVIATE_HTTP_SECURE": "false"}
+
+
+def configure_environment(openai_port: int):
+    for key, value in {**_DEFAULT_ENV, **_REQUIRED_NUMBERS}.items():
+        os.environ.setdefault(key, value)
+    for key in _REQUIRED_STRINGS:
+        os.environ.setdefault(key, "loadtest")
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{openai_port}/v1"
+    os.environ.setdefault("FRONTEND_DIR", str(FRONTEND_DIR))
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+
+def install_fakes(main_module, firestore, vector_store_latency: float):
+    """Replaces the external-service initializers used by main.lifespan with fakes."""
+    from loadtest import fakes
+    import app.assistants.assistant as assistant_module
+    from app.repository import FirestoreRepository
+
+    def initialize_firebase_app(app):
+        app.state.firestore = FirestoreRepository(fakes.AsyncInMemoryFirestore(firestore), firestore)
+        app.state.storage_bucket = fakes.FakeStorageBucket()
+        app.state.auth_client = fakes.FakeAuth()
+
+    def initialize_weaviate_client(app):
+        app.state.weaviate_client = fakes.FakeWeaviateClient()
+
+    async def test_weaviate_connection(app):
+        pass
+
+    main_module.initialize_firebase_app = initialize_firebase_app
+    main_module.close_firebase_app = lambda app: app.state.firestore.close()
+    main_module.initialize_weaviate_client = initialize_weaviate_client
+    main_module.ensure_weaviate_schema = lambda app: None
+    main_module.test_weaviate_connection = test_weaviate_connection
+
+    fakes.FakeVectorStore.latency = vector_store_latency
+    assistant_module.WeaviateVectorStore = fakes.FakeVectorStore
+
+
+@dataclass
+class TurnResult:
+    ok: bool
+    time_to_first_token: Optional[float] = None
+    latency: Optional[float] = None
+    tokens: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class Report:
+    users: int
+    turns_per_user: int
+    wall_time: float
+    turns: int
+    failed_turns: int
+    turns_per_second: float
+    tokens_per_second: float
+    ttft_p50: Optional[float]
+    ttft_p95: Optional[float]
+    ttft_p99: Optional[float]
+    latency_p50: Optional[float]
+    latency_p95: Optional[float]
+    latency_p99: Optional[float]
+    firestore_ops_per_turn: Optional[float] = None  # Including the user lookup of each request
+    errors: dict = field(default_factory=dict)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+async def run_turn(client, chat_id: str, question: str) -> TurnResult:
+    started = time.perf_counter()
+    response = await client.post(f"/chat/{chat_id}/message", json={"question": question})
+    if response.status_code != 200:
+        return TurnResult(ok=False, error=f"message HTTP {response.status_code}")
+
+    ttft = None
+    tokens = 0
+    async with client.stream("GET", f"/chat/{chat_id}/stream") as stream:
+        if stream.status_code != 200:
+            return TurnResult(ok=False, error=f"stream HTTP {stream.status_code}")
+        async for line in stream.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data.startswith("Error:"):
+                return TurnResult(ok=False, error=data[:80])
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            tokens += 1
+    return TurnResult(ok=True, time_to_first_token=ttft, latency=time.perf_counter() - started, tokens=tokens)
+
+
+# Mix of turns that exercise every route of app.assistants.routing
+QUESTIONS = (
+    "Was hilft gegen Stress?",
+    "Welche Nebenwirkungen kann Baldrian haben und wie dosiere ich es richtig?",
+    "Danke für die Hilfe!",
+)
+
+
+async def run_user(base_url: str, user_id: str, turns: int, think_time: float) -> List[TurnResult]:
+    import httpx
+
+    results = []
+    async with httpx.AsyncClient(base_url=base_url, cookies={"access_token": user_id},
+                                 timeout=httpx.Timeout(300.0)) as client:
+        response = await client.post("/chat/new")
+        if response.status_code != 200:
+            return [TurnResult(ok=False, error=f"new chat HTTP {response.status_code}")] * turns
+        chat_id = response.json()["chat_id"]
+        for turn in range(turns):
+            try:
+                results.append(await run_turn(client, chat_id, QUESTIONS[turn % len(QUESTIONS)]))
+            except Exception as e:
+                results.append(TurnResult(ok=False, error=type(e).__name__))
+            if think_time:
+                await asyncio.sleep(think_time)
+    return results
+
+
+async def serve(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def run(args) -> Report:
+    from loadtest.fakes import InMemoryFirestore
+    from loadtest.openai_server import FakeOpenAIConfig, create_app
+
+    openai_config = FakeOpenAIConfig(
+        first_token_latency=args.first_token_latency,
+        token_latency=args.token_latency,
+        answer_tokens=args.answer_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    openai_server, openai_task = await serve(create_app(openai_config), args.openai_port)
+
+    configure_environment(args.openai_port)
+    import main as main_module
+
+    firestore = InMemoryFirestore(latency=args.firestore_latency)
+    for i in range(args.users):
+        firestore.collection("user").document(f"loadtest-user-{i}").set(
+            {"uid": f"loadtest-user-{i}", "username": f"Nutzer {i}", "email": f"user{i}@example.com", "role": "user"}
+        )
+    install_fakes(main_module, firestore, args.vector_latency)
+    app_server, app_task = await serve(main_module.app, args.port)
+
+    try:
+        started = time.perf_counter()
+        operations_before = firestore.operations
+        per_user = await asyncio.gather(*[
+            run_user(f"http://127.0.0.1:{args.port}", f"loadtest-user-{i}", args.turns, args.think_time)
+            for i in range(args.users)
+        ])
+        wall_time = time.perf_counter() - started
+        operations = firestore.operations - operations_before
+    finally:
+        app_server.should_exit = True
+        openai_server.should_exit = True
+        await asyncio.gather(app_task, openai_task, return_exceptions=True)
+
+    results = [result for user in per_user for result in user]
+    ok = [r for r in results if r.ok]
+    errors = {}
+    for r in results:
+        if not r.ok:
+            errors[r.error] = errors.get(r.error, 0) + 1
+    ttfts = [r.time_to_first_token for r in ok if r.time_to_first_token is not None]
+    latencies = [r.latency for r in ok]
+    return Report(
+        users=args.users,
+        turns_per_user=args.turns,
+        wall_time=wall_time,
+        turns=len(results),
+        failed_turns=len(results) - len(ok),
+        turns_per_second=len(ok) / wall_time,
+        tokens_per_second=sum(r.tokens for r in ok) / wall_time,
+        ttft_p50=percentile(ttfts, 50), ttft_p95=percentile(ttfts, 95), ttft_p99=percentile(ttfts, 99),
+        latency_p50=percentile(latencies, 50), latency_p95=percentile(latencies, 95),
+        latency_p99=percentile(latencies, 99),
+        firestore_ops_per_turn=operations / len(results) if results else None,
+        errors=errors,
+    )
+
+
+def print_report(report: Report):
+    def ms(value):
+        return f"{value * 1000:8.1f} ms" if value is not None else "       n/a"
+
+    print(f"users={report.users} turns/user={report.turns_per_user} wall={report.wall_time:.1f}s")
+    print(f"turns: {report.turns} ({report.failed_turns} failed)")
+    print(f"throughput: {report.turns_per_second:.2f} turns/s, {report.tokens_per_second:.0f} tokens/s")
+    print(f"{'':16}{'p50':>11}{'p95':>11}{'p99':>11}")
+    print(f"{'first token':16}{ms(report.ttft_p50)}{ms(report.ttft_p95)}{ms(report.ttft_p99)}")
+    print(f"{'turn latency':16}{ms(report.latency_p50)}{ms(report.latency_p95)}{ms(report.latency_p99)}")
+    if report.firestore_ops_per_turn is not None:
+        print(f"firestore: {report.firestore_ops_per_turn:.1f} operations/turn (incl. new chat and user lookups)")
+    for error, count in sorted(report.errors.items(), key=lambda item: -item[1]):
+        print(f"error: {error} x{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Concurrent users")
+    parser.add_argument("--turns", type=int, default=3, help="Chat turns per user")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between a user's turns (s)")
+    parser.add_argument("--first-token-latency", type=float, default=0.3, help="Fake LLM time to first token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="Fake LLM delay per token (s)")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="Tokens per fake answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of LLM calls failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of LLM calls failing with 429")
+    parser.add_argument("--firestore-latency", type=float, default=0.01, help="Fake Firestore latency per call (s)")
+    parser.add_argument("--vector-latency", type=float, default=0.03, help="Fake vector search latency (s)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--openai-port", type=int, default=8766)
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(asdict(report), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
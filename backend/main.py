@@ -11,7 +11,6 @@ from app.config import settings
 import logging
 import sys
 from app.db import close_weaviate_client, get_weaviate_client
-from starlette.middleware.base import BaseHTTPMiddleware
 from app.api.documents import router as documents_router
 from fastapi import FastAPI, Request, Depends
 from contextlib import asynccontextmanager
@@ -24,6 +23,14 @@ from app.api import (
     documents_router
 )
 from app.firebase import initialize_firebase_app, close_firebase_app
+from app.metrics import router as metrics_router
+from app.health import router as health_router, initialize_health, start_dependency, firestore_check, weaviate_check
+from app.assistants.admission import initialize_admission_controller
+from app.assistants.registry import initialize_assistant_registry, close_assistant_registry
+from app.assistants.assistant import drain_turns
+from app.assistants.turns import initialize_turn_journal, close_turn_journal
+from app.clients import initialize_client_pool, close_client_pool
+from app.loaders.executor import initialize_extraction_pool, close_extraction_pool
 from app.db import (
     initialize_weaviate_client,
     ensure_weaviate_schema,
@@ -31,44 +38,50 @@ from app.db import (
     close_weaviate_client
 )
 from app.config import settings
+from app.logging_config import configure_logging, shutdown_logging
+from app.middleware import RequestLoggingMiddleware
+import asyncio
 import logging
 import sys
-from starlette.middleware.base import BaseHTTPMiddleware
-
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,  # Changed to DEBUG for more detailed logs
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-logger = logging.getLogger(__name__)
 
-class DebugMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if "Authorization" in request.headers:
-            logger.debug(f"Authorization Header: {request.headers['Authorization']}")
-        response = await call_next(request)
-        return response
+# Configure logging: records are queued on the loop and written by a listener thread
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Define the lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    health = initialize_health(app)
     try:
-        # Startup logic
-        initialize_firebase_app(app)
-        logger.info("Firebase initialized.")
-        
-        initialize_weaviate_client(app)
-        logger.info("Weaviate client initialized.")
-        
-        ensure_weaviate_schema(app)
-        logger.info("Weaviate schema ensured.")
-        
-        test_weaviate_connection(app)
-        logger.info("Weaviate connection tested.")
-        
+        # Startup logic: independent dependencies start concurrently
+        async def start_firebase():
+            # On the loop: the async Firestore client binds to it
+            initialize_firebase_app(app)
+            logger.info("Firebase initialized.")
+            # Replays chat turns a crashed process could not write
+            await initialize_turn_journal(app)
+
+        async def start_weaviate():
+            await asyncio.to_thread(initialize_weaviate_client, app)
+            logger.info("Weaviate client initialized.")
+            await test_weaviate_connection(app)
+            await asyncio.to_thread(ensure_weaviate_schema, app)
+            logger.info("Weaviate schema ensured.")
+
+        await asyncio.gather(
+            start_dependency(app, "firestore", start_firebase, firestore_check(app)),
+            start_dependency(app, "weaviate", start_weaviate, weaviate_check(app)),
+            start_dependency(app, "http_clients", lambda: initialize_client_pool(app)),
+        )
+
+        initialize_admission_controller(app)
+        logger.info("Admission controller initialized.")
+
+        initialize_assistant_registry(app)
+
+        initialize_extraction_pool(app)
+
+        health.started = True
         logger.info("Application startup complete.")
         
         yield  # Application runs here
@@ -78,14 +91,25 @@ async def lifespan(app: FastAPI):
         sys.exit(1)  # Exit the application if startup fails
         
     finally:
-        # Shutdown logic
+        # Shutdown logic: running chat turns finish before the clients they use close
+        health.draining = True
+        await drain_turns(app, settings.SHUTDOWN_DRAIN_TIMEOUT)
+        await close_assistant_registry(app)
+
+        await close_client_pool(app)
+
+        close_extraction_pool(app)
+
         close_weaviate_client(app)
         logger.info("Weaviate client closed.")
+
+        close_turn_journal(app)
         
         close_firebase_app(app)
         logger.info("Firebase Admin SDK closed.")
         
         logger.info("Application shutdown complete.")
+        shutdown_logging()
 
 # Initialize FastAPI application with lifespan
 app = FastAPI(
@@ -102,6 +126,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Page-Token"],
 )
 
 # Include API routers with appropriate prefixes and tags
@@ -112,7 +137,9 @@ app.include_router(upload_router, prefix="/upload", tags=["Upload"])
 app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 app.include_router(firebase_config_router, tags=["Configuration"])
 app.include_router(documents_router, prefix="/api", tags=["Documents"])  # Include Documents Router
-app.add_middleware(DebugMiddleware)
+app.include_router(metrics_router, tags=["Monitoring"])  # Prometheus scrape endpoint
+app.include_router(health_router)  # /livez, /readyz and /health
+app.add_middleware(RequestLoggingMiddleware)
 
 
 # Serve frontend static files with SPA fallback
@@ -131,7 +158,7 @@ class SPAStaticFiles(StaticFiles):
         return response
 
 # Define the frontend directory using pathlib for better path handling
-frontend_dir = Path("/Volumes/External/Netling AI/frontend")
+frontend_dir = Path(settings.FRONTEND_DIR)
 
 # Verify that the directory exists
 if not frontend_dir.is_dir():
@@ -141,11 +168,6 @@ if not frontend_dir.is_dir():
 # Mount static files using the custom SPAStaticFiles class
 app.mount("/", SPAStaticFiles(directory=str(frontend_dir), html=True), name="frontend")
 
-# Health Check Endpoint
-@app.get('/health', tags=["Health Check"])
-def health_check():
-    return {'status': 'ok'}
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 @app.get("/secure-endpoint")
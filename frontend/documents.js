@@ -1,6 +1,7 @@
 // Configuration
 const API_BASE_URL = 'http://127.0.0.1:8000'; // Adjust as necessary
 const DOCUMENTS_ENDPOINT = '/api/documents'; // Endpoint to fetch documents
+const DOCUMENTS_PAGE_SIZE = 100; // Documents per listing page
 const UPLOAD_ENDPOINT = '/upload/upload-file/'; // Endpoint to upload files
 const LOGOUT_ENDPOINT = '/auth/logout'; // Endpoint to handle logout
 
@@ -71,12 +72,19 @@ async function checkAdminAccess(user) {
     }
   }
 
-// Fetch and Render Documents
-async function fetchAndRenderDocuments() {
-  try {
-    documentsContainer.innerHTML = '<p>Loading documents...</p>';
+// Fetch every page of the document listing. The browser cache revalidates each page
+// with its ETag, so unchanged pages come back as cheap 304s.
+async function fetchAllDocuments() {
+  const documents = [];
+  let pageToken = null;
+  do {
+    const url = new URL(`${API_BASE_URL}${DOCUMENTS_ENDPOINT}`);
+    url.searchParams.set('limit', DOCUMENTS_PAGE_SIZE);
+    if (pageToken) {
+      url.searchParams.set('page_token', pageToken);
+    }
 
-    const response = await fetch(`${API_BASE_URL}${DOCUMENTS_ENDPOINT}`, {
+    const response = await fetch(url, {
       method: 'GET',
       credentials: 'include',
       headers: { 'Content-Type': 'application/json' },
@@ -89,7 +97,18 @@ async function fetchAndRenderDocuments() {
       throw new Error(`Error fetching documents: ${response.statusText}`);
     }
 
-    const data = await response.json();
+    documents.push(...await response.json());
+    pageToken = response.headers.get('X-Next-Page-Token');
+  } while (pageToken);
+  return documents;
+}
+
+// Fetch and Render Documents
+async function fetchAndRenderDocuments() {
+  try {
+    documentsContainer.innerHTML = '<p>Loading documents...</p>';
+
+    const data = await fetchAllDocuments();
     documentsContainer.innerHTML = '';
 
     if (data.length === 0) {